@@ -1,15 +1,36 @@
 # app_final.py
 import streamlit as st
-import json
+import functools
+import time
+import numpy as np
 import pandas as pd
+import io
 import os
+import shutil
+import tempfile
 from pathlib import Path
 import hashlib
 from datetime import datetime
-import smtplib
-from email.message import EmailMessage
-import requests
-from openpyxl import load_workbook
+from receivables import core
+from receivables.cache import LRUCache, bytes_digest, file_digest
+from receivables.core import rate_table
+from receivables.currency import DEFAULT_INR_RATES
+from receivables.ingest import (
+    STREAMING_THRESHOLD_BYTES, list_sheets, looks_like_ledger, make_process_pool, merge_sources, parse_sources,
+    persist_upload, stream_ingest,
+)
+from receivables.ledger import build_ledger
+from receivables.diff import diff_ledgers, load_diff, save_diff
+from receivables.dispatch import Dispatcher
+from receivables.figures import FigureCache
+from receivables.mailer import build_html_message
+from receivables.rates import RateProvider
+from receivables.outbox import ALREADY_SENT, IN_FLIGHT, Outbox, invoice_set_hash
+from receivables.reminders import ReminderTemplates, clients_with_dues, due_invoice_ids, reminder_recipients, reminder_subject
+from receivables.settings import CLIENT_EMAILS, FX_RATES, SENDER, UPLOAD_TIME, USD_INR_RATE, open_settings
+from receivables.schema import ROLE_LABELS, ROLES, effective_roles, infer_schema, load_schema, save_schema, schema_for, with_overrides
+from receivables.snapshot import write_snapshot
+from receivables.tracing import Tracer, TraceLog
 
 # --- CONFIG ---
 st.set_page_config(page_title="S2 Client Recievable's", page_icon=r"assets\s2logo.png", layout="wide")
@@ -58,156 +79,10 @@ def check_password(input_password):
 # --- LOGO PATH ---
 logo_path = Path(__file__).parent / "assets" / "s2logo.png"
 
-# --- LIVE RATE + CURRENCY HELPERS ---
-def get_live_usd_to_inr_rate(default_rate=83.0):
-    """Fetch live USD->INR rate (exchangerate.host). Fallback to default_rate."""
-    try:
-        url = "https://api.exchangerate.host/latest?base=USD&symbols=INR"
-        r = requests.get(url, timeout=5)
-        data = r.json()
-        if isinstance(data, dict) and "rates" in data and "INR" in data["rates"]:
-            return float(data["rates"]["INR"])
-    except Exception:
-        pass
-    return default_rate
-
-if "USD_TO_INR" not in st.session_state:
-    st.session_state.USD_TO_INR = get_live_usd_to_inr_rate()
-
-def parse_currency_from_string(s):
-    """Parse currency and numeric amount from a string like '$1,200' or '₹4,294.00'.
-    Returns (currency, amount) where currency is 'USD' or 'INR'."""
-    if s is None:
-        return "INR", 0.0
-    if isinstance(s, (int, float)):
-        # numeric with no symbol — assume INR
-        return "INR", float(s)
-    text = str(s).strip()
-    # If the string already starts with symbol
-    if text.startswith("$"):
-        try:
-            amt = float(text.replace("$", "").replace(",", "").strip())
-        except:
-            amt = 0.0
-        return "USD", amt
-    if text.startswith("₹") or text.lower().startswith("rs"):
-        try:
-            amt = float(text.replace("₹", "").replace("Rs", "").replace("rs", "").replace(",", "").strip())
-        except:
-            amt = 0.0
-        return "INR", amt
-    # fallback: try to parse numbers (assume INR)
-    try:
-        return "INR", float(text.replace(",", ""))
-    except:
-        return "INR", 0.0
-
-def parse_currency(value):
-    """Generic parse function (accepts numeric or string)."""
-    return parse_currency_from_string(value)
-
-def convert_to_inr(currency, amount):
-    if currency == "USD":
-        return amount * st.session_state.USD_TO_INR
-    return amount
-
-def format_symbol_amount(symbol, amount):
-    return f"{symbol}{amount:,.2f}"
-
-# --- EXCEL DISPLAY HELPER (uses openpyxl to preserve formatting) ---
-def read_excel_with_display_values(path, sheet_name=None):
-    """
-    Read workbook using pandas (for data) and openpyxl to produce 'display' strings for currency columns.
-    Returns (df, display_map) where display_map is dict: column_name -> list of display strings
-    """
-    # Read using pandas to preserve headers and data
-    df = pd.read_excel(path, sheet_name=sheet_name, engine="openpyxl", dtype=object)
-
-    # Use openpyxl to read raw cell formats and values
-    wb = load_workbook(path, data_only=True, read_only=True)
-    ws = wb[sheet_name] if sheet_name else wb.active
-
-    # Map header names to column letters
-    headers = {}
-    first_row = next(ws.iter_rows(min_row=1, max_row=1))
-    for cell in first_row:
-        if cell.value is not None:
-            headers[cell.column_letter] = str(cell.value)
-
-    # Build reverse map: header_name -> column_letter
-    header_to_col = {v: k for k, v in headers.items()}
-
-    display_map = {}
-    # We'll try to create a display mapping only for numeric columns that might be currency.
-    # For each column name present in df, find its column letter and get display strings.
-    for col_name in df.columns:
-        # find column letter for this header (exact match)
-        col_letter = None
-        for letter, h in headers.items():
-            # header matching ignoring case/whitespace
-            if str(h).strip().lower() == str(col_name).strip().lower():
-                col_letter = letter
-                break
-        if not col_letter:
-            # skip — we can't map to openpyxl column
-            continue
-
-        # iterate cells under this column (starting row 2)
-        disp_values = []
-        row_idx = 2
-        for r in ws.iter_rows(min_row=2, max_col=ws.max_column, max_row=ws.max_row):
-            # find the cell in this row for our column
-            # map column_letter to index: openpyxl column letters to index
-            from openpyxl.utils import column_index_from_string
-            col_idx = column_index_from_string(col_letter) - 1
-            try:
-                cell = r[col_idx]
-            except Exception:
-                disp_values.append(None)
-                row_idx += 1
-                continue
-
-            # Determine display string:
-            cval = cell.value
-            nf = (cell.number_format or "").upper()
-            # If cell has a number format containing $ or ₹ or "[$" patterns
-            # common number_format examples: '"$"#,##0.00', '$#,##0.00', '₹#,##0.00', '₹ #,##0.00;[Red]-₹ #,##0.00'
-            display = None
-            try:
-                if cval is None:
-                    display = None
-                else:
-                    # If number format contains $, treat as USD
-                    if "$" in nf or "[$USD" in nf or '"$"' in nf:
-                        # format numeric with two decimals and thousands
-                        try:
-                            display = f"${float(cval):,.2f}"
-                        except:
-                            display = str(cval)
-                    elif "₹" in nf or "RS" in nf or "INR" in nf or "[$INR" in nf or '"₹"' in nf:
-                        try:
-                            display = f"₹{float(cval):,.2f}"
-                        except:
-                            display = str(cval)
-                    else:
-                        # if the cell value is string already containing symbols, preserve it
-                        if isinstance(cval, str) and (cval.strip().startswith("$") or cval.strip().startswith("₹")):
-                            display = cval.strip()
-                        else:
-                            # fallback: if numeric, format without symbol (we won't invent symbol for display_map)
-                            if isinstance(cval, (int, float)):
-                                display = f"{float(cval):,.2f}"
-                            else:
-                                display = str(cval)
-            except Exception:
-                display = str(cval)
-            disp_values.append(display)
-            row_idx += 1
-
-        display_map[col_name] = disp_values
-
-    wb.close()
-    return df, display_map
+# --- CURRENCY HELPERS ---
+def current_inr_rates():
+    """Currency -> ₹ rate table: saved rates for other currencies plus the live/manual USD rate."""
+    return rate_table(st.session_state.USD_TO_INR, st.session_state.get("INR_RATES"))
 
 # --- LOGIN LOGIC ---
 if "logged_in" not in st.session_state:
@@ -242,9 +117,54 @@ st.title("📜 S2 Inv Receivable's")
 DATA_FOLDER = "data"
 os.makedirs(DATA_FOLDER, exist_ok=True)
 DATA_FILE = os.path.join(DATA_FOLDER, "last_uploaded.xlsx")
-TIME_FILE = os.path.join(DATA_FOLDER, "upload_time.txt")
-CREDENTIALS_FILE = os.path.join(DATA_FOLDER, "sender_credentials.txt")
-CLIENT_EMAIL_FILE = os.path.join(DATA_FOLDER, "client_emails.json")
+SCHEMA_FILE = os.path.join(DATA_FOLDER, "schema.json")
+DIFF_FILE = os.path.join(DATA_FOLDER, "upload_diff.json")
+SNAPSHOT_FILE = os.path.join(DATA_FOLDER, "ledger.parquet")
+OUTBOX_FILE = os.path.join(DATA_FOLDER, "outbox.db")
+# optional reminder template variants: reminder.<client>.html / reminder.<language>.html
+TEMPLATES_FOLDER = os.path.join(DATA_FOLDER, "templates")
+TRACE_FILE = os.path.join(DATA_FOLDER, "perf_trace.jsonl")
+
+
+# --- Settings store: sender, client emails, rates and upload time in data/settings.db ---
+# (imported once from the older sender_credentials.txt / client_emails.json / ... files)
+@st.cache_resource
+def get_settings():
+    return open_settings(DATA_FOLDER)
+
+settings = get_settings()
+
+
+# --- Performance tracing: per-stage timings of this run, appended to a rotating JSONL trace ---
+@st.cache_resource
+def get_trace_log():
+    return TraceLog(TRACE_FILE)
+
+trace_log = get_trace_log()
+tracer = Tracer()
+
+
+def timed_fragment(name, run_every=None):
+    """st.fragment that traces its own reruns. A fragment rerun skips the end-of-run trace,
+    so once this run's tracer is closed, each rerun is appended as its own record."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if tracer.closed:
+                    trace_log.append({"ts": datetime.now().isoformat(timespec="seconds"), "kind": "fragment",
+                                      "spans": {f"fragment:{name}": round((time.perf_counter() - start) * 1000, 2)}})
+        return st.fragment(body, run_every=run_every)
+    return decorate
+
+
+# toast queued by an action that triggered a full rerun
+if "pending_toast" in st.session_state:
+    toast_message, toast_icon = st.session_state.pop("pending_toast")
+    st.toast(toast_message, icon=toast_icon)
 
 # (keep st.secrets usage)
 sender_email = st.secrets.get("sender_email", "")
@@ -261,12 +181,10 @@ if "approver_action" not in st.session_state:
     st.session_state.approver_action = None
 
 # --- Load Sender Credentials if exist ---
-if os.path.exists(CREDENTIALS_FILE):
-    with open(CREDENTIALS_FILE, "r") as f:
-        lines = f.read().splitlines()
-        if len(lines) >= 2:
-            st.session_state.sender_email = lines[0]
-            st.session_state.sender_password = lines[1]
+saved_sender = settings.get(SENDER)
+if saved_sender:
+    st.session_state.sender_email = saved_sender["email"]
+    st.session_state.sender_password = saved_sender["password"]
 
 # --- Top-right sender credentials modal toggle ---
 if "show_sender_modal" not in st.session_state:
@@ -304,14 +222,12 @@ if st.session_state.show_sender_modal:
                 st.session_state.sender_email = st.session_state.sender_email_temp.strip()
                 st.session_state.sender_password = st.session_state.sender_password_temp.strip()
 
-                # Save to file
+                # Save to the settings store
                 try:
-                    with open(CREDENTIALS_FILE, "w") as f:
-                        f.write(f"{st.session_state.sender_email}\n{st.session_state.sender_password}")
+                    settings.set(SENDER, {"email": st.session_state.sender_email, "password": st.session_state.sender_password})
                     success_box = st.empty()
                     # success_box.success("")
                     st.toast(f"Sender credentials saved successfully!", icon="✅")
-                    import time
                     time.sleep(1.5)
                     success_box.empty()
                 except Exception as e:
@@ -335,23 +251,12 @@ else:
     st.session_state.client_emails.setdefault("cc_email", "")
     st.session_state.client_emails.setdefault("clients", {})
 
-if os.path.exists(CLIENT_EMAIL_FILE):
-    try:
-        with open(CLIENT_EMAIL_FILE, "r", encoding="utf-8") as f:
-            content = f.read().strip()
-            if content:
-                try:
-                    loaded = json.loads(content)
-                    if isinstance(loaded, dict):
-                        loaded.setdefault("cc_email", "")
-                        loaded.setdefault("clients", {})
-                        st.session_state.client_emails = loaded
-                except json.JSONDecodeError:
-                    st.session_state.client_emails = {"cc_email": "", "clients": {}}
-            else:
-                st.session_state.client_emails = {"cc_email": "", "clients": {}}
-    except Exception:
-        st.session_state.client_emails = {"cc_email": "", "clients": {}}
+# a copy from the settings store's in-memory cache (re-read from disk only after a change)
+saved_client_emails = settings.get(CLIENT_EMAILS)
+if isinstance(saved_client_emails, dict):
+    saved_client_emails.setdefault("cc_email", "")
+    saved_client_emails.setdefault("clients", {})
+    st.session_state.client_emails = saved_client_emails
 
 # --- Top-right buttons for Sender + Client Email ---
 col1, col2 = st.columns([0.3, 0.3])
@@ -366,80 +271,109 @@ with col1:
         st.session_state.show_client_email_modal = True
         st.rerun()
 
-# --- Client Email Configuration Modal ---
-if st.session_state.get("show_client_email_modal", False):
-    with st.container():
-        st.markdown("""<div>""", unsafe_allow_html=True)
-        st.markdown("### 📧 Client Email Configurator")
-        st.markdown("Add or edit client email IDs here once — they’ll auto-fill for emails.")
-
-        cc_mail_input = st.text_input("Global CC Email", value=st.session_state.client_emails.get("cc_email", ""), key="cc_email_input")
-
-        if st.session_state.get("stored_data", None) is not None:
-            df_clients = st.session_state.stored_data
-            client_col = next((col for col in df_clients.columns if "client name" in col.lower()), None)
-            if client_col:
-                unique_clients = sorted(df_clients[client_col].dropna().unique().tolist())
-                st.markdown("#### ✉️ Clients & Emails")
-                st.session_state.client_emails.setdefault("clients", {})
-                for client in unique_clients:
-                    prev_email = st.session_state.client_emails["clients"].get(client, "")
-                    new_val = st.text_input(f"{client}", value=prev_email, key=f"client_email_{client}")
-                    st.session_state.client_emails["clients"][client] = new_val
-            else:
-                st.warning("⚠️ No 'Client Name' column found in Excel.")
-        else:
-            st.info("📂 Upload Excel first to load clients.")
+# --- Shared ledger store: one read-only Ledger per workbook version for the whole process ---
+# Every session reads the same Ledger (views, masks and row positions only, never a copy of
+# its frames); session state holds just filters and selections.
+@st.cache_resource
+def get_workbook_cache():
+    return LRUCache(maxsize=4)
 
-        col_save, col_close = st.columns(2)
-        with col_save:
-            if st.button("💾 Save All", key="save_client_emails"):
-                st.session_state.client_emails["cc_email"] = cc_mail_input or ""
-                st.session_state.client_emails.setdefault("clients", {})
-                try:
-                    with open(CLIENT_EMAIL_FILE, "w", encoding="utf-8") as f:
-                        json.dump(st.session_state.client_emails, f, indent=4, ensure_ascii=False)
-                    # st.success("")
-                    st.toast(f"Client emails saved successfully!", icon="✅")
+workbook_cache = get_workbook_cache()
 
-                except Exception as e:
-                    st.error(f"❌ Failed to save client emails: {e}")
-        with col_close:
-            if st.button("❌ Close", key="close_client_email_modal"):
-                st.session_state.show_client_email_modal = False
-
-        st.markdown("</div>", unsafe_allow_html=True)
-
-# --- Email Sending Function ---
-def send_email(sender_email, sender_password, to_email, subject, body, cc=None):
-    msg = EmailMessage()
-    msg['Subject'] = subject
-    msg['From'] = sender_email
-    msg['To'] = to_email
-    if cc:
-        msg['Cc'] = cc
-    msg.set_content(body)
+def save_ledger_snapshot(ledger):
     try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-            smtp.login(sender_email, sender_password)
-            smtp.send_message(msg)
-        return True, "Email sent successfully!"
-    except Exception as e:
-        return False, str(e)
+        write_snapshot(SNAPSHOT_FILE, ledger)
+    except Exception:
+        pass  # snapshot is only an accelerator
+
+def load_ledger(path, digest):
+    """Ledger for path: from the Parquet snapshot if it is current, else parse the xlsx and refresh it.
+    Column roles come from data/schema.json, so detection only runs when the columns change."""
+    with tracer.span("load_ledger/cache_miss"):
+        return core.load_ledger(path, digest, snapshot_path=SNAPSHOT_FILE, schema_path=SCHEMA_FILE)
+
+def current_ledger():
+    """The shared Ledger for DATA_FILE (None before the first upload); keyed on file content,
+    so only a newly written upload triggers a re-parse."""
+    if not os.path.exists(DATA_FILE):
+        return None
+    data_digest = file_digest(DATA_FILE)
+    return workbook_cache.get_or_compute(data_digest, lambda: load_ledger(DATA_FILE, data_digest))
+
+
+# --- Client Email Configuration Modal (fragment: typing an address reruns only the configurator) ---
+@timed_fragment("client_configurator")
+def client_configurator():
+    """Global CC and per-client email addresses, saved to the settings store."""
+    if st.session_state.get("show_client_email_modal", False):
+        with st.container():
+            st.markdown("""<div>""", unsafe_allow_html=True)
+            st.markdown("### 📧 Client Email Configurator")
+            st.markdown("Add or edit client email IDs here once — they’ll auto-fill for emails.")
+
+            cc_mail_input = st.text_input("Global CC Email", value=st.session_state.client_emails.get("cc_email", ""), key="cc_email_input")
+
+            known_ledger = current_ledger()
+            if known_ledger is not None:
+                if known_ledger.roles.get("client"):
+                    unique_clients = known_ledger.client_index.clients
+                    st.markdown("#### ✉️ Clients & Emails")
+                    st.session_state.client_emails.setdefault("clients", {})
+                    for client in unique_clients:
+                        prev_email = st.session_state.client_emails["clients"].get(client, "")
+                        new_val = st.text_input(f"{client}", value=prev_email, key=f"client_email_{client}")
+                        st.session_state.client_emails["clients"][client] = new_val
+                else:
+                    st.warning("⚠️ No 'Client Name' column found in Excel.")
+            else:
+                st.info("📂 Upload Excel first to load clients.")
+
+            col_save, col_close = st.columns(2)
+            with col_save:
+                if st.button("💾 Save All", key="save_client_emails"):
+                    st.session_state.client_emails["cc_email"] = cc_mail_input or ""
+                    st.session_state.client_emails.setdefault("clients", {})
+                    try:
+                        settings.set(CLIENT_EMAILS, st.session_state.client_emails)
+                        # st.success("")
+                        st.toast(f"Client emails saved successfully!", icon="✅")
+
+                    except Exception as e:
+                        st.error(f"❌ Failed to save client emails: {e}")
+            with col_close:
+                if st.button("❌ Close", key="close_client_email_modal"):
+                    st.session_state.show_client_email_modal = False
+                    st.rerun(scope="fragment")
+
+            st.markdown("</div>", unsafe_allow_html=True)
+
+
+client_configurator()
 
 # --- Load Excel Data & Preserve Display Values ---
 # st.sidebar.markdown("## ⚙️ Options")
 # --- Manual USD→INR Exchange Rate Setting ---
-RATE_FILE = os.path.join(DATA_FOLDER, "usd_inr_rate.txt")
+RATE_CACHE_FILE = os.path.join(DATA_FOLDER, "usd_inr_live.json")
 
-# Load saved rate from file (if exists)
-if os.path.exists(RATE_FILE):
-    try:
-        with open(RATE_FILE, "r") as f:
-            saved_rate = float(f.read().strip())
-            st.session_state.USD_TO_INR = saved_rate
-    except Exception:
-        pass  # fallback to session/default rate
+# Live rate comes from a shared, disk-cached provider that refreshes in the background,
+# so a session never waits on the rate API before rendering
+@st.cache_resource
+def get_rate_provider():
+    # the HTTP fetch runs on a background thread, so it is traced as its own record
+    def trace_fetch(seconds, ok):
+        trace_log.append({"ts": datetime.now().isoformat(timespec="seconds"), "kind": "rate_fetch",
+                          "spans": {"rate_fetch" if ok else "rate_fetch_failed": round(seconds * 1000, 2)}})
+
+    return RateProvider(RATE_CACHE_FILE, on_fetch=trace_fetch)
+
+rate_provider = get_rate_provider()
+if "USD_TO_INR" not in st.session_state:
+    st.session_state.USD_TO_INR = rate_provider.current()
+
+# Load saved rate (if any)
+saved_rate = settings.get(USD_INR_RATE)
+if saved_rate is not None:
+    st.session_state.USD_TO_INR = float(saved_rate)
 
 # Input field to set and save custom rate
 st.sidebar.markdown("### 💱 USD → INR Conversion Rate")
@@ -451,219 +385,378 @@ manual_rate = st.sidebar.number_input(
     step=0.1,
 )
 
+if rate_provider.fetched_at is not None:
+    st.sidebar.caption(
+        f"📡 Live rate: ₹{rate_provider.current():.2f} · "
+        f"updated {datetime.fromtimestamp(rate_provider.fetched_at).strftime('%Y-%m-%d %H:%M')}"
+    )
+else:
+    st.sidebar.caption("📡 Live rate not fetched yet")
+
 # Save rate button
 if st.sidebar.button("✅ Save"):
     st.session_state.USD_TO_INR = manual_rate
-    with open(RATE_FILE, "w") as f:
-        f.write(str(manual_rate))
+    settings.set(USD_INR_RATE, manual_rate)
     st.toast(f"✅ USD → INR rate saved: ₹{manual_rate:.2f}", icon="💾")
 
 # Display current rate
 # st.sidebar.info(f"Current USD → INR rate: ₹{st.session_state.USD_TO_INR:.2f}")
 
+# --- Other currencies (EUR/GBP/AED...) → INR rates ---
+st.session_state.INR_RATES = dict(DEFAULT_INR_RATES)
+st.session_state.INR_RATES.update({code: float(v) for code, v in settings.get(FX_RATES, {}).items()})
 
-if os.path.exists(DATA_FILE):
-    # read using pandas (object dtype) to avoid automatic cast where possible
-    try:
-        # read with openpyxl engine to be consistent
-        df_raw = pd.read_excel(DATA_FILE, engine="openpyxl", dtype=object)
-    except Exception:
-        df_raw = pd.read_excel(DATA_FILE, dtype=object)
-    # read display map using openpyxl
-    try:
-        df_loaded, display_map = read_excel_with_display_values(DATA_FILE)
-    except Exception:
-        df_loaded = df_raw.copy()
-        display_map = {}
-    st.session_state.stored_data = df_loaded
-    if os.path.exists(TIME_FILE):
-        with open(TIME_FILE, "r") as f:
-            st.session_state.last_uploaded_time = f.read().strip()
-else:
-    st.session_state.stored_data = None
-    st.session_state.last_uploaded_time = None
+with st.sidebar.expander("🌍 Other Currency Rates (₹ per unit)", expanded=False):
+    edited_rates = {}
+    for code in [c for c in DEFAULT_INR_RATES if c not in ("INR", "USD")]:
+        edited_rates[code] = st.number_input(
+            f"{code} → INR", min_value=0.0, value=float(st.session_state.INR_RATES[code]), step=0.1, key=f"inr_rate_{code}"
+        )
+    if st.button("✅ Save Rates", key="save_fx_rates"):
+        st.session_state.INR_RATES.update(edited_rates)
+        settings.set(FX_RATES, edited_rates)
+        st.toast("✅ Currency rates saved", icon="💾")
+
+inr_rates = current_inr_rates()
+tracer.checkpoint("setup")
+
+
+ledger = current_ledger()
+st.session_state.last_uploaded_time = settings.get(UPLOAD_TIME) if ledger is not None else None
+tracer.checkpoint("load_ledger")
 
 # --- File Upload Section ---
-uploaded_file = st.file_uploader("Upload Excel File", type=["xlsx"])
-if uploaded_file is not None:
-    # Save uploaded file
-    upload_path = os.path.join(DATA_FOLDER, "last_uploaded.xlsx")
-    with open(upload_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-
-    # Load the data
-    try:
-        df_raw = pd.read_excel(upload_path, engine="openpyxl", dtype=object)
-    except Exception:
-        df_raw = pd.read_excel(upload_path, dtype=object)
+UPLOADS_FOLDER = os.path.join(DATA_FOLDER, "uploads")
+
+
+@st.cache_resource
+def get_ingest_pool():
+    """Worker processes for parsing multi-sheet / multi-workbook uploads (one per core)."""
+    return make_process_pool()
+
 
-    # Read display map
+def save_upload_sources(uploaded_files):
+    """Write the uploaded workbooks to a folder of their own under UPLOADS_FOLDER, so uploads
+    from other sessions are left alone. Returns (folder, [(path, sheet, label)] for every sheet);
+    the caller removes the folder once the sheets are parsed."""
+    os.makedirs(UPLOADS_FOLDER, exist_ok=True)
+    folder = tempfile.mkdtemp(dir=UPLOADS_FOLDER)
+    sources = []
     try:
-        df_loaded, display_map = read_excel_with_display_values(upload_path)
-    except Exception:
-        df_loaded = df_raw.copy()
-        display_map = {}
+        for i, file in enumerate(uploaded_files):
+            path = os.path.join(folder, f"{i:02d}_{os.path.basename(file.name)}")
+            with open(path, "wb") as f:
+                f.write(file.getbuffer())
+            sheets = list_sheets(path)
+            for sheet in sheets:
+                label = f"{file.name} › {sheet}" if len(sheets) > 1 else file.name
+                sources.append((path, sheet, label))
+    except BaseException:
+        shutil.rmtree(folder, ignore_errors=True)
+        raise
+    return folder, sources
+
+
+# --- Upload + column mapping (fragment): picking files or editing the mapping reruns only
+# this panel; a processed upload or a saved mapping triggers a full rerun ---
+@timed_fragment("data_load")
+def data_load_panel():
+    """Workbook uploader and the column mapping editor."""
+    for warning in st.session_state.pop("upload_warnings", []):
+        st.warning(warning)
+
+    uploaded_files = st.file_uploader("Upload Excel File(s)", type=["xlsx"], accept_multiple_files=True)
+    upload_id = tuple(f.file_id for f in uploaded_files)
+    # The uploader keeps returning the same files on every rerun; only process them once
+    if uploaded_files and st.session_state.get("processed_upload_id") != upload_id:
+        # the ledger being replaced, read before the upload overwrites DATA_FILE
+        previous_ledger = current_ledger()
+        uploaded_file = uploaded_files[0]
+        # the upload is already in memory: parse it from there while its original bytes
+        # are written to DATA_FILE on a background thread
+        single_sheet = len(uploaded_files) == 1 and len(list_sheets(uploaded_file)) == 1
+        if single_sheet:
+            upload_bytes = uploaded_file.getvalue()
+            data_digest = bytes_digest(upload_bytes)
+            persisted = persist_upload(DATA_FILE, upload_bytes, data_digest)
+
+        upload_warnings = []
+
+        def detect_upload_roles(sample):
+            # detect column roles once per upload; earlier manual overrides are kept if their columns still exist
+            schema = infer_schema(sample, load_schema(SCHEMA_FILE))
+            save_schema(SCHEMA_FILE, schema)
+            return effective_roles(schema)
+
+        if not single_sheet:
+            # Several workbooks and/or sheets (e.g. one per business unit): parse them in
+            # parallel on worker processes and merge into one ledger with a Source column
+            upload_folder, sources = save_upload_sources(uploaded_files)
+            try:
+                with st.spinner(f"📥 Reading {len(sources)} sheets…"):
+                    results = parse_sources([(path, sheet) for path, sheet, _ in sources], executor=get_ingest_pool())
+            finally:
+                shutil.rmtree(upload_folder, ignore_errors=True)
+            parts, skipped = [], []
+            for (_, _, label), (df_part, display_part, error) in zip(sources, results):
+                if error is None and looks_like_ledger(df_part):
+                    parts.append((label, df_part, display_part))
+                else:
+                    skipped.append(f"{label} ({error or 'no client/amount columns'})")
+            if not parts:
+                # nothing usable: keep the current workbook rather than replace it with an empty ledger
+                st.warning("⚠️ No sheet in this upload has client and amount columns; nothing was loaded. Skipped: " + "; ".join(skipped))
+                st.session_state.processed_upload_id = upload_id
+                return
+            if skipped:
+                upload_warnings.append("⚠️ Skipped sheets: " + "; ".join(skipped))
+            df_loaded, display_map = merge_sources(parts)
+
+            # no single original to keep: DATA_FILE holds the merged sheet (the snapshot
+            # keeps its display strings), exported once in memory
+            merged_xlsx = io.BytesIO()
+            df_loaded.to_excel(merged_xlsx, index=False)
+            data_digest = bytes_digest(merged_xlsx.getbuffer())
+            persisted = persist_upload(DATA_FILE, merged_xlsx.getvalue(), data_digest)
+            ledger = build_ledger(df_loaded, display_map, data_digest, detect_upload_roles(df_loaded))
+            try:
+                write_snapshot(SNAPSHOT_FILE, ledger)
+            except Exception as e:
+                upload_warnings.append(f"⚠️ Could not write ledger snapshot: {e}")
+        elif uploaded_file.size > STREAMING_THRESHOLD_BYTES:
+            # Large export: stream row chunks straight into the snapshot (bounded memory)
+            upload_progress = st.progress(0.0, text="📥 Reading workbook…")
+
+            def report_progress(rows_read, rows_estimate):
+                if rows_estimate:
+                    upload_progress.progress(min(rows_read / rows_estimate, 1.0), text=f"📥 Read {rows_read:,} of ~{rows_estimate:,} rows")
+                else:
+                    upload_progress.progress(0.0, text=f"📥 Read {rows_read:,} rows")
+
+            try:
+                ledger = stream_ingest(
+                    io.BytesIO(upload_bytes), SNAPSHOT_FILE, data_digest, detect_upload_roles, on_progress=report_progress,
+                )
+            finally:
+                upload_progress.empty()
+        else:
+            # Load the data + display map; DATA_FILE keeps the original workbook and the
+            # snapshot (cached under its digest) is the derived copy
+            df_loaded, display_map = core.load_workbook(io.BytesIO(upload_bytes))
+            ledger = build_ledger(df_loaded, display_map, data_digest, detect_upload_roles(df_loaded))
+            try:
+                write_snapshot(SNAPSHOT_FILE, ledger)
+            except Exception as e:
+                upload_warnings.append(f"⚠️ Could not write ledger snapshot: {e}")
+        # DATA_FILE must be complete before the rerun looks it up
+        persisted.result()
+        workbook_cache.put(data_digest, ledger)
+        st.session_state.processed_upload_id = upload_id
+
+        # Save current upload time
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        settings.set(UPLOAD_TIME, current_time)
+        st.session_state.last_uploaded_time = current_time
+
+        # What changed since the previous upload (by invoice number); lets the reminder
+        # batch re-render only the affected clients
+        upload_diff = diff_ledgers(previous_ledger, ledger)
+        st.session_state.upload_diff = upload_diff
+        if upload_diff is not None:
+            save_diff(DIFF_FILE, upload_diff, current_time)
+        elif os.path.exists(DIFF_FILE):
+            os.remove(DIFF_FILE)
+
+        # the whole dashboard depends on the new ledger: leave the fragment for a full rerun
+        st.session_state.upload_warnings = upload_warnings
+        st.session_state.pending_toast = ("✅ File Uploaded Successfully!", "💾")
+        st.rerun()
 
-    # Save to DATA_FILE
-    df_loaded.to_excel(DATA_FILE, index=False)
-    st.session_state.stored_data = df_loaded
+    # --- Column Mapping (detected once, overridable) ---
+    ledger = current_ledger()
+    if ledger is not None:
+        schema = schema_for(ledger.df, SCHEMA_FILE)
+        for warning in schema.get("warnings", []):
+            st.warning(f"⚠️ Column mapping: {warning}")
+        with st.expander("🧭 Column Mapping", expanded=bool(schema.get("warnings"))):
+            st.caption("Detected automatically on upload. Change a role here if a column was picked wrongly.")
+            column_options = [None] + list(ledger.df.columns)
+            chosen_roles = {}
+            mapping_cols = st.columns(2)
+            for i, role in enumerate(ROLES):
+                current = ledger.roles.get(role)
+                with mapping_cols[i % 2]:
+                    chosen_roles[role] = st.selectbox(
+                        ROLE_LABELS[role],
+                        column_options,
+                        index=column_options.index(current) if current in column_options else 0,
+                        format_func=lambda c: "— none —" if c is None else str(c),
+                        key=f"role_{role}_{ledger.source_digest}",
+                    )
+            if st.button("💾 Save Mapping", key="save_column_mapping"):
+                overrides = {role: col for role, col in chosen_roles.items() if col != schema["detected"].get(role)}
+                schema = with_overrides(schema, ledger.df, overrides)
+                save_schema(SCHEMA_FILE, schema)
+                ledger = build_ledger(ledger.df, ledger.display_map, ledger.source_digest, effective_roles(schema))
+                save_ledger_snapshot(ledger)
+                workbook_cache.put(ledger.source_digest, ledger)
+                st.session_state.pending_toast = ("✅ Column mapping saved", "💾")
+                st.rerun()
 
-    # Save current upload time
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(TIME_FILE, "w") as f:
-        f.write(current_time)
-    st.session_state.last_uploaded_time = current_time
 
-    st.toast(f"✅ File Uploaded Successfully!", icon="💾")
+data_load_panel()
+tracer.checkpoint("upload")
 
 # --- Display Last Uploaded / Updated Time ---
 if st.session_state.last_uploaded_time:
     st.info(f"📅 Last Updated : {st.session_state.last_uploaded_time}")
 
+# --- What changed since the previous upload ---
+stored_diff = load_diff(DIFF_FILE) if ledger is not None else None
+if stored_diff and stored_diff.get("new_digest") == ledger.source_digest:
+    diff_summary = stored_diff["summary"]
+    with st.expander(
+        f"🔄 What changed since last upload: {diff_summary['added']} added · "
+        f"{diff_summary['changed']} changed · {diff_summary['removed']} removed",
+        expanded=False,
+    ):
+        d1, d2, d3, d4 = st.columns(4)
+        d1.metric("➕ Added", diff_summary["added"])
+        d2.metric("✏️ Changed", diff_summary["changed"])
+        d3.metric("➖ Removed", diff_summary["removed"])
+        d4.metric("👥 Clients Affected", diff_summary["affected_clients"])
+        if stored_diff["rows"]:
+            st.dataframe(pd.DataFrame(stored_diff["rows"]), hide_index=True, width="stretch")
+            if stored_diff.get("truncated"):
+                st.caption("Showing the first rows only.")
+
+cache_stats = workbook_cache.stats()
+st.sidebar.caption(
+    f"🗃️ Workbook cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · "
+    f"{cache_stats['size']}/{cache_stats['maxsize']} entries"
+)
+# filled in once the charts are drawn
+chart_cache_caption = st.sidebar.empty()
+
+
+tracer.checkpoint("mapping_and_diff")
+
 
 # --- Main Dashboard ---
-if st.session_state.stored_data is not None:
-    df = st.session_state.stored_data.copy()
-
-    # Columns detection (same as before)
-    paid_col = next((col for col in df.columns if "paid" in col.lower()), None)
-    due_col = next((col for col in df.columns if "due" in col.lower()), None)
-    amount_col = next((col for col in df.columns if any(x in col.lower() for x in ["amount", "total", "value"])), None)
-    date_col = next((col for col in df.columns if "date" in col.lower() or "raised" in col.lower()), None)
-    client_col = next((col for col in df.columns if "client name" in col.lower()), None)
-    approver_mail_col = next((col for col in df.columns if "approver mail" in col.lower()), None)
-    client_mail_col = next((col for col in df.columns if "client mail" in col.lower()), None)
-    cc_mail_col = next((col for col in df.columns if "cc" in col.lower()), None)
-    invoice_col = next((col for col in df.columns if "invoice" in col.lower() and ("no" in col.lower() or "number" in col.lower() or "id" in col.lower())), None)
-
-    # Filter by client
-    client_options = ["All Clients"] + sorted(df[client_col].dropna().unique().tolist()) if client_col else ["All Clients"]
-    selected_client = st.selectbox("Select Client", client_options)
-    df_filtered = df[df[client_col] == selected_client] if selected_client != "All Clients" else df.copy()
-
-# --- Metrics (paid/unpaid detection stays the same with numeric fallback) ---
-if paid_col:
-    df_filtered[paid_col] = pd.to_numeric(df_filtered[paid_col], errors="coerce").fillna(0)
-    paid_df = df_filtered[df_filtered[paid_col] > 0]
-    unpaid_df = df_filtered[df_filtered[paid_col] == 0]
-elif "due" in df.columns.str.lower().tolist():
-    due_col = next((col for col in df.columns if "due" in col.lower()), None)
-    df_filtered[due_col] = pd.to_numeric(df_filtered[due_col], errors="coerce").fillna(0)
-    paid_df = df_filtered[df_filtered[due_col] == 0]
-    unpaid_df = df_filtered[df_filtered[due_col] > 0]
+# nothing below runs without a workbook: a fresh deployment shows only the uploader
+if ledger is None:
+    st.info("⬆️ Upload a receivables workbook to see the dashboard.")
+    st.stop()
+
+# the shared ledger's frame, read in place: reruns never copy or modify it
+df = ledger.df
+
+# Columns detection (roles are detected once per load, see receivables/schema.py)
+roles = ledger.roles
+paid_col = roles["paid"]
+due_col = roles["due"]
+amount_col = roles["amount"]
+date_col = roles["date"]
+client_col = roles["client"]
+approver_mail_col = roles["approver_mail"]
+client_mail_col = roles["client_mail"]
+cc_mail_col = roles["cc_mail"]
+invoice_col = roles["invoice"]
+
+# Filter by client (O(1) lookups into the per-load client index)
+client_index = ledger.client_index
+client_options = ["All Clients"] + client_index.clients if client_col else ["All Clients"]
+selected_client = st.selectbox("Select Client", client_options)
+if selected_client != "All Clients":
+    filtered_positions = client_index.positions(selected_client)
 else:
-    paid_df = pd.DataFrame()
-    unpaid_df = df_filtered
-
-# --- Dashboard Summary ---
-st.markdown("## ⌨ Dashboard")
-col1, col2, col3, col4, col5, = st.columns(5)
-col1.metric("🧾 Total Clients", df[client_col].nunique() if client_col else len(df))
-col2.metric("📄 Total Invoices", len(df_filtered))
-col3.metric("✅ Paid", len(paid_df))
-col4.metric("⚠️ Pending", len(unpaid_df))
-
-st.markdown(
-    """
-    <style>
-    .st-emotion-cache-1q82h82 {
-        overflow: visible !important;
-        white-space: normal !important;
-        text-overflow: clip !important;
+    filtered_positions = np.arange(len(df))
+
+# --- Metrics (paid/pending split is computed once per load, see split_paid_unpaid) ---
+# row positions into the shared ledger rather than filtered frames
+paid_positions = filtered_positions[ledger.parsed["is_paid"].to_numpy()[filtered_positions]]
+unpaid_positions = filtered_positions[ledger.parsed["is_unpaid"].to_numpy()[filtered_positions]]
+
+# --- Dashboard metrics (fragment) ---
+@timed_fragment("dashboard_metrics")
+def dashboard_metrics():
+    """Summary metrics for the selected client."""
+    # --- Dashboard Summary ---
+    st.markdown("## ⌨ Dashboard")
+    col1, col2, col3, col4, col5, = st.columns(5)
+    col1.metric("🧾 Total Clients", len(client_index.clients) if client_col else len(df))
+    col2.metric("📄 Total Invoices", len(filtered_positions))
+    col3.metric("✅ Paid", len(paid_positions))
+    col4.metric("⚠️ Pending", len(unpaid_positions))
+
+    st.markdown(
+        """
+        <style>
+        .st-emotion-cache-1q82h82 {
+            overflow: visible !important;
+            white-space: normal !important;
+            text-overflow: clip !important;
         
-    }
-        .st-emotion-cache-efbu8t {
-        background: linear-gradient(90deg, #ff5f6d, #ffc371, #24c6dc, #514a9d);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-weight: bold;       /* optional */
-        font-size: 1.4rem;       /* adjust size if needed */
-        # overflow: visible !important;
-        # white-space: normal !important;
-        # text-overflow: clip !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+        }
+            .st-emotion-cache-efbu8t {
+            background: linear-gradient(90deg, #ff5f6d, #ffc371, #24c6dc, #514a9d);
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            font-weight: bold;       /* optional */
+            font-size: 1.4rem;       /* adjust size if needed */
+            # overflow: visible !important;
+            # white-space: normal !important;
+            # text-overflow: clip !important;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
 
 
-# --- Total Due (converted to INR) ---
-if due_col:
-    unpaid_calc = unpaid_df.copy()
+    # --- Total Due (converted to INR) ---
+    if due_col:
+        # Whole-ledger INR values, cached on the ledger per rate table
+        due_inr = ledger.inr_values("due", inr_rates)
+        total_due_inr = due_inr.iloc[unpaid_positions].sum()
+        col5.metric("💰 Total Due (in ₹)", f"₹{total_due_inr:,.2f}")
+    else:
+        col5.metric("💰 Total Due", "₹0.00")
 
-    # Ensure Currency column exists
-    if "Currency" not in unpaid_calc.columns:
-        unpaid_calc["Currency"] = unpaid_calc[amount_col].apply(lambda x: parse_currency(x)[0])
+dashboard_metrics()
+tracer.checkpoint("dashboard_metrics")
 
-    # Convert each due amount properly based on currency
-    def convert_due_to_inr(row):
-        c, a = parse_currency(row[due_col])
-        # If there's a separate Currency column, override detected currency
-        if pd.notna(row.get("Currency")) and row["Currency"] in ["$", "USD", "usd"]:
-            c = "USD"
-        elif row.get("Currency") in ["₹", "INR", "inr"]:
-            c = "INR"
-        return convert_to_inr(c, a)
+import plotly.express as px
 
-    unpaid_calc["INR_Value"] = unpaid_calc.apply(convert_due_to_inr, axis=1)
 
-    total_due_inr = unpaid_calc["INR_Value"].sum()
-    col5.metric("💰 Total Due (in ₹)", f"₹{total_due_inr:,.2f}")
-else:
-    col5.metric("💰 Total Due", "₹0.00")
+# --- Chart figure cache (shared across reruns and sessions) ---
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(maxsize=32)
 
-import plotly.express as px
+figure_cache = get_figure_cache()
 
-# --- Ageing Table & Graph ---
-if unpaid_df.shape[0] > 0 and date_col:
-    ageing_df = unpaid_df.copy()
-    ageing_df[date_col] = pd.to_datetime(ageing_df[date_col], errors="coerce")
-    ageing_df["Days Pending"] = (datetime.now() - ageing_df[date_col]).dt.days
-
-    # Format invoice date column as DD-MMM-YYYY
-    ageing_df[date_col] = ageing_df[date_col].dt.strftime("%d-%b-%Y")
-
-    # Step 3: Ensure Currency column is included
-    if "Currency" in df_filtered.columns:
-        ageing_df = ageing_df.copy()
-        ageing_df.loc[:, "Currency"] = df_filtered.loc[ageing_df.index, "Currency"]
-    else:
-        ageing_df.loc[:, "Currency"] = ageing_df[amount_col].apply(lambda x: parse_currency(x)[0])
 
-    # Insert Currency Display before amount column
-    if amount_col in ageing_df.columns:
-        if amount_col in display_map:
-            disp_vals = display_map[amount_col][:len(ageing_df)]
-        else:
-            disp_vals = ageing_df[amount_col].apply(lambda x: f"{x:,.2f}" if pd.notnull(x) else "")
+def chart_key(chart, *filters):
+    """Figure cache key: chart name, data version (file digest + column roles), filters and theme."""
+    data_version = (ledger.source_digest, tuple(sorted(ledger.roles.items())))
+    return (chart, data_version, st.context.theme.type) + filters
 
-        ageing_df.insert(
-            ageing_df.columns.get_loc(amount_col),
-            "Currency Display",
-            ageing_df["Currency"]
-        )
+# --- Ageing Table & Graph ---
+# clients drawn individually in the ageing charts; the rest are summed into one row
+MAX_AGEING_CLIENTS = 25
+AGEING_COLORS = ["#00C851", "#ffbb33", "#f7941d", "#FF4444"]
 
-    # --- Display ---
-    st.markdown("### ⊞ Ageing Table")
-    st.dataframe(
-        ageing_df[[client_col, invoice_col, "Currency", amount_col, date_col, "Days Pending"]],
-        width="stretch"
-    )
 
-    st.markdown("### ☰ Ageing Graph")
-    chart_df = ageing_df.copy()
-    chart_df[invoice_col] = chart_df[invoice_col].astype(str)
+def ageing_chart_matrix(matrix, limit=MAX_AGEING_CLIENTS):
+    """Top `limit` client rows of a client × bucket matrix, the remainder summed as 'Other clients'."""
+    if len(matrix) <= limit:
+        return matrix
+    top = matrix.iloc[:limit]
+    return pd.concat([top, matrix.iloc[limit:].sum().to_frame("Other clients").T.rename_axis(top.index.name)])
 
-    fig = px.bar(
-        chart_df,
-        x=invoice_col,
-        y="Days Pending",
-        text="Days Pending",
-        title="Pending Days by Invoice",
-    )
 
-    fig.update_traces(textposition="outside", marker_color="#f7941d",)
+def style_ageing_figure(fig):
     fig.update_layout(
         xaxis=dict(fixedrange=True, color="white", showgrid=True, gridcolor="rgba(255,255,255,0.2)"),
         yaxis=dict(fixedrange=True, color="white", showgrid=True, gridcolor="rgba(255,255,255,0.2)"),
@@ -674,222 +767,342 @@ if unpaid_df.shape[0] > 0 and date_col:
         font=dict(color="white", size=14),
         title=dict(x=0.35, font=dict(size=20, color="#B2FFFF")),
     )
-    st.plotly_chart(fig, config={"responsive": True}, key="ageing_chart")
+    return fig
 
-else:
-    st.info("✅ No pending invoices available — ageing analysis not applicable.")
-
-# --- Pie Chart: Pending Invoices by Client ---
-if unpaid_df.shape[0] > 0 and client_col:
-    st.markdown("### ◔ Pending Invoices by Client")
-    pending_by_client = unpaid_df.groupby(client_col).size().reset_index(name="Pending Count")
-    fig_client_pie = px.pie(
-        pending_by_client,
-        names=client_col,
-        values="Pending Count",
-        title="Pending Invoices Distribution by Client",
-        hole=0.4,
-    )
-    fig_client_pie.update_traces(textinfo="percent+label", textfont_size=14, marker=dict(line=dict(color='#0d1117', width=2)))
-    fig_client_pie.update_layout(paper_bgcolor="#0e1117", plot_bgcolor="#0e1117", font=dict(color="white"), title=dict(x=0.35, font=dict(size=20, color="#B2FFFF")))
-    st.plotly_chart(fig_client_pie, config={"responsive": True}, key="pending_client_chart")
-
-# --- Pie Chart: Paid vs Pending ---
-if len(paid_df) > 0 or len(unpaid_df) > 0:
-    st.markdown("### ◔ Invoice Status Breakdown")
-    pie_data = pd.DataFrame({"Status": ["Paid", "Pending"], "Count": [len(paid_df), len(unpaid_df)]})
-    fig_pie = px.pie(pie_data, names="Status", values="Count", title="Paid vs Pending Invoices", hole=0.4, color="Status", color_discrete_map={"Paid": "#00C851", "Pending": "#FF4444"})
-    fig_pie.update_traces(textinfo="percent+label", textfont_size=14)
-    fig_pie.update_layout(paper_bgcolor="#0e1117", plot_bgcolor="#0e1117", font=dict(color="white"), title=dict(x=0.35, font=dict(size=20, color="#B2FFFF")))
-    st.plotly_chart(fig_pie, config={"responsive": True}, key="status_chart")
-
-# --- Email Actions Sidebar ---
-if client_col and st.session_state.stored_data is not None:
-    st.sidebar.markdown("### 📧 Email Actions")
-    selected_client_name = st.sidebar.selectbox("Select Client for Email", sorted(df[client_col].dropna().unique().tolist()), key="client_selector")
-    client_invoices = df[df[client_col] == selected_client_name].copy()
-
-    # For due filter, prefer the due_col if present else amount_col
-    filter_col = due_col if due_col else amount_col
-    if filter_col:
-        # We don't coerce display strings; keep original raw values to decide
-        # Build due_invoices: where parsed numeric > 0
-        parsed_list = []
-        for v in client_invoices[filter_col].tolist():
-            c, a = parse_currency(v)
-            parsed_list.append(a)
-        client_invoices["_parsed_num"] = parsed_list
-        due_invoices = client_invoices[client_invoices["_parsed_num"] > 0].copy()
-    else:
-        due_invoices = client_invoices
 
-    num_due = len(due_invoices)
+# --- Charts (fragment): the ageing measure toggle reruns only this part ---
+@timed_fragment("charts")
+def charts():
+    """Ageing table, ageing charts and the pending/status pies (figures come from figure_cache)."""
+    if len(unpaid_positions) > 0 and date_col:
+        # days pending + ageing bucket per invoice, computed once per ledger and day
+        ageing = ledger.ageing()
 
-# Determine primary currency for client (from first invoice)
-first_currency = "INR"
-if len(due_invoices) > 0:
-    first_currency = due_invoices["Currency"].iloc[0] if "Currency" in due_invoices.columns else "INR"
+        def pending_values(column):
+            return df[column].to_numpy()[unpaid_positions]
 
-client_total = 0.0
-invoice_rows = ""
+        # only the displayed columns, taken for the pending rows
+        if roles["currency"] is not None:
+            currencies = pending_values(roles["currency"])
+        else:
+            currencies = ledger.parsed["currency"].to_numpy()[unpaid_positions]
+        ageing_df = pd.DataFrame({
+            client_col: pending_values(client_col),
+            invoice_col: pending_values(invoice_col),
+            "Currency": currencies,
+            amount_col: pending_values(amount_col),
+            # Format invoice date column as DD-MMM-YYYY
+            date_col: ledger.parsed["date"].iloc[unpaid_positions].dt.strftime("%d-%b-%Y").to_numpy(),
+            "Days Pending": pd.array(ageing.days[unpaid_positions], dtype="Int64"),
+            "Ageing": ageing.bucket_names(unpaid_positions),
+        }, index=df.index[unpaid_positions])
+
+        # --- Display ---
+        st.markdown("### ⊞ Ageing Table")
+        st.dataframe(ageing_df, width="stretch")
+
+        st.markdown("### ☰ Ageing Graph")
+        if client_col:
+            measure = st.radio("Measure", ["Invoices", "Amount Due (₹)"], horizontal=True, key="ageing_measure")
+
+            def build_ageing_figures():
+                weights = ledger.inr_values(ledger.due_role, inr_rates).to_numpy() if measure != "Invoices" else None
+                # one row per client, one column per bucket: chart size follows clients, not invoices
+                matrix = ageing.matrix(unpaid_positions, weights)
+                chart_matrix = ageing_chart_matrix(matrix)
+                long_df = chart_matrix.reset_index().melt(id_vars=client_col, var_name="Ageing", value_name=measure)
+                fig = px.bar(
+                    long_df,
+                    x=client_col,
+                    y=measure,
+                    color="Ageing",
+                    category_orders={"Ageing": ageing.labels, client_col: list(chart_matrix.index)},
+                    color_discrete_sequence=AGEING_COLORS,
+                    title="Pending Invoices by Ageing Bucket",
+                )
+                fig.update_layout(barmode="stack")
+                fig_heatmap = px.imshow(
+                    chart_matrix,
+                    text_auto=".0f" if weights is None else ",.0f",
+                    aspect="auto",
+                    color_continuous_scale="Oranges",
+                    labels=dict(x="Ageing", y="Client", color=measure),
+                    title="Ageing Heatmap",
+                )
+                return len(matrix), style_ageing_figure(fig), style_ageing_figure(fig_heatmap)
+
+            rates_key = tuple(sorted(inr_rates.items())) if measure != "Invoices" else None
+            ageing_clients, fig, fig_heatmap = figure_cache.get_or_build(
+                chart_key("ageing", selected_client, measure, rates_key, ageing.day), build_ageing_figures
+            )
+            if ageing_clients > MAX_AGEING_CLIENTS:
+                st.caption(f"Top {MAX_AGEING_CLIENTS} of {ageing_clients} clients; the rest are shown as 'Other clients'.")
+
+            stacked_tab, heatmap_tab = st.tabs(["Stacked by client", "Heatmap"])
+            with stacked_tab:
+                st.plotly_chart(fig, config={"responsive": True}, key="ageing_chart")
+            with heatmap_tab:
+                st.plotly_chart(fig_heatmap, config={"responsive": True}, key="ageing_heatmap")
 
-for idx, row in due_invoices.iterrows():
-    invoice_num = row[invoice_col] if invoice_col else "-"
-    currency_val = row.get("Currency", first_currency)
-    raw_val = row[amount_col] if amount_col in row.index else row.get(amount_col, 0)
+    else:
+        st.info("✅ No pending invoices available — ageing analysis not applicable.")
+
+    # --- Pie Chart: Pending Invoices by Client ---
+    if len(unpaid_positions) > 0 and client_col:
+        st.markdown("### ◔ Pending Invoices by Client")
+
+        def build_client_pie():
+            pending_counts = client_index.aggregates["pending"]
+            if selected_client != "All Clients":
+                pending_counts = pending_counts.loc[[selected_client]]
+            pending_by_client = pending_counts[pending_counts > 0].rename("Pending Count").reset_index()
+            fig_client_pie = px.pie(
+                pending_by_client,
+                names=client_col,
+                values="Pending Count",
+                title="Pending Invoices Distribution by Client",
+                hole=0.4,
+            )
+            fig_client_pie.update_traces(textinfo="percent+label", textfont_size=14, marker=dict(line=dict(color='#0d1117', width=2)))
+            fig_client_pie.update_layout(paper_bgcolor="#0e1117", plot_bgcolor="#0e1117", font=dict(color="white"), title=dict(x=0.35, font=dict(size=20, color="#B2FFFF")))
+            return fig_client_pie
+
+        fig_client_pie = figure_cache.get_or_build(chart_key("pending_by_client", selected_client), build_client_pie)
+        st.plotly_chart(fig_client_pie, config={"responsive": True}, key="pending_client_chart")
+
+    # --- Pie Chart: Paid vs Pending ---
+    if len(paid_positions) > 0 or len(unpaid_positions) > 0:
+        st.markdown("### ◔ Invoice Status Breakdown")
+
+        def build_status_pie():
+            pie_data = pd.DataFrame({"Status": ["Paid", "Pending"], "Count": [len(paid_positions), len(unpaid_positions)]})
+            fig_pie = px.pie(pie_data, names="Status", values="Count", title="Paid vs Pending Invoices", hole=0.4, color="Status", color_discrete_map={"Paid": "#00C851", "Pending": "#FF4444"})
+            fig_pie.update_traces(textinfo="percent+label", textfont_size=14)
+            fig_pie.update_layout(paper_bgcolor="#0e1117", plot_bgcolor="#0e1117", font=dict(color="white"), title=dict(x=0.35, font=dict(size=20, color="#B2FFFF")))
+            return fig_pie
+
+        fig_pie = figure_cache.get_or_build(chart_key("status", selected_client), build_status_pie)
+        st.plotly_chart(fig_pie, config={"responsive": True}, key="status_chart")
+
+charts()
+tracer.checkpoint("charts")
+
+chart_stats = figure_cache.stats()
+chart_cache_caption.caption(
+    f"📊 Chart cache: {chart_stats['hits']} hits · {chart_stats['misses']} misses · "
+    f"{chart_stats['saved_seconds'] * 1000:,.0f} ms build time saved"
+)
 
-    # Parse numeric amount
-    _, amt = parse_currency(raw_val)
+# --- Email Composer (sidebar fragment) ---
+# Every client's reminder is rendered in one batch (memoized per ledger, rates and day)
+@st.cache_resource
+def get_reminder_templates():
+    return ReminderTemplates(override_dir=TEMPLATES_FOLDER)
 
-    # Convert to primary currency if needed
-    if currency_val != first_currency:
-        if first_currency == "INR":
-            amt = convert_to_inr(currency_val, amt)
+reminder_templates = get_reminder_templates()
+reminder_messages = reminder_templates.render_all(
+    ledger, inr_rates, st.session_state.client_emails.get("languages"), diff=st.session_state.get("upload_diff")
+)
+tracer.checkpoint("reminders")
+
+# Sends run on a background dispatcher shared by all sessions; the UI only enqueues.
+# Every reminder is recorded in the outbox first, so it goes out once per client, invoice set and day.
+@st.cache_resource
+def get_dispatcher():
+    # SMTP batches run off the script thread; each finished batch is traced as its own record
+    def trace_job(job):
+        info = job.snapshot()
+        batch_ms = (job.finished - job.created).total_seconds() * 1000
+        trace_log.append({"ts": job.finished.isoformat(timespec="seconds"), "kind": "smtp_batch",
+                          "spans": {"smtp_batch": round(batch_ms, 2),
+                                    "smtp_per_message": round(batch_ms / max(info["completed"], 1), 2)}})
+
+    return Dispatcher(outbox=Outbox(OUTBOX_FILE), on_job_done=trace_job)
+
+dispatcher = get_dispatcher()
+if "dispatch_jobs" not in st.session_state:
+    st.session_state.dispatch_jobs = []
+
+def queue_reminders(reminders, label, failed=None, force=False):
+    """Record (client, EmailMessage) pairs in the outbox and queue those not already sent today."""
+    messages, outbox_ids, skipped = [], {}, {}
+    for client, msg in reminders:
+        invoice_hash = invoice_set_hash(due_invoice_ids(ledger, client))
+        row_id, outcome = dispatcher.outbox.enqueue(client, invoice_hash, msg, force=force)
+        if outcome == ALREADY_SENT:
+            skipped[client] = f"Already sent today at {dispatcher.outbox.sent_at(row_id)[11:16]}"
+        elif outcome == IN_FLIGHT:
+            skipped[client] = "Already queued"
         else:
-            try:
-                amt = float(amt) / st.session_state.USD_TO_INR
-            except Exception:
-                amt = 0.0
-
-    client_total += amt
-    amount_val = f"{amt:,.2f}"  # Display numeric only, no symbol
-
-    invoice_date_val = (
-        row[date_col].strftime("%Y-%m-%d") if pd.notnull(row[date_col]) else "-"
-    )
-    days_pending = (
-        (datetime.now() - pd.to_datetime(row[date_col], errors="coerce")).days
-        if pd.notnull(row[date_col])
-        else "-"
+            messages.append((client, msg))
+            outbox_ids[client] = row_id
+    job = dispatcher.submit(
+        st.session_state.sender_email,
+        st.session_state.sender_password,
+        messages,
+        label=label,
+        failed=failed,
+        skipped=skipped,
+        outbox_ids=outbox_ids,
     )
+    st.session_state.dispatch_jobs.append(job.id)
+    return job, len(messages)
 
-    # Build table row with Currency column
-    invoice_rows += f"""
-    <tr>
-        <td>{invoice_num}</td>
-        <td>{currency_val}</td>
-        <td>{amount_val}</td>
-        <td>{invoice_date_val}</td>
-        <td>{days_pending} days</td>
-    </tr>
-    """
-
-# Total line with client's primary currency
-total_line = f"<li><strong>Total Amount Due ({first_currency}):</strong> {client_total:,.2f}</li>"
-
-# Updated email table header with Currency column
-auto_message = f"""
-<html>
-<body style="background-color: none; color: #ffffff;">
-<p>Dear Sir/Mam,</p>
-<p>Please find below your pending invoices:</p>
-
-<table border="1" cellpadding="6" cellspacing="0" style="border-collapse: collapse; width: 100%;">
-    <thead style="background-color: none;">
-        <tr>
-            <th>Invoice #</th>
-            <th>Currency</th>
-            <th>Amount</th>
-            <th>Invoice Date</th>
-            <th>Days Pending</th>
-        </tr>
-    </thead>
-    <tbody>{invoice_rows}</tbody>
-</table>
-
-<ul style="margin-top: 10px;">
-    <li><strong>No. of Due Invoices:</strong> {num_due}</li>
-    {total_line}
-</ul>
-
-<p>Kindly arrange the payments at the earliest convenience.</p>
-<p>Thanks & Regards,<br>S2 Integrators</p>
-</body>
-</html>
-"""
-
-    # Dynamic subject for each client
-email_subject = f"{selected_client_name} - Pending Invoice Payment | S2 Integrators Pvt Ltd"
-
-    # 🟢 Reset the text fields each time a different client is selected
-st.session_state.email_subject = email_subject
-st.session_state.email_message = auto_message
-
-subject_input = st.sidebar.text_input("Email Subject", value=st.session_state.email_subject, key=f"email_subject_{selected_client_name}")
-
-# --- Email Message Section ---
-st.sidebar.markdown("## 💬 Email Message")
-
-with st.sidebar.expander("✏️ Edit Email (HTML Code)", expanded=False):
-    try:
-        _ = selected_client_name  # noqa: F841
-    except NameError:
-        selected_client_name = ""
-    message_input = st.text_area("Email Message (HTML)", value=st.session_state.get("email_message", ""), height=300, key=f"email_message_{selected_client_name}")
+def start_dispatch_polling(message, icon="📤"):
+    """Full rerun after queuing, so the Outgoing Mail panel starts polling; the toast is shown after it."""
+    st.session_state.pending_toast = (message, icon)
+    st.rerun()
 
 import streamlit.components.v1 as components
 
-with st.sidebar.expander("👁️ Preview Formatted Email", expanded=False):
-    components.html(message_input, height=400, scrolling=True)
+@timed_fragment("email_composer")
+def email_composer():
+    """Client picker, subject/HTML editor, preview and send actions. Typing here reruns only this fragment."""
+    if not client_col:
+        return
+    st.markdown("### 📧 Email Actions")
+    selected_client_name = st.selectbox("Select Client for Email", client_index.clients, key="client_selector")
+    num_due = len(client_index.due_positions(selected_client_name))
+    oldest_age = client_index.oldest_due_age(selected_client_name)
+    if oldest_age is not None:
+        due_totals = client_index.due_by_currency.loc[selected_client_name]
+        st.caption(
+            f"{num_due} due · oldest {oldest_age} days · "
+            + " + ".join(f"{code} {amt:,.2f}" for code, amt in due_totals[due_totals > 0].items())
+            + f" (₹{client_index.inr_totals(inr_rates)[selected_client_name]:,.2f})"
+        )
 
-# Resolve client and cc email using stored config first, then Excel fallback
-try:
-    client_name = selected_client_name
-except NameError:
-    client_name = ""
+    # Dynamic subject for each client; the text fields reset each time a different client is selected
+    st.session_state.email_subject = reminder_subject(selected_client_name)
+    st.session_state.email_message = reminder_messages[selected_client_name]
 
-client_email = None
-cc_email = None
+    subject_input = st.text_input("Email Subject", value=st.session_state.email_subject, key=f"email_subject_{selected_client_name}")
 
-if "client_emails" in st.session_state:
-    client_email = st.session_state.client_emails.get("clients", {}).get(client_name, None)
-    cc_email = st.session_state.client_emails.get("cc_email", None)
+    # --- Email Message Section ---
+    st.markdown("## 💬 Email Message")
 
-if not client_email and 'client_mail_col' in locals() and client_mail_col:
-    try:
-        client_email = client_invoices[client_mail_col].iloc[0]
-    except Exception:
-        client_email = None
-if not cc_email and 'cc_mail_col' in locals() and cc_mail_col:
-    try:
-        cc_email = client_invoices[cc_mail_col].iloc[0]
-    except Exception:
-        cc_email = None
+    with st.expander("✏️ Edit Email (HTML Code)", expanded=False):
+        message_input = st.text_area("Email Message (HTML)", value=st.session_state.get("email_message", ""), height=300, key=f"email_message_{selected_client_name}")
 
-# --- Send button ---
-st.sidebar.markdown("## ᯓ➤ Send Mail to Client")
+    with st.expander("👁️ Preview Formatted Email", expanded=False):
+        components.html(message_input, height=400, scrolling=True)
 
-if num_due == 0:
-    st.sidebar.warning("✅ No pending invoices for this client. Email not required.")
-else:
-    if st.sidebar.button("🚀 Send Now"):
-        if not st.session_state.sender_email or not st.session_state.sender_password:
-            st.sidebar.warning("⚠️ Please set sender credentials!")
-        elif client_email:
-            def send_email_html(sender_email, sender_password, to_email, subject, html_body, cc=None):
-                msg = EmailMessage()
-                msg["Subject"] = subject
-                msg["From"] = sender_email
-                msg["To"] = to_email
-                if cc:
-                    msg["Cc"] = cc
-                msg.add_alternative(html_body, subtype="html")
-                try:
-                    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-                        smtp.login(sender_email, sender_password)
-                        smtp.send_message(msg)
-                    return True, "Email sent successfully!"
-                except Exception as e:
-                    return False, str(e)
+    # Resolve client and cc email using stored config first, then Excel fallback
+    client_email, cc_email = reminder_recipients(ledger, selected_client_name, st.session_state.get("client_emails"))
 
-            success, msg = send_email_html(st.session_state.sender_email, st.session_state.sender_password, client_email, subject_input, message_input, cc=cc_email)
+    # --- Send button ---
+    st.markdown("## ᯓ➤ Send Mail to Client")
 
-            if success:
-                st.sidebar.success(f"✅ Email sent to {client_email}")
-                st.toast(f"Email sent to {client_email}", icon="✅")
+    if num_due == 0:
+        st.warning("✅ No pending invoices for this client. Email not required.")
+    else:
+        force_resend = st.checkbox("Resend even if already sent today", key="force_resend")
+        if st.button("🚀 Send Now"):
+            if not st.session_state.sender_email or not st.session_state.sender_password:
+                st.warning("⚠️ Please set sender credentials!")
+            elif client_email:
+                job, queued = queue_reminders(
+                    [(selected_client_name, build_html_message(st.session_state.sender_email, client_email, subject_input, message_input, cc=cc_email))],
+                    label=f"Reminder to {selected_client_name}",
+                    force=force_resend,
+                )
+                if queued:
+                    start_dispatch_polling(f"Email to {client_email} queued")
+                else:
+                    st.info(f"ℹ️ {job.snapshot()['results'][selected_client_name][1]} — not sent again.")
             else:
-                st.sidebar.error(f"❌ Failed to send email: {msg}")
-                st.toast(f"Failed to send email: {msg}", icon="❌")
+                st.error("⚠️ Client email address not found.")
+                st.toast(f"Client email address not found.", icon="⚠️")
+
+    # --- Bulk Reminders: every client with dues, over pooled SMTP sessions ---
+    st.markdown("## 📨 Remind All Clients")
+    bulk_clients = clients_with_dues(ledger)
+    st.caption(f"{len(bulk_clients)} clients with due invoices")
+    if bulk_clients and st.button(f"📨 Send to all {len(bulk_clients)} clients", key="send_all_btn"):
+        if not st.session_state.sender_email or not st.session_state.sender_password:
+            st.warning("⚠️ Please set sender credentials!")
+        else:
+            bulk_messages, bulk_failed = core.bulk_reminders(
+                ledger, reminder_messages, st.session_state.sender_email, st.session_state.get("client_emails")
+            )
+            job, queued = queue_reminders(bulk_messages, label=f"Bulk reminders ({len(bulk_clients)} clients)", failed=bulk_failed)
+            start_dispatch_polling(f"{queued} reminders queued")
+
+    # today's reminders not sent yet: pending or failed, or abandoned mid-send by a restarted app or runner
+    unfinished_count = dispatcher.outbox.unfinished_count()
+    if unfinished_count and st.button(f"♻️ Resume {unfinished_count} unsent reminders", key="resume_outbox_btn"):
+        if not st.session_state.sender_email or not st.session_state.sender_password:
+            st.warning("⚠️ Please set sender credentials!")
+        else:
+            claimed = dispatcher.outbox.claim_unfinished()
+            job = dispatcher.submit(
+                st.session_state.sender_email,
+                st.session_state.sender_password,
+                [(f"{client} #{row_id}", msg) for row_id, client, msg in claimed],
+                label=f"Resumed reminders ({len(claimed)})",
+                outbox_ids={f"{client} #{row_id}": row_id for row_id, client, _ in claimed},
+            )
+            st.session_state.dispatch_jobs.append(job.id)
+            start_dispatch_polling(f"{len(claimed)} reminders queued")
+
+with st.sidebar:
+    email_composer()
+tracer.checkpoint("email_composer")
+
+
+# --- Outgoing Mail: progress of this session's queued batches ---
+def render_dispatch_status(polling):
+    jobs = dispatcher.jobs(st.session_state.dispatch_jobs)
+    if not jobs:
+        return
+    if polling and all(job.done for job in jobs):
+        st.rerun()  # full rerun once the last batch finishes, which also stops the polling
+    st.markdown("## 📬 Outgoing Mail")
+    for job in jobs[:5]:
+        info = job.snapshot()
+        if info["status"] == "done":
+            st.caption(
+                f"{info['label']} · ✅ {info['sent']} sent · ❌ {info['failed']} failed"
+                + (f" · ⏭️ {info['skipped']} skipped" if info["skipped"] else "")
+            )
         else:
-            st.sidebar.error("⚠️ Client email address not found.")
-            st.toast(f"Client email address not found.", icon="⚠️")
+            st.progress(
+                info["completed"] / max(info["total"], 1),
+                text=f"{info['label']} · {info['completed']}/{info['total']} ({info['status']})",
+            )
+        if info["error"]:
+            st.error(f"❌ {info['error']}")
+        if info["results"]:
+            with st.expander(f"📋 Details #{info['id']}", expanded=False):
+                st.dataframe(
+                    pd.DataFrame(
+                        [(key, {True: "✅ Sent", False: "❌ Failed", None: "⏭️ Skipped"}[ok], detail) for key, (ok, detail) in info["results"].items()],
+                        columns=["Client", "Status", "Detail"],
+                    ),
+                    hide_index=True,
+                )
+
+# poll (rerunning only this panel) while a batch is still in flight
+dispatch_running = any(not job.done for job in dispatcher.jobs(st.session_state.dispatch_jobs))
+with st.sidebar:
+    st.fragment(render_dispatch_status, run_every="2s" if dispatch_running else None)(dispatch_running)
+
+# --- Performance: this run's stages vs p50/p95 over recent runs ---
+tracer.checkpoint("outgoing_mail")
+run_record = tracer.close()
+trace_log.append(run_record)
+with st.sidebar.expander("⏱️ Performance", expanded=False):
+    perf_stats = trace_log.stats()
+    this_run = {**run_record["spans"], "total": run_record["total_ms"]}
+    st.dataframe(
+        pd.DataFrame(
+            [
+                (stage, this_run.get(stage), stats["p50"], stats["p95"], stats["runs"])
+                for stage, stats in perf_stats.items()
+            ],
+            columns=["Stage", "This run (ms)", "p50 (ms)", "p95 (ms)", "Runs"],
+        ).sort_values("p95 (ms)", ascending=False),
+        hide_index=True,
+        width="stretch",
+    )
+    st.caption(f"Recent runs in {TRACE_FILE} (rotated at 1 MB). SMTP and rate fetches run in the background and are listed as their own stages.")
@@ -0,0 +1,85 @@
+"""Compare peak memory and time of eager vs streaming ingestion (xlsx -> ledger snapshot).
+
+Each mode runs in a fresh subprocess so its peak RSS is measured in isolation.
+"streaming" also loads the finished ledger back, as the app does; "stream-only"
+stops at the snapshot file, showing the ingestion stage's own ceiling.
+
+Usage:
+    python benchmarks/bench_ingest.py [--rows 50000 300000] [--budget-mb 32]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_mode(mode, path, snapshot_path, budget_mb):
+    """Ingest path in one mode; returns (seconds, rows)."""
+    from bench_workbook_reader import SHEET
+
+    start = time.perf_counter()
+    if mode == "eager":
+        from receivables.ledger import build_ledger
+        from receivables.snapshot import write_snapshot
+        from receivables.workbook import read_excel_with_display_values
+
+        df, display_map = read_excel_with_display_values(path, SHEET)
+        ledger = build_ledger(df, display_map)
+        write_snapshot(snapshot_path, ledger)
+    else:
+        from receivables.ingest import stream_ingest
+
+        progress = {}
+        ledger = stream_ingest(
+            path, snapshot_path, sheet_name=SHEET, memory_budget=budget_mb * 1024 * 1024,
+            on_progress=lambda done, total: progress.update(rows=done), load=mode == "streaming",
+        )
+        if ledger is None:
+            return time.perf_counter() - start, progress["rows"]
+    return time.perf_counter() - start, len(ledger)
+
+
+def child(mode, path, snapshot_path, budget_mb):
+    seconds, rows = run_mode(mode, path, snapshot_path, budget_mb)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(json.dumps({"seconds": seconds, "rows": rows, "peak_mb": peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50000, 300000])
+    parser.add_argument("--budget-mb", type=int, default=32)
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "XLSX", "SNAPSHOT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child, args.budget_mb)
+        return
+
+    from bench_workbook_reader import write_sheet
+
+    print(f"{'rows':>8}  {'mode':>11}  {'time (s)':>9}  {'peak RSS (MB)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"ledger_{rows}.xlsx")
+            write_sheet(path, rows)
+            for mode in ("eager", "streaming", "stream-only"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--budget-mb", str(args.budget_mb),
+                     "--child", mode, path, os.path.join(tmp, f"{mode}.parquet")],
+                    check=True, capture_output=True, text=True,
+                )
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+                assert result["rows"] == rows, result
+                print(f"{rows:>8}  {mode:>11}  {result['seconds']:>9.2f}  {result['peak_mb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
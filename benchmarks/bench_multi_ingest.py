@@ -0,0 +1,56 @@
+"""Time parsing several workbooks (one sheet each) serially vs on a process pool.
+
+Each worker count runs parse_sources() on the same files with a fresh pool, so
+worker start-up is included; speed-up is bounded by the number of CPU cores.
+
+Usage:
+    python benchmarks/bench_multi_ingest.py [--files 4] [--rows 20000] [--workers 1 2 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_workbook_reader import SHEET, write_sheet
+
+from receivables.ingest import make_process_pool, merge_sources, parse_sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{args.files} workbooks x {args.rows:,} rows, {os.cpu_count()} CPU cores")
+    print(f"{'workers':>8}  {'time (s)':>9}  {'speed-up':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for i in range(args.files):
+            path = os.path.join(tmp, f"unit_{i}.xlsx")
+            write_sheet(path, args.rows, seed=i)
+            sources.append((path, SHEET))
+
+        serial = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            if workers == 1:
+                results = [r for source in sources for r in parse_sources([source])]
+            else:
+                with make_process_pool(workers) as pool:
+                    results = parse_sources(sources, executor=pool)
+            df, _ = merge_sources([(path, r[0], r[1]) for (path, _), r in zip(sources, results)])
+            seconds = time.perf_counter() - start
+            assert len(df) == args.files * args.rows, len(df)
+            serial = serial or seconds
+            print(f"{workers:>8}  {seconds:>9.2f}  {serial / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Per-stage time and memory of the headless data path on synthetic workbooks.
+
+Stages: read (xlsx -> df + display strings), ledger (currency parsing and the
+paid/pending split), clients (client index), ageing (days pending, buckets and the
+client x bucket matrix), reminders (per-client tables), render (HTML for every
+client), snapshot write/read. Each size runs in a fresh subprocess: one timed pass,
+then a tracemalloc pass for each stage's peak Python/NumPy allocation; the process's
+peak RSS and the loaded ledger's size (raw frame and typed columns) are reported as well. Use --json to keep results for regression tracking.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--rows 1000 10000 100000 500000] [--clients 2000] [--json out.json]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = ["read", "ledger", "clients", "ageing", "reminders", "render", "snapshot_write", "snapshot_read"]
+
+
+def run_stages(path, snapshot_path, measure):
+    """Run every stage once; measure(name, fn) runs fn and records the stage."""
+    from receivables import core
+    from receivables.snapshot import read_snapshot, write_snapshot
+
+    rates = core.rate_table(83.0)
+    df, display_map = measure("read", lambda: core.load_workbook(path))
+    ledger = measure("ledger", lambda: core.build_ledger(df, display_map, "bench"))
+    measure("clients", lambda: ledger.client_index)
+    measure("ageing", lambda: ledger.ageing().matrix())
+    measure("reminders", lambda: core.reminder_tables(ledger, rates))
+    measure("render", lambda: core.ReminderTemplates().render_all(ledger, rates))
+    measure("snapshot_write", lambda: write_snapshot(snapshot_path, ledger))
+    measure("snapshot_read", lambda: read_snapshot(snapshot_path, "bench"))
+    return ledger
+
+
+def ledger_size(ledger):
+    """Deep in-memory size (MB) of the ledger's raw frame and typed columns."""
+    return {
+        "df": ledger.df.memory_usage(deep=True).sum() / 2**20,
+        "parsed": ledger.parsed.memory_usage(deep=True).sum() / 2**20,
+    }
+
+
+def child(path, snapshot_path):
+    seconds = {}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        result = fn()
+        seconds[name] = time.perf_counter() - start
+        return result
+
+    size_mb = ledger_size(run_stages(path, snapshot_path, timed))
+
+    peaks = {}
+
+    def traced(name, fn):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        peaks[name] = (tracemalloc.get_traced_memory()[1] - before) / 2**20
+        return result
+
+    tracemalloc.start()
+    run_stages(path, snapshot_path, traced)
+    tracemalloc.stop()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(json.dumps({"seconds": seconds, "peak_mb": peaks, "rss_mb": rss_mb, "ledger_mb": size_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--child", nargs=2, metavar=("XLSX", "SNAPSHOT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    from bench_workbook_reader import write_sheet
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"ledger_{rows}.xlsx")
+            write_sheet(path, rows, clients=min(args.clients, rows))
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", path, os.path.join(tmp, "ledger.parquet")],
+                check=True, capture_output=True, text=True,
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            results[rows] = result
+
+            print(f"\n{rows:,} invoices, {min(args.clients, rows):,} clients (peak RSS {result['rss_mb']:.0f} MB)")
+            print(f"  {'stage':<15}{'time (s)':>10}{'peak (MB)':>11}")
+            for stage in STAGES:
+                print(f"  {stage:<15}{result['seconds'][stage]:>10.3f}{result['peak_mb'][stage]:>11.1f}")
+            print(f"  {'total':<15}{sum(result['seconds'].values()):>10.3f}")
+            print(f"  ledger in memory: df {result['ledger_mb']['df']:.1f} MB, parsed {result['ledger_mb']['parsed']:.1f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"clients": args.clients, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Memory of concurrent dashboard sessions over one shared ledger.
+
+Opens --sessions headless sessions of app.py (streamlit.testing AppTest, all in this
+process so they share st.cache_resource exactly like one server) against a synthetic
+workbook, and reports with tracemalloc:
+  shared   — the first session's load: the parsed Ledger and the process-wide caches
+  rerun    — peak extra allocation of one dashboard rerun (All Clients, then one client)
+  retained — memory each further session keeps after its reruns (its session state)
+Pass --app to measure another revision of app.py (e.g. `git show HEAD~1:app.py`).
+
+Usage:
+    python benchmarks/bench_sessions.py [--rows 20000] [--sessions 10] [--app app.py] [--json out.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MB = 2**20
+
+
+def open_session(app_path):
+    """A logged-in session of the app after its first run, then a rerun filtered to one client.
+    Returns (session, peak extra MB over the reruns)."""
+    from streamlit.testing.v1 import AppTest
+
+    session = AppTest.from_file(app_path, default_timeout=600)
+    session.session_state["logged_in"] = True
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    session.run()
+    if session.exception:
+        raise RuntimeError(session.exception[0].message)
+    client_filter = next(box for box in session.selectbox if box.label == "Select Client")
+    client_filter.set_value(client_filter.options[1]).run()
+    return session, (tracemalloc.get_traced_memory()[1] - before) / MB
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+    app_path = os.path.abspath(args.app)
+    json_path = args.json and os.path.abspath(args.json)
+
+    from bench_workbook_reader import write_sheet
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # the app reads and writes ./data
+        os.makedirs(os.path.join(tmp, "data"))
+        write_sheet(os.path.join(tmp, "data", "last_uploaded.xlsx"), args.rows, clients=args.clients)
+        with open(os.path.join(tmp, "data", "upload_time.txt"), "w") as f:
+            f.write(time.strftime("%Y-%m-%d %H:%M:%S"))
+        # st.secrets is read relative to the working directory
+        shutil.copytree(os.path.join(ROOT, ".streamlit"), os.path.join(tmp, ".streamlit"))
+        os.chdir(tmp)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        sessions = []
+        base = tracemalloc.get_traced_memory()[0]
+        session, _ = open_session(app_path)
+        sessions.append(session)
+        shared_mb = (tracemalloc.get_traced_memory()[0] - base) / MB
+        load_seconds = time.perf_counter() - start
+
+        peaks, retained = [], []
+        for _ in range(args.sessions - 1):
+            before = tracemalloc.get_traced_memory()[0]
+            session, peak = open_session(app_path)
+            sessions.append(session)
+            peaks.append(peak)
+            retained.append((tracemalloc.get_traced_memory()[0] - before) / MB)
+        total_mb = (tracemalloc.get_traced_memory()[0] - base) / MB
+        tracemalloc.stop()
+
+    result = {
+        "app": app_path,
+        "rows": args.rows,
+        "sessions": args.sessions,
+        "load_seconds": round(load_seconds, 2),
+        "shared_mb": round(shared_mb, 1),
+        "rerun_peak_mb": round(max(peaks), 1) if peaks else None,
+        "retained_per_session_mb": round(sum(retained) / len(retained), 2) if retained else None,
+        "total_mb": round(total_mb, 1),
+    }
+    print(f"{args.rows:,} invoices, {args.sessions} sessions ({app_path})")
+    print(f"  shared ledger + caches   {result['shared_mb']:>8.1f} MB  (first load {result['load_seconds']} s)")
+    if peaks:
+        print(f"  rerun peak               {result['rerun_peak_mb']:>8.1f} MB")
+        print(f"  retained per session     {result['retained_per_session_mb']:>8.2f} MB")
+    print(f"  all sessions             {result['total_mb']:>8.1f} MB")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
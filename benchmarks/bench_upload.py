@@ -0,0 +1,88 @@
+"""Time handling one uploaded workbook: disk round-trip vs parsing from the upload buffer.
+
+  round-trip — the previous upload path: write the upload to disk, parse it back from
+               the file, re-export the frame over it with to_excel and hash the result
+  in-memory  — the current one: hash and parse the upload bytes directly while
+               persist_upload writes them to disk verbatim on a background thread
+Both then build the ledger and write the Parquet snapshot. The workbook on disk is
+compared with the upload afterwards ("verbatim": byte-identical).
+
+Usage:
+    python benchmarks/bench_upload.py [--rows 5000 20000] [--repeat 3]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def round_trip(data, data_file, snapshot_file):
+    from receivables import core
+    from receivables.cache import file_digest
+    from receivables.ledger import build_ledger
+    from receivables.snapshot import write_snapshot
+
+    with open(data_file, "wb") as f:
+        f.write(data)
+    df, display_map = core.load_workbook(data_file)
+    df.to_excel(data_file, index=False)
+    ledger = build_ledger(df, display_map, file_digest(data_file))
+    write_snapshot(snapshot_file, ledger)
+    return ledger
+
+
+def in_memory(data, data_file, snapshot_file):
+    from receivables import core
+    from receivables.cache import bytes_digest
+    from receivables.ingest import persist_upload
+    from receivables.ledger import build_ledger
+    from receivables.snapshot import write_snapshot
+
+    digest = bytes_digest(data)
+    persisted = persist_upload(data_file, data, digest)
+    df, display_map = core.load_workbook(io.BytesIO(data))
+    ledger = build_ledger(df, display_map, digest)
+    write_snapshot(snapshot_file, ledger)
+    persisted.result()
+    return ledger
+
+
+MODES = {"round-trip": round_trip, "in-memory": in_memory}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from bench_workbook_reader import write_sheet
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            source = os.path.join(tmp, f"upload_{rows}.xlsx")
+            write_sheet(source, rows)
+            with open(source, "rb") as f:
+                data = f.read()
+            print(f"{rows:,} rows ({len(data) / 2**20:.1f} MB upload)")
+            for mode, handle in MODES.items():
+                data_file = os.path.join(tmp, f"{mode}.xlsx")
+                snapshot_file = os.path.join(tmp, f"{mode}.parquet")
+                times = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    handle(data, data_file, snapshot_file)
+                    times.append(time.perf_counter() - start)
+                with open(data_file, "rb") as f:
+                    verbatim = f.read() == data
+                print(f"  {mode:<11} {min(times):>7.2f} s   verbatim={verbatim}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Benchmark the single-pass workbook reader against the previous per-column reader.
+
+Usage:
+    python benchmarks/bench_workbook_reader.py [--rows 1000 50000 200000] [--skip-legacy-above N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from receivables.workbook import read_excel_with_display_values  # noqa: E402
+
+HEADERS = ["Client Name", "Invoice Date", "Service Provided", "Invoice Number",
+           "Currency", "Invoice Value", "Paid", "Due", "Ageing (Days)"]
+SHEET = "Receivables"
+
+
+def write_sheet(path, rows, seed=7, clients=300):
+    """Write a receivables-shaped sheet with mixed $ / ₹ number formats."""
+    rnd = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET)
+    ws.append(HEADERS)
+    start = datetime(2024, 4, 1)
+    for i in range(rows):
+        usd = rnd.random() < 0.4
+        fmt = '"$"#,##0.00' if usd else '"₹"#,##0.00'
+        value = round(rnd.uniform(100, 250000), 2)
+        paid = value if rnd.random() < 0.5 else 0
+        amounts = []
+        for v in (value, paid, value - paid):
+            cell = WriteOnlyCell(ws, value=v)
+            cell.number_format = fmt
+            amounts.append(cell)
+        ws.append([
+            f"Client {rnd.randrange(clients):03d}",
+            start + timedelta(days=rnd.randrange(540)),
+            "Technical Support Services",
+            f"S2/25-26/ES/{i:06d}",
+            "$" if usd else "₹",
+            *amounts,
+            None,
+        ])
+    wb.save(path)
+
+
+# Previous implementation (pandas read + one full sheet scan per column), kept as the baseline.
+# It needs an explicit sheet name: with sheet_name=None pd.read_excel returns a dict of sheets.
+def legacy_read_excel_with_display_values(path, sheet_name=None):
+    df = pd.read_excel(path, sheet_name=sheet_name, engine="openpyxl", dtype=object)
+    wb = load_workbook(path, data_only=True, read_only=True)
+    ws = wb[sheet_name] if sheet_name else wb.active
+    headers = {}
+    first_row = next(ws.iter_rows(min_row=1, max_row=1))
+    for cell in first_row:
+        if cell.value is not None:
+            headers[cell.column_letter] = str(cell.value)
+    display_map = {}
+    for col_name in df.columns:
+        col_letter = None
+        for letter, h in headers.items():
+            if str(h).strip().lower() == str(col_name).strip().lower():
+                col_letter = letter
+                break
+        if not col_letter:
+            continue
+        disp_values = []
+        for r in ws.iter_rows(min_row=2, max_col=ws.max_column, max_row=ws.max_row):
+            from openpyxl.utils import column_index_from_string
+            col_idx = column_index_from_string(col_letter) - 1
+            try:
+                cell = r[col_idx]
+            except Exception:
+                disp_values.append(None)
+                continue
+            cval = cell.value
+            nf = (cell.number_format or "").upper()
+            display = None
+            try:
+                if cval is None:
+                    display = None
+                elif "$" in nf or "[$USD" in nf or '"$"' in nf:
+                    try:
+                        display = f"${float(cval):,.2f}"
+                    except Exception:
+                        display = str(cval)
+                elif "₹" in nf or "RS" in nf or "INR" in nf or "[$INR" in nf or '"₹"' in nf:
+                    try:
+                        display = f"₹{float(cval):,.2f}"
+                    except Exception:
+                        display = str(cval)
+                elif isinstance(cval, str) and (cval.strip().startswith("$") or cval.strip().startswith("₹")):
+                    display = cval.strip()
+                elif isinstance(cval, (int, float)):
+                    display = f"{float(cval):,.2f}"
+                else:
+                    display = str(cval)
+            except Exception:
+                display = str(cval)
+            disp_values.append(display)
+        display_map[col_name] = disp_values
+    wb.close()
+    return df, display_map
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 50000, 200000])
+    parser.add_argument("--skip-legacy-above", type=int, default=None,
+                        help="only time the new reader for sheets larger than this")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'legacy (s)':>11}  {'single-pass (s)':>15}  {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"ledger_{rows}.xlsx")
+            write_sheet(path, rows)
+            new_time, (df_new, map_new) = timed(read_excel_with_display_values, path, SHEET)
+            if args.skip_legacy_above is not None and rows > args.skip_legacy_above:
+                print(f"{rows:>8}  {'-':>11}  {new_time:>15.2f}  {'-':>8}")
+                continue
+            old_time, (df_old, map_old) = timed(legacy_read_excel_with_display_values, path, SHEET)
+            pd.testing.assert_frame_equal(df_old, df_new)
+            for col, disp in map_old.items():
+                assert disp[: len(df_new)] == map_new[col], col
+            print(f"{rows:>8}  {old_time:>11.2f}  {new_time:>15.2f}  {old_time / new_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Headless helpers behind the S2 receivables dashboard (no Streamlit imports)."""
@@ -0,0 +1,80 @@
+# receivables/ageing.py
+"""Invoice ageing: days pending and ageing buckets per row, aggregated per client."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# upper bounds (days, inclusive) of every bucket but the last: 0–30 / 31–60 / 61–90 / 90+
+DEFAULT_BUCKET_EDGES = (30, 60, 90)
+
+
+def bucket_labels(edges=DEFAULT_BUCKET_EDGES):
+    """['0–30', '31–60', '61–90', '90+'] for the default edges."""
+    labels, low = [], 0
+    for edge in edges:
+        labels.append(f"{low}–{edge}")
+        low = edge + 1
+    labels.append(f"{edges[-1]}+")
+    return labels
+
+
+def days_pending(dates, now=None):
+    """Whole days from each invoice date to today (float array, NaN without a date)."""
+    today = pd.Timestamp(now or datetime.now()).normalize()
+    return (today - pd.to_datetime(dates).dt.normalize()).dt.days.to_numpy(dtype=float)
+
+
+def assign_buckets(days, edges=DEFAULT_BUCKET_EDGES):
+    """Bucket number per row (0 = first bucket, future dates included); -1 without a date."""
+    buckets = np.searchsorted(np.asarray(edges), np.nan_to_num(days, nan=0.0), side="left")
+    return np.where(np.isnan(days), -1, buckets)
+
+
+class Ageing:
+    """Days pending and ageing bucket for every row of a Ledger, computed once.
+
+    `days` and `bucket` are arrays aligned with the ledger's rows; matrix() aggregates
+    them to a client × bucket table, so charts grow with clients, not invoices.
+    """
+
+    def __init__(self, ledger, now=None, edges=DEFAULT_BUCKET_EDGES):
+        self._ledger = ledger
+        self.day = pd.Timestamp(now or datetime.now()).date()
+        self.edges = tuple(edges)
+        self.labels = bucket_labels(self.edges)
+        self.days = days_pending(ledger.parsed["date"], self.day)
+        self.bucket = assign_buckets(self.days, self.edges)
+
+    def bucket_names(self, positions=slice(None)):
+        """Bucket label per row (None without a date)."""
+        labels = np.array(self.labels + [None], dtype=object)
+        return labels[self.bucket[positions]]
+
+    def matrix(self, rows=None, weights=None):
+        """Client × bucket DataFrame over the pending rows.
+
+        rows: optional boolean mask or positions further restricting the rows (e.g. one client).
+        weights: optional per-row values to sum (e.g. INR dues); counts invoices otherwise.
+        Clients with nothing pending are left out; rows are ordered by their total, largest first.
+        """
+        index = self._ledger.client_index
+        codes = index.codes
+        mask = self._ledger.parsed["is_unpaid"].to_numpy() & (self.bucket >= 0) & (codes >= 0)
+        if rows is not None:
+            selected = np.zeros(len(mask), dtype=bool)
+            selected[rows] = True
+            mask &= selected
+        n_buckets = len(self.labels)
+        cells = codes[mask] * n_buckets + self.bucket[mask]
+        values = None if weights is None else np.nan_to_num(np.asarray(weights, dtype=float)[mask], nan=0.0)
+        table = np.bincount(cells, weights=values, minlength=len(index.clients) * n_buckets)
+        matrix = pd.DataFrame(
+            table.reshape(len(index.clients), n_buckets),
+            index=index.aggregates.index,
+            columns=pd.Index(self.labels, name="Ageing"),
+        )
+        if weights is None:
+            matrix = matrix.astype(int)
+        totals = matrix.sum(axis=1)
+        return matrix[totals > 0].loc[totals[totals > 0].sort_values(ascending=False, kind="stable").index]
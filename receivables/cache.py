@@ -0,0 +1,128 @@
+# receivables/cache.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class LRUCache:
+    """Small thread-safe LRU cache with hit/miss counters.
+
+    get_or_compute runs compute() outside the cache lock: other keys stay readable while a
+    slow value (e.g. a workbook parse) is built, and concurrent misses on the same key wait
+    for that one computation instead of repeating it.
+    """
+
+    def __init__(self, maxsize=4):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._pending = {}  # key -> Future of the computation in progress
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() on a miss.
+        A caller that misses while key is being computed waits for that result (counted as a hit)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._pending[key] = computing = Future()
+        if pending is not None:
+            return pending.result()
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            computing.set_exception(e)
+            raise
+        with self._lock:
+            self.put(key, value)
+            del self._pending[key]
+        computing.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+# --- FILE CONTENT DIGEST ---
+# Hashing is memoized on (size, mtime) so unchanged files are never re-read.
+_digest_lock = threading.Lock()
+_digests = {}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of the file contents, recomputed only when size/mtime change."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        cached = _digests.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _digest_lock:
+        _digests[path] = (stamp, digest)
+    return digest
+
+
+def bytes_digest(data):
+    """SHA-256 of in-memory content; equals file_digest of a file holding exactly data."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def remember_digest(path, digest):
+    """Record digest for the file as it is now, e.g. right after writing bytes whose
+    digest is already known, so file_digest does not read the file back to hash it."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _digest_lock:
+        _digests[path] = ((stat.st_size, stat.st_mtime_ns), digest)
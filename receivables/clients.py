@@ -0,0 +1,119 @@
+# receivables/clients.py
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from receivables.cache import LRUCache
+
+class ClientIndex:
+    """Client -> row positions plus per-client aggregates for one Ledger.
+
+    Built once per workbook load so client-scoped views are lookups, not scans.
+    `aggregates` is indexed by client name (sorted) with columns:
+      invoices — rows for the client
+      pending — rows on the pending side of the paid/pending split
+      due_count — rows whose due amount (or amount, without a due column) is > 0
+      oldest_due_date — earliest invoice date among those due rows
+    `due_by_currency` holds the due totals per client (rows) and currency (columns);
+    inr_totals(rates) converts them to one ₹ total per client.
+    """
+
+    def __init__(self, ledger):
+        self._ledger = ledger
+        client_col = ledger.roles.get("client")
+        if client_col is None:
+            codes = np.full(len(ledger.df), -1, dtype=np.intp)
+            clients = []
+        else:
+            codes, uniques = pd.factorize(ledger.df[client_col], sort=True)
+            clients = list(uniques)
+        self.clients = clients
+        self._lookup = {client: i for i, client in enumerate(clients)}
+
+        # positions of each client's rows, in sheet order
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(clients) + 1))
+        self._order = order
+        self._bounds = bounds
+
+        parsed = ledger.parsed
+        known = codes >= 0
+        due_amounts = parsed[ledger.due_role].to_numpy()
+        if ledger.roles.get("due") is None and ledger.roles.get("amount") is None:
+            # nothing to decide on: every invoice counts as due
+            self.due_mask = np.ones(len(codes), dtype=bool)
+        else:
+            self.due_mask = np.nan_to_num(due_amounts, nan=0.0) > 0
+        k = len(clients)
+
+        def count(mask):
+            return np.bincount(codes[known & mask], minlength=k)
+
+        due_rows = known & self.due_mask
+        oldest = (
+            parsed["date"][due_rows].groupby(codes[due_rows]).min().reindex(range(k))
+        )
+        self.aggregates = pd.DataFrame(
+            {
+                "invoices": count(np.ones(len(codes), dtype=bool)),
+                "pending": count(parsed["is_unpaid"].to_numpy()),
+                "due_count": count(self.due_mask),
+                "oldest_due_date": oldest.to_numpy(),
+            },
+            index=pd.Index(clients, name=client_col),
+        )
+        self.due_by_currency = (
+            pd.DataFrame({
+                "client": codes[due_rows],
+                "currency": parsed["currency"].to_numpy()[due_rows],
+                "amount": due_amounts[due_rows],
+            })
+            .pivot_table(index="client", columns="currency", values="amount", aggfunc="sum", fill_value=0.0)
+            .reindex(range(k), fill_value=0.0)
+            .set_axis(self.aggregates.index, axis=0)
+        )
+        self._codes = codes
+        self._inr_cache = LRUCache(maxsize=8)
+
+    @property
+    def codes(self):
+        """Client number per row (position in `clients`); -1 for rows without a client."""
+        return self._codes
+
+    def __contains__(self, client):
+        return client in self._lookup
+
+    def positions(self, client):
+        """Row positions (iloc) of client's invoices; empty for unknown clients."""
+        i = self._lookup.get(client)
+        if i is None:
+            return np.empty(0, dtype=np.intp)
+        return self._order[self._bounds[i]:self._bounds[i + 1]]
+
+    def due_positions(self, client):
+        """Row positions of client's invoices that still have an amount due."""
+        positions = self.positions(client)
+        return positions[self.due_mask[positions]]
+
+    def inr_totals(self, rates):
+        """Due total per client in INR for a currency -> ₹ rate table (memoized per table).
+        Sums the ledger's cached INR values, so no amount is converted twice."""
+        key = tuple(sorted(rates.items()))
+
+        def compute():
+            values = np.nan_to_num(self._ledger.inr_values(self._ledger.due_role, rates).to_numpy(), nan=0.0)
+            rows = (self._codes >= 0) & self.due_mask
+            totals = np.bincount(self._codes[rows], weights=values[rows], minlength=len(self.clients))
+            return pd.Series(totals, index=self.aggregates.index, name="due_inr")
+
+        return self._inr_cache.get_or_compute(key, compute)
+
+    def oldest_due_age(self, client, now=None):
+        """Days since the client's oldest due invoice, or None."""
+        if client not in self._lookup:
+            return None
+        oldest = self.aggregates.at[client, "oldest_due_date"]
+        if pd.isna(oldest):
+            return None
+        return ((now or datetime.now()) - oldest).days
@@ -0,0 +1,123 @@
+# receivables/core.py
+"""The dashboard's data path without Streamlit: workbook -> Ledger -> ageing -> reminders.
+
+app.py, the benchmarks and scripts all go through these functions, so every stage
+can be imported, timed and exercised on its own. The building blocks they use are
+re-exported here for convenience. The xlsx reader (openpyxl) is only imported once a
+workbook actually has to be parsed, so loading a current snapshot starts fast.
+"""
+import os
+
+import pandas as pd
+
+from receivables.ageing import DEFAULT_BUCKET_EDGES, Ageing, bucket_labels, days_pending
+from receivables.cache import file_digest
+from receivables.currency import DEFAULT_INR_RATES, parse_currency_series, to_inr
+from receivables.ledger import Ledger, build_ledger, split_paid_unpaid
+from receivables.mailer import build_html_message
+from receivables.reminders import (
+    ReminderTemplates, clients_with_dues, reminder_recipients, reminder_subject, reminder_tables,
+)
+from receivables.schema import detect_roles, effective_roles, schema_for
+from receivables.snapshot import read_snapshot, write_snapshot
+
+__all__ = [
+    "DEFAULT_BUCKET_EDGES", "DEFAULT_INR_RATES", "Ageing", "Ledger", "ReminderTemplates",
+    "bucket_labels", "build_ledger", "bulk_reminders", "clients_with_dues", "days_pending",
+    "load_ledger", "load_workbook", "parse_currency_series", "rate_table", "read_excel_with_display_values",
+    "reminder_recipients", "reminder_subject", "reminder_tables", "split_paid_unpaid", "to_inr",
+]
+
+
+def __getattr__(name):
+    # lazy re-export: importing the reader pulls in openpyxl
+    if name == "read_excel_with_display_values":
+        from receivables.workbook import read_excel_with_display_values
+
+        return read_excel_with_display_values
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def load_workbook(path, sheet_name=None):
+    """Parse a workbook (a path or a binary file object) into (df, display_map);
+    falls back to a plain pandas read."""
+    from receivables.workbook import read_excel_with_display_values
+
+    try:
+        return read_excel_with_display_values(path, sheet_name)
+    except Exception:
+        if hasattr(path, "seek"):
+            path.seek(0)
+        try:
+            df_raw = pd.read_excel(path, sheet_name=sheet_name or 0, engine="openpyxl", dtype=object)
+        except Exception:
+            if hasattr(path, "seek"):
+                path.seek(0)
+            df_raw = pd.read_excel(path, sheet_name=sheet_name or 0, dtype=object)
+        return df_raw, {}
+
+
+def _save_snapshot(path, ledger):
+    try:
+        write_snapshot(path, ledger)
+    except Exception:
+        pass  # snapshot is only an accelerator
+
+
+def load_ledger(path, digest=None, snapshot_path=None, schema_path=None):
+    """Ledger for the workbook at path.
+
+    With snapshot_path, a current Parquet snapshot is read instead of the xlsx (and
+    refreshed after a parse); workbooks above STREAMING_THRESHOLD_BYTES are then
+    ingested in bounded-memory chunks. With schema_path, column roles come from the
+    stored schema (data/schema.json), so detection only runs when the columns change.
+    """
+    digest = digest or file_digest(path)
+
+    def roles_for(df):
+        if schema_path is None:
+            return detect_roles(df.columns)
+        return effective_roles(schema_for(df, schema_path))
+
+    ledger = read_snapshot(snapshot_path, digest) if snapshot_path else None
+    if ledger is None and snapshot_path:
+        from receivables.ingest import STREAMING_THRESHOLD_BYTES, stream_ingest
+
+        if os.path.getsize(path) > STREAMING_THRESHOLD_BYTES:
+            return stream_ingest(path, snapshot_path, digest, roles_for)
+    if ledger is None:
+        df, display_map = load_workbook(path)
+        ledger = build_ledger(df, display_map, digest, roles_for(df))
+        if snapshot_path:
+            _save_snapshot(snapshot_path, ledger)
+        return ledger
+    roles = roles_for(ledger.df)
+    if roles != ledger.roles:
+        # mapping was edited since the snapshot was written
+        ledger = build_ledger(ledger.df, ledger.display_map, digest, roles)
+        _save_snapshot(snapshot_path, ledger)
+    return ledger
+
+
+def rate_table(usd_to_inr, rates=None):
+    """Currency -> ₹ rate table: saved rates (or the defaults) with the current USD rate."""
+    return {**(rates or DEFAULT_INR_RATES), "USD": usd_to_inr}
+
+
+def bulk_reminders(ledger, messages, sender_email, client_emails=None):
+    """Reminder emails for every client with dues.
+
+    messages: {client: html body}, e.g. from ReminderTemplates.render_all.
+    Returns ([(client, EmailMessage)], {client: reason}) — the second for clients
+    without a recipient address.
+    """
+    reminders, failed = [], {}
+    for client in clients_with_dues(ledger):
+        to_email, cc_email = reminder_recipients(ledger, client, client_emails)
+        if not to_email:
+            failed[client] = "Client email address not found"
+            continue
+        reminders.append((client, build_html_message(
+            sender_email, to_email, reminder_subject(client), messages[client], cc=cc_email,
+        )))
+    return reminders, failed
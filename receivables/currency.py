@@ -0,0 +1,129 @@
+# receivables/currency.py
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Values seen in a dedicated "Currency" column, mapped to ISO codes
+CURRENCY_CODES = {
+    "$": "USD", "USD": "USD", "usd": "USD",
+    "₹": "INR", "INR": "INR", "inr": "INR",
+    "€": "EUR", "EUR": "EUR", "eur": "EUR",
+    "£": "GBP", "GBP": "GBP", "gbp": "GBP",
+    "د.إ": "AED", "AED": "AED", "aed": "AED",
+}
+
+# Leading symbols/codes recognised in amount cells (₹ / Rs are handled separately)
+CURRENCY_PREFIXES = (
+    ("$", "USD"), ("€", "EUR"), ("£", "GBP"), ("د.إ", "AED"),
+    ("USD", "USD"), ("EUR", "EUR"), ("GBP", "GBP"), ("AED", "AED"),
+)
+INR_TOKENS = ("₹", "INR", "Rs", "rs")
+
+# Fallback ₹-per-unit rates; the app overrides them with saved/manual rates
+DEFAULT_INR_RATES = {"INR": 1.0, "USD": 83.0, "EUR": 90.0, "GBP": 105.0, "AED": 22.6}
+
+# The amount grammar once symbols and thousands separators are stripped: ASCII decimal
+# digits only, so 'inf', 'nan', '1_000' or '٣' parse to 0.0. Shared by the scalar parser
+# and the Arrow path (RE2) so both give the same result for every cell.
+_NUMBER_PATTERN = r"^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$"
+_NUMBER_RE = re.compile(_NUMBER_PATTERN)
+
+
+def _to_amount(text):
+    return float(text) if _NUMBER_RE.match(text) else 0.0
+
+
+def parse_currency_from_string(s):
+    """Parse currency and numeric amount from a string like '$1,200', '€950' or '₹4,294.00'.
+    Returns (currency, amount) where currency is an ISO code; bare numbers are INR."""
+    if s is None:
+        return "INR", 0.0
+    if isinstance(s, (int, float)):
+        # numeric with no symbol — assume INR
+        return "INR", float(s)
+    text = str(s).strip()
+    # If the string already starts with symbol
+    for prefix, code in CURRENCY_PREFIXES:
+        if text.startswith(prefix):
+            return code, _to_amount(text.replace(",", "").replace(prefix, "").strip())
+    if text.startswith("₹") or text.startswith("INR") or text.lower().startswith("rs"):
+        cleaned = text.replace(",", "")
+        for token in INR_TOKENS:
+            cleaned = cleaned.replace(token, "")
+        return "INR", _to_amount(cleaned.strip())
+    # fallback: a bare number (assume INR)
+    return "INR", _to_amount(text.replace(",", ""))
+
+
+def parse_currency(value):
+    """Generic parse function (accepts numeric or string)."""
+    return parse_currency_from_string(value)
+
+
+def _parse_text_amounts(texts):
+    """(codes, amounts) numpy arrays for an array of strings, using Arrow string kernels."""
+    arr = pc.utf8_trim_whitespace(pa.array(texts, type=pa.string(), from_pandas=True))
+    codes = np.full(len(arr), "INR", dtype=object)
+    cleaned = pc.replace_substring(arr, ",", "")
+    matched = pa.array(np.zeros(len(arr), dtype=bool))
+    for prefix, code in CURRENCY_PREFIXES:
+        hit = pc.and_not(pc.starts_with(arr, prefix), matched)
+        if not pc.any(hit).as_py():
+            continue
+        cleaned = pc.if_else(hit, pc.replace_substring(cleaned, prefix, ""), cleaned)
+        codes[hit.to_numpy(zero_copy_only=False)] = code
+        matched = pc.or_(matched, hit)
+    inr = pc.and_not(
+        pc.or_(pc.or_(pc.starts_with(arr, "₹"), pc.starts_with(arr, "INR")), pc.starts_with(pc.utf8_lower(arr), "rs")),
+        matched,
+    )
+    if pc.any(inr).as_py():
+        stripped = cleaned
+        for token in INR_TOKENS:
+            stripped = pc.replace_substring(stripped, token, "")
+        cleaned = pc.if_else(inr, stripped, cleaned)
+    cleaned = pc.utf8_trim_whitespace(cleaned)
+    # cells outside the grammar parse to 0.0, like the scalar parser (the cast alone
+    # would also accept e.g. 'inf' or 'nan')
+    valid = pc.match_substring_regex(cleaned, _NUMBER_PATTERN)
+    numbers = pc.cast(pc.if_else(valid, cleaned, "0"), pa.float64())
+    return codes, numbers.to_numpy(zero_copy_only=False)
+
+
+def parse_currency_series(values):
+    """Vectorized parse_currency over a whole column.
+    Returns a DataFrame with 'currency' and 'amount' columns aligned to values."""
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+
+    # numeric fast path: no symbols possible, everything is INR
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        currency = np.full(len(s), "INR", dtype=object)
+        return pd.DataFrame({"currency": currency, "amount": s.to_numpy(dtype=float)}, index=s.index)
+
+    amount = np.full(len(s), np.nan)
+    currency = np.full(len(s), "INR", dtype=object)
+    kinds = s.map(type).to_numpy()
+    numeric_types = [t for t in set(kinds) if issubclass(t, (int, float, np.number))]
+    is_numeric = np.isin(kinds, numeric_types)
+    is_none = kinds == type(None)
+    is_text = ~is_numeric & ~is_none & s.notna().to_numpy()
+
+    amount[is_numeric] = s[is_numeric].to_numpy(dtype=float)
+    amount[is_none] = 0.0
+    if is_text.any():
+        texts = s[is_text]
+        if set(kinds[is_text]) != {str}:
+            texts = texts.astype(str)
+        currency[is_text], amount[is_text] = _parse_text_amounts(texts)
+
+    return pd.DataFrame({"currency": currency, "amount": amount}, index=s.index)
+
+
+def to_inr(amounts, currencies, rates):
+    """Convert amounts to INR in one vectorized step using a currency -> ₹ rate table.
+    Currencies missing from the table are taken as INR (rate 1)."""
+    factors = pd.Series(currencies, index=amounts.index).map(rates).astype(float).fillna(1.0)
+    return amounts * factors
@@ -0,0 +1,150 @@
+# receivables/diff.py
+"""Row-level diff between two ledgers, keyed by invoice number."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from receivables.ledger import raw_column
+
+# parsed fields compared between uploads, with their display labels
+COMPARED_FIELDS = {
+    "client": "Client",
+    "currency": "Currency",
+    "amount": "Amount",
+    "due": "Due",
+    "paid": "Paid",
+    "date": "Invoice Date",
+}
+
+
+def _keyed_frame(ledger):
+    """(frame, unkeyed_clients): comparable fields per row indexed by invoice number, and
+    the clients of rows without one (those rows cannot be matched, so their clients always
+    count as affected). Repeated invoice numbers are told apart by occurrence ('INV-1', 'INV-1 #2')."""
+    invoice_col = ledger.roles.get("invoice")
+    client_col = ledger.roles.get("client")
+    keys = raw_column(ledger.df, invoice_col).map(lambda v: "" if v is None or v != v else str(v).strip())
+    occurrence = keys.groupby(keys).cumcount()
+    keys = keys.where(occurrence == 0, keys + " #" + (occurrence + 1).astype(str))
+    frame = ledger.parsed[["currency", "amount", "due", "paid", "date"]].copy()
+    frame["client"] = ledger.df[client_col].to_numpy() if client_col is not None else ""
+    frame.index = pd.Index(keys.to_numpy(), name="invoice")
+    keyed = keys.to_numpy() != ""
+    return frame[keyed], set(frame["client"][~keyed])
+
+
+def _differs(old, new):
+    both_missing = old.isna().to_numpy() & new.isna().to_numpy()
+    return (old.to_numpy() != new.to_numpy()) & ~both_missing
+
+
+class LedgerDiff:
+    """What changed between two uploads.
+
+    added / removed / changed are DataFrames indexed by invoice number.
+    changed holds, per changed field, the old and new value ('<field>_old', '<field>_new')
+    plus a 'fields' column listing which fields changed.
+    affected_clients is every client with an added, removed or changed row (old or new name),
+    plus clients with rows that have no invoice number.
+    """
+
+    def __init__(self, added, removed, changed, old_digest=None, new_digest=None, unkeyed_clients=()):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.old_digest = old_digest
+        self.new_digest = new_digest
+        clients = set(added["client"]) | set(removed["client"]) | set(unkeyed_clients)
+        if len(changed):
+            clients |= set(changed["client_old"]) | set(changed["client_new"])
+        self.affected_clients = clients
+
+    def summary(self):
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "changed": len(self.changed),
+            "affected_clients": len(self.affected_clients),
+        }
+
+    def to_table(self):
+        """One row per affected invoice: invoice, client, change, details."""
+        rows = []
+        for invoice, row in self.added.iterrows():
+            rows.append((invoice, row["client"], "Added", ""))
+        for invoice, row in self.removed.iterrows():
+            rows.append((invoice, row["client"], "Removed", ""))
+        for invoice, row in self.changed.iterrows():
+            details = "; ".join(
+                f"{COMPARED_FIELDS[f]}: {_fmt(row[f + '_old'])} → {_fmt(row[f + '_new'])}" for f in row["fields"]
+            )
+            rows.append((invoice, row["client_new"], "Changed", details))
+        return pd.DataFrame(rows, columns=["Invoice", "Client", "Change", "Details"])
+
+
+def _fmt(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return "-"
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def diff_ledgers(old, new):
+    """LedgerDiff from old to new, or None if either ledger has no invoice-number column."""
+    if old is None or old.roles.get("invoice") is None or new.roles.get("invoice") is None:
+        return None
+    old_frame, old_unkeyed = _keyed_frame(old)
+    new_frame, new_unkeyed = _keyed_frame(new)
+    added = new_frame.loc[new_frame.index.difference(old_frame.index, sort=False)]
+    removed = old_frame.loc[old_frame.index.difference(new_frame.index, sort=False)]
+
+    common = new_frame.index.intersection(old_frame.index, sort=False)
+    before = old_frame.loc[common]
+    after = new_frame.loc[common]
+    flags = pd.DataFrame(
+        {field: _differs(before[field], after[field]) for field in COMPARED_FIELDS}, index=common
+    )
+    changed_mask = flags.any(axis=1).to_numpy()
+    changed = pd.concat(
+        [before[changed_mask].add_suffix("_old"), after[changed_mask].add_suffix("_new")], axis=1
+    )
+    changed["fields"] = [
+        [field for field in COMPARED_FIELDS if row[field]] for _, row in flags[changed_mask].iterrows()
+    ]
+    return LedgerDiff(added, removed, changed, old.source_digest, new.source_digest, old_unkeyed | new_unkeyed)
+
+
+# --- PERSISTED SUMMARY (data/upload_diff.json) ---
+# largest number of invoice rows kept in the stored change table
+MAX_STORED_ROWS = 500
+
+
+def save_diff(path, diff, uploaded_at):
+    """Store the diff's summary and change table for the "what changed" panel."""
+    table = diff.to_table()
+    payload = {
+        "uploaded_at": uploaded_at,
+        "old_digest": diff.old_digest,
+        "new_digest": diff.new_digest,
+        "summary": diff.summary(),
+        "rows": table.head(MAX_STORED_ROWS).to_dict(orient="records"),
+        "truncated": len(table) > MAX_STORED_ROWS,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=4, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def load_diff(path):
+    """Stored diff summary dict, or None if missing/unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
@@ -0,0 +1,139 @@
+# receivables/dispatch.py
+"""Background email dispatch: batches run on worker threads, the UI polls their progress."""
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from receivables.mailer import DEFAULT_POOL_SIZE, send_batch
+
+# finished jobs kept for the status panel
+MAX_FINISHED_JOBS = 20
+
+
+class DispatchJob:
+    """Progress of one queued batch. Updated from the worker thread; read via snapshot()."""
+
+    def __init__(self, job_id, label, keys):
+        self.id = job_id
+        self.label = label
+        self.keys = list(keys)
+        self.created = datetime.now()
+        self.finished = None
+        self.status = "queued"  # queued -> running -> done
+        self.error = None
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, ok, detail):
+        """ok: True sent, False failed, None skipped (nothing to send)."""
+        with self._lock:
+            self._results[key] = (ok, detail)
+
+    @property
+    def done(self):
+        return self.status == "done"
+
+    def snapshot(self):
+        """Consistent copy of the job's state: dict with counts and per-key results."""
+        with self._lock:
+            results = dict(self._results)
+        sent = sum(ok is True for ok, _ in results.values())
+        failed = sum(ok is False for ok, _ in results.values())
+        return {
+            "id": self.id,
+            "label": self.label,
+            "status": self.status,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+            "total": len(self.keys),
+            "completed": len(results),
+            "sent": sent,
+            "failed": failed,
+            "skipped": len(results) - sent - failed,
+            "results": results,
+        }
+
+
+class Dispatcher:
+    """Runs send batches off the script thread. One instance is shared per process,
+    so a batch keeps going across reruns and page reloads.
+    With an Outbox, each result is also written to its outbox row (see submit's outbox_ids).
+    on_job_done(job), if given, is called on the worker thread after each batch finishes."""
+
+    def __init__(self, max_batches=1, pool_size=DEFAULT_POOL_SIZE, send=send_batch, outbox=None, on_job_done=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_batches, thread_name_prefix="mail-dispatch")
+        self._pool_size = pool_size
+        self._send = send
+        self.outbox = outbox
+        self.on_job_done = on_job_done
+        self._jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, sender_email, sender_password, messages, label="", failed=None, skipped=None, outbox_ids=None):
+        """Queue (key, EmailMessage) pairs for sending and return the DispatchJob.
+        failed / skipped: {key: reason} for items not sent at all, reported with the job.
+        outbox_ids: {key: outbox row id} for messages recorded in the outbox."""
+        messages = list(messages)
+        failed = failed or {}
+        skipped = skipped or {}
+        with self._lock:
+            job = DispatchJob(next(self._ids), label, [key for key, _ in messages] + list(failed) + list(skipped))
+            self._jobs[job.id] = job
+            self._prune()
+        for key, reason in failed.items():
+            job.record(key, False, reason)
+        for key, reason in skipped.items():
+            job.record(key, None, reason)
+        self._executor.submit(self._run, job, sender_email, sender_password, messages, outbox_ids or {})
+        return job
+
+    def _run(self, job, sender_email, sender_password, messages, outbox_ids):
+        def on_result(key, ok, detail):
+            if self.outbox is not None and key in outbox_ids:
+                self.outbox.mark(outbox_ids[key], ok, None if ok else detail)
+            job.record(key, ok, detail)
+
+        job.status = "running"
+        try:
+            if messages:
+                self._send(sender_email, sender_password, messages, pool_size=self._pool_size, on_result=on_result)
+        except Exception as e:
+            job.error = str(e)
+        finally:
+            if self.outbox is not None:
+                # anything without a result stays pending in the outbox for a later resume
+                for key, row_id in outbox_ids.items():
+                    if key not in job.snapshot()["results"]:
+                        self.outbox.release(row_id)
+            job.finished = datetime.now()
+            job.status = "done"
+            if self.on_job_done is not None:
+                try:
+                    self.on_job_done(job)
+                except Exception:
+                    pass  # reporting must not affect the dispatcher
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, job_ids=None):
+        """Jobs (optionally only job_ids), newest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if job_ids is not None:
+            wanted = set(job_ids)
+            jobs = [job for job in jobs if job.id in wanted]
+        return jobs[::-1]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,178 @@
+# receivables/dunning.py
+"""Headless dunning run: send every due reminder from the stored ledger, e.g. nightly from cron.
+
+    python -m receivables.dunning [--data-dir data] [--dry-run] [--force] [--refresh-rate]
+
+Uses the same data as the dashboard: the last uploaded workbook (through its Parquet
+snapshot and saved column mapping) and, from the settings store (settings.db), the
+client emails, the saved USD rate (else the cached live rate) and the other currency
+rates. Every reminder goes through the shared outbox (outbox.db), where each row is
+claimed atomically before it is sent, so a client is not emailed twice for the same
+invoices on the same day, whether the reminder was sent from the UI or from here, even
+while both are sending.
+
+Prints one JSON summary on stdout. Exit status: 0 all sent (or nothing to send),
+1 some reminders failed, 2 the run could not start (no ledger, no credentials).
+Sender credentials come from S2_SENDER_EMAIL / S2_SENDER_PASSWORD, else the
+sender saved in the dashboard. Heavy dependencies are imported only after the arguments
+are parsed; Streamlit, plotly and requests are never imported (requests only with
+--refresh-rate).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_SETUP = 2
+
+
+class SetupError(Exception):
+    """The run cannot start (missing ledger or credentials)."""
+
+
+def sender_credentials(settings):
+    """(email, password) from the environment, else the saved sender; (None, None) if unset."""
+    from receivables.settings import SENDER
+
+    sender = os.environ.get("S2_SENDER_EMAIL")
+    password = os.environ.get("S2_SENDER_PASSWORD")
+    if sender and password:
+        return sender, password
+    saved = settings.get(SENDER) or {}
+    return saved.get("email"), saved.get("password")
+
+
+def current_rates(data_dir, settings, refresh=False):
+    """Currency -> ₹ rates: the saved rates over the defaults, USD as saved in the
+    dashboard, else the cached live rate."""
+    from receivables.core import DEFAULT_INR_RATES, rate_table
+    from receivables.rates import RateProvider
+    from receivables.settings import FX_RATES, USD_INR_RATE
+
+    rates = dict(DEFAULT_INR_RATES)
+    rates.update({code: float(v) for code, v in settings.get(FX_RATES, {}).items()})
+    saved_rate = settings.get(USD_INR_RATE)
+    if saved_rate is not None:
+        return rate_table(float(saved_rate), rates)
+    provider = RateProvider(os.path.join(data_dir, "usd_inr_live.json"))
+    if refresh:
+        provider.refresh()
+    return rate_table(provider.cached(), rates)
+
+
+def run(data_dir="data", dry_run=False, force=False, refresh_rate=False, pool_size=None):
+    """Send (or with dry_run, only list) every due reminder. Returns the summary dict."""
+    from receivables import core
+    from receivables.mailer import DEFAULT_POOL_SIZE, send_batch
+    from receivables.outbox import ALREADY_SENT, IN_FLIGHT, QUEUED, Outbox, invoice_set_hash
+    from receivables.reminders import due_invoice_ids
+    from receivables.settings import CLIENT_EMAILS, open_settings
+
+    started = time.perf_counter()
+    workbook = os.path.join(data_dir, "last_uploaded.xlsx")
+    if not os.path.exists(workbook):
+        raise SetupError(f"No ledger found at {workbook}; upload a workbook in the dashboard first.")
+    settings = open_settings(data_dir)
+    try:
+        sender, password = sender_credentials(settings)
+        rates = current_rates(data_dir, settings, refresh_rate)
+        client_emails = settings.get(CLIENT_EMAILS, {})
+    finally:
+        settings.close()
+    if not dry_run and not (sender and password):
+        raise SetupError("Sender credentials not set (S2_SENDER_EMAIL / S2_SENDER_PASSWORD or the dashboard's sender).")
+
+    ledger = core.load_ledger(
+        workbook,
+        snapshot_path=os.path.join(data_dir, "ledger.parquet"),
+        schema_path=os.path.join(data_dir, "schema.json"),
+    )
+    templates = core.ReminderTemplates(override_dir=os.path.join(data_dir, "templates"))
+    messages = templates.render_all(ledger, rates, client_emails.get("languages"))
+    reminders, failed = core.bulk_reminders(ledger, messages, sender or "", client_emails)
+
+    outbox_path = os.path.join(data_dir, "outbox.db")
+    if dry_run:
+        # a dry run leaves the outbox untouched; without the file nothing was queued or sent yet
+        outbox = Outbox(outbox_path, read_only=True) if os.path.exists(outbox_path) else None
+    else:
+        outbox = Outbox(outbox_path)
+    skipped, to_send, outbox_ids, sent = {}, [], {}, []
+    try:
+        for client, msg in reminders:
+            invoice_hash = invoice_set_hash(due_invoice_ids(ledger, client))
+            if dry_run:
+                row_id, outcome = outbox.peek(client, invoice_hash, force=force) if outbox is not None else (None, QUEUED)
+            else:
+                row_id, outcome = outbox.enqueue(client, invoice_hash, msg, force=force)
+            if outcome == ALREADY_SENT:
+                skipped[client] = f"Already sent today at {outbox.sent_at(row_id)[11:16]}"
+            elif outcome == IN_FLIGHT:
+                skipped[client] = "Already queued"
+            else:
+                to_send.append((client, msg))
+                outbox_ids[client] = row_id
+
+        if not dry_run and to_send:
+            def on_result(client, ok, detail):
+                outbox.mark(outbox_ids[client], ok, None if ok else detail)
+
+            results = send_batch(sender, password, to_send, pool_size=pool_size or DEFAULT_POOL_SIZE, on_result=on_result)
+            for client, _ in to_send:
+                ok, detail = results.get(client, (False, "Not attempted"))
+                if ok:
+                    sent.append(client)
+                else:
+                    failed[client] = detail
+                if client not in results:
+                    outbox.release(outbox_ids[client])
+    finally:
+        if outbox is not None:
+            outbox.close()
+
+    summary = {
+        "ok": not failed,
+        "dry_run": dry_run,
+        "date": date.today().isoformat(),
+        "ledger": {"rows": len(ledger), "digest": ledger.source_digest},
+        "usd_to_inr": rates["USD"],
+        "counts": {
+            "due": len(core.clients_with_dues(ledger)),
+            "sent": len(sent),
+            "failed": len(failed),
+            "skipped": len(skipped),
+        },
+        "sent": sent,
+        "failed": failed,
+        "skipped": skipped,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+    if dry_run:
+        summary["counts"]["would_send"] = len(to_send)
+        summary["would_send"] = [client for client, _ in to_send]
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m receivables.dunning", description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data", help="dashboard data folder (default: data)")
+    parser.add_argument("--dry-run", action="store_true", help="list the reminders that would be sent; send nothing")
+    parser.add_argument("--force", action="store_true", help="resend reminders already sent today")
+    parser.add_argument("--refresh-rate", action="store_true", help="fetch the live USD rate first (without a saved rate)")
+    parser.add_argument("--pool-size", type=int, help="parallel SMTP sessions")
+    args = parser.parse_args(argv)
+    try:
+        summary = run(args.data_dir, args.dry_run, args.force, args.refresh_rate, args.pool_size)
+    except SetupError as e:
+        print(json.dumps({"ok": False, "error": str(e)}))
+        return EXIT_SETUP
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return EXIT_OK if summary["ok"] else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
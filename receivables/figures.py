@@ -0,0 +1,42 @@
+# receivables/figures.py
+"""Cache of built chart figures, with the build time each reuse saved."""
+import threading
+import time
+
+from receivables.cache import LRUCache
+
+
+class FigureCache:
+    """LRU cache of chart figures keyed by whatever the figure depends on
+    (data version, filters, theme). Figures are shared read-only between reruns
+    and sessions; a hit adds the figure's original build time to `saved_seconds`."""
+
+    def __init__(self, maxsize=32):
+        self._entries = LRUCache(maxsize=maxsize)
+        self.built_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """Cached figure for key, calling build() on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            figure, cost = entry
+            with self._lock:
+                self.saved_seconds += cost
+            return figure
+        start = time.perf_counter()
+        figure = build()
+        cost = time.perf_counter() - start
+        self._entries.put(key, (figure, cost))
+        with self._lock:
+            self.built_seconds += cost
+        return figure
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        stats = self._entries.stats()
+        stats.update(built_seconds=self.built_seconds, saved_seconds=self.saved_seconds)
+        return stats
@@ -0,0 +1,214 @@
+# receivables/ingest.py
+"""Streaming ingestion: parse a workbook chunk by chunk straight into a snapshot file.
+
+Only one chunk of Python objects is alive at a time; each chunk is normalized and
+appended to the Parquet snapshot as its own row group, and the finished snapshot is
+then memory-mapped back as the Ledger.
+
+Multi-sheet / multi-workbook uploads are parsed in parallel on a process pool and
+merged into one ledger with a Source column (parse_sources, merge_sources).
+
+Uploads arrive in memory: `path` arguments here also accept a binary file object such
+as io.BytesIO(upload_bytes), and persist_upload writes the original bytes to disk on a
+background thread while they are parsed.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from openpyxl import load_workbook
+
+from receivables.cache import remember_digest
+from receivables.ledger import build_ledger, normalize_ledger
+from receivables.schema import detect_roles
+from receivables.snapshot import SchemaDrift, SnapshotWriter, read_snapshot, write_snapshot
+from receivables.workbook import iter_excel_chunks, read_excel_with_display_values
+
+# transient memory allowed per chunk (row lists, values, display strings, parsed columns)
+DEFAULT_MEMORY_BUDGET = 32 * 1024 * 1024
+# transient bytes per row relative to the chunk frame's deep memory_usage (measured)
+_OVERHEAD_FACTOR = 6
+FIRST_CHUNK_ROWS = 5000
+MIN_CHUNK_ROWS = 1000
+MAX_CHUNK_ROWS = 50000
+# uploads larger than this are ingested in streaming mode
+STREAMING_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+
+class _ChunkSizer:
+    """Chunk size that keeps a chunk's objects under the memory budget, re-estimated per chunk."""
+
+    def __init__(self, memory_budget):
+        self.memory_budget = memory_budget
+        self.rows = FIRST_CHUNK_ROWS
+
+    def __call__(self):
+        return self.rows
+
+    def observe(self, df):
+        if len(df) == 0:
+            return
+        per_row = _OVERHEAD_FACTOR * df.memory_usage(deep=True, index=False).sum() / len(df)
+        self.rows = int(min(MAX_CHUNK_ROWS, max(MIN_CHUNK_ROWS, self.memory_budget // max(per_row, 1))))
+
+
+def stream_ingest(path, snapshot_path, source_digest=None, roles_for=None, sheet_name=None,
+                  memory_budget=DEFAULT_MEMORY_BUDGET, on_progress=None, load=True):
+    """Parse path into a snapshot at snapshot_path and return the Ledger read back from it
+    (or None with load=False, when only the snapshot file is wanted).
+
+    roles_for(first_chunk_df) -> roles picks the column roles (default: header detection).
+    on_progress(rows_read, rows_estimate) reports progress after each chunk.
+    A raw column whose type changes after the first chunk restarts the pass with that
+    column stored as the later type (if it was empty so far) or as text.
+    """
+    raw_types = {}
+    while True:
+        try:
+            return _ingest(path, snapshot_path, source_digest, roles_for, sheet_name, memory_budget, on_progress, raw_types, load)
+        except SchemaDrift as drift:
+            if pa.types.is_null(drift.fixed_type):
+                raw_types[drift.column] = drift.chunk_type
+            else:
+                raw_types[drift.column] = pa.string()
+
+
+def _ingest(path, snapshot_path, source_digest, roles_for, sheet_name, memory_budget, on_progress, raw_types, load):
+    sizer = _ChunkSizer(memory_budget)
+    writer = None
+    try:
+        for df, display_map in iter_excel_chunks(path, sheet_name, sizer, on_progress):
+            if writer is None:
+                roles = roles_for(df) if roles_for is not None else detect_roles(df.columns)
+                writer = SnapshotWriter(snapshot_path, roles, source_digest, raw_types)
+            writer.write(df, display_map, normalize_ledger(df, roles))
+            sizer.observe(df)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is None:
+        # empty sheet
+        ledger = build_ledger(pd.DataFrame(), {}, source_digest)
+        write_snapshot(snapshot_path, ledger)
+        return ledger if load else None
+    writer.close()
+    return read_snapshot(snapshot_path) if load else None
+
+
+# --- MULTI-SHEET / MULTI-WORKBOOK INGESTION ---
+# column added to merged ledgers: which workbook and sheet each row came from
+SOURCE_COLUMN = "Source"
+
+
+def make_process_pool(max_workers=None):
+    """Process pool for parse_sources(). Uses 'spawn' so workers never inherit the
+    parent's threads (Streamlit server, dispatcher) and behave the same on Windows."""
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def persist_upload(path, data, digest=None):
+    """Write an upload's bytes to path verbatim on a background thread.
+
+    The file is replaced atomically, so readers never see a partial workbook. With digest
+    (bytes_digest(data)) the written file's digest is recorded, not re-hashed from disk.
+    Returns a Future whose result() is path once the file is in place (or raises the write error).
+    """
+    written = Future()
+
+    def write():
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            if digest:
+                remember_digest(path, digest)
+        except BaseException as e:
+            written.set_exception(e)
+        else:
+            written.set_result(path)
+
+    threading.Thread(target=write, name="persist-upload").start()
+    return written
+
+
+def list_sheets(path):
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def looks_like_ledger(df):
+    """True if df has a client column and at least one amount column."""
+    roles = detect_roles(df.columns)
+    return roles["client"] is not None and any(roles[r] is not None for r in ("amount", "due", "paid"))
+
+
+def _read_source(path, sheet_name):
+    # runs in a worker process
+    return read_excel_with_display_values(path, sheet_name)
+
+
+def parse_sources(sources, executor=None):
+    """Parse (path, sheet_name) sources, concurrently when there is more than one.
+
+    Returns a list aligned with sources of (df, display_map, error); error is None on success.
+    Pass a long-lived executor (make_process_pool) to avoid starting workers per call.
+    """
+    sources = list(sources)
+    if len(sources) <= 1:
+        results = []
+        for path, sheet_name in sources:
+            try:
+                results.append(_read_source(path, sheet_name) + (None,))
+            except Exception as e:
+                results.append((None, None, str(e)))
+        return results
+
+    own_executor = executor is None
+    executor = executor or make_process_pool(min(len(sources), os.cpu_count() or 1))
+    try:
+        futures = [executor.submit(_read_source, path, sheet_name) for path, sheet_name in sources]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result() + (None,))
+            except Exception as e:
+                results.append((None, None, str(e)))
+        return results
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def merge_sources(parts):
+    """Merge (label, df, display_map) parts into one (df, display_map).
+    Columns are matched by name (in first-seen order); each row's label goes in SOURCE_COLUMN."""
+    columns = []
+    for _, df, _ in parts:
+        columns.extend(col for col in df.columns if col not in columns and col != SOURCE_COLUMN)
+    frames = []
+    display_map = {col: [] for col in columns}
+    labels = []
+    for label, df, part_display in parts:
+        frames.append(df.reindex(columns=columns).astype(object))
+        for col in columns:
+            display_map[col].extend(part_display.get(col) or [None] * len(df))
+        labels.extend([label] * len(df))
+    if frames:
+        merged = pd.concat(frames, ignore_index=True)
+    else:
+        merged = pd.DataFrame(columns=columns, dtype=object)
+    merged[SOURCE_COLUMN] = np.array(labels, dtype=object)
+    display_map[SOURCE_COLUMN] = labels
+    return merged, display_map
@@ -0,0 +1,191 @@
+# receivables/ledger.py
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from receivables.cache import LRUCache
+from receivables.currency import CURRENCY_CODES, parse_currency_series, to_inr
+from receivables.schema import detect_roles
+
+PARSED_COLUMNS = ("currency", "amount", "due", "paid", "date", "is_paid", "is_unpaid")
+
+# role columns never made categorical (their typed values live in `parsed`)
+NON_CATEGORY_ROLES = ("invoice", "amount", "due", "paid", "date")
+# text columns with at most this share of distinct values are held as categoricals
+CATEGORY_MAX_UNIQUE_SHARE = 0.5
+
+
+class Ledger:
+    """A loaded receivables sheet: raw frame, display strings, column roles and typed columns.
+
+    `df` holds the cells as read in compact dtypes: repeated text columns (client,
+    currency, service, email…) as categoricals, all-number and all-date columns as
+    float64/int64/datetime64, see compact_frame. `parsed` is aligned with `df`
+    by index and holds:
+      currency — ISO code per row, categorical (Currency column wins over the amount's symbol)
+      amount, due, paid — floats parsed from the matching columns (NaN if the role is missing)
+      date — datetime64 invoice date
+      is_paid, is_unpaid — the dashboard's paid/pending split (a row can be neither)
+    Everything downstream reads these typed columns; nothing re-parses cells after load.
+
+    Memory per 100k invoices (benchmarks/bench_pipeline.py, 9-column export, 2,000 clients):
+    df 13.8 MB (46.5 MB as boxed objects), parsed 3.3 MB (9.0 MB with text currency codes);
+    display_map keeps its strings as read (~63 MB).
+    """
+
+    def __init__(self, df, display_map, roles, parsed, source_digest=None):
+        self.df = df
+        self.display_map = display_map
+        self.roles = roles
+        self.parsed = parsed
+        self.source_digest = source_digest
+        self._inr_cache = LRUCache(maxsize=8)
+        self._ageing_cache = LRUCache(maxsize=4)
+        self._client_index = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def due_role(self):
+        """Parsed column that decides whether an invoice still needs a reminder."""
+        return "due" if self.roles.get("due") is not None else "amount"
+
+    @property
+    def client_index(self):
+        """Per-client row positions and aggregates, built on first use."""
+        if self._client_index is None:
+            from receivables.clients import ClientIndex
+
+            with self._lock:
+                if self._client_index is None:
+                    self._client_index = ClientIndex(self)
+        return self._client_index
+
+    def ageing(self, now=None, edges=None):
+        """Ageing (days pending + buckets per row) as of now's date; memoized per day and edges."""
+        from receivables.ageing import DEFAULT_BUCKET_EDGES, Ageing
+
+        edges = tuple(edges or DEFAULT_BUCKET_EDGES)
+        day = (now or datetime.now()).date()
+        return self._ageing_cache.get_or_compute((day, edges), lambda: Ageing(self, day, edges))
+
+    def inr_values(self, column, rates):
+        """parsed[column] converted to INR for a currency -> ₹ rate table.
+        Memoized per rate table, so reruns only recompute when the rates change."""
+        key = (column, tuple(sorted(rates.items())))
+        return self._inr_cache.get_or_compute(
+            key, lambda: to_inr(self.parsed[column], self.parsed["currency"], rates)
+        )
+
+
+def raw_column(df, col):
+    """df[col] with its cells as read (object values for a categorical column)."""
+    values = df[col]
+    return values.astype(object) if isinstance(values.dtype, pd.CategoricalDtype) else values
+
+
+def _compact_column(values, categorize=True):
+    """values in a compact dtype, or None if it has none or is already compact:
+    floats / integers / dates as float64 / int64 / datetime64 (as a snapshot reads them
+    back), repeated text as a categorical with sorted categories."""
+    if values.dtype == object and len(values):
+        kind = pd.api.types.infer_dtype(values, skipna=True)
+        if kind in ("floating", "mixed-integer-float"):
+            return values.astype(float)
+        if kind == "integer" and values.notna().all():
+            return values.astype("int64")
+        if kind == "datetime":
+            return pd.to_datetime(values)
+    if values.dtype.kind == "M" and values.dtype != "datetime64[ns]":
+        # streamed snapshots store cell datetimes at Arrow's microsecond unit
+        return values.astype("datetime64[ns]")
+    if not categorize:
+        return None
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        if categories.is_monotonic_increasing:
+            return None
+        # e.g. merged from a chunked snapshot: ClientIndex relies on sorted categories
+        return values.cat.reorder_categories(categories.sort_values())
+    if values.dtype != object or not len(values):
+        return None
+    categorical = pd.Categorical(values)
+    categories = categorical.categories
+    if len(categories) > CATEGORY_MAX_UNIQUE_SHARE * len(values) or categories.inferred_type != "string":
+        return None
+    return pd.Series(categorical, index=values.index, name=values.name)
+
+
+def compact_frame(df, roles):
+    """df with typed columns instead of boxed Python objects where that loses nothing:
+    one code per row for repeated text, native floats and dates. Mixed-type columns are
+    left unchanged; NON_CATEGORY_ROLES columns are never made categorical."""
+    no_category = {roles.get(role) for role in NON_CATEGORY_ROLES}
+    compacted = {}
+    for i, col in enumerate(df.columns):
+        values = _compact_column(df.iloc[:, i], categorize=col not in no_category)
+        if values is not None:
+            compacted[i] = values
+    if not compacted:
+        return df
+    df = df.copy(deep=False)
+    for i, values in compacted.items():
+        df.isetitem(i, values)
+    return df
+
+
+def normalize_ledger(df, roles):
+    """Build the typed `parsed` frame for df from its column roles."""
+    parsed = pd.DataFrame(index=df.index)
+    missing = pd.Series(float("nan"), index=df.index)
+    detected = pd.Series("INR", index=df.index)
+
+    for role in ("paid", "due", "amount"):
+        col = roles.get(role)
+        if col is not None:
+            # each amount column is parsed exactly once per load
+            result = parse_currency_series(raw_column(df, col))
+            parsed[role] = result["amount"]
+            detected = result["currency"]
+        else:
+            parsed[role] = missing
+
+    currency_col = roles.get("currency")
+    if currency_col is not None:
+        currency = raw_column(df, currency_col).map(CURRENCY_CODES).fillna(detected)
+    else:
+        currency = detected
+    parsed["currency"] = currency.astype("category")
+
+    date_col = roles.get("date")
+    if date_col is not None:
+        parsed["date"] = pd.to_datetime(raw_column(df, date_col), errors="coerce")
+    else:
+        parsed["date"] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    parsed["is_paid"], parsed["is_unpaid"] = split_paid_unpaid(df, roles)
+    return parsed[list(PARSED_COLUMNS)]
+
+
+def split_paid_unpaid(df, roles):
+    """(is_paid, is_unpaid) boolean Series.
+    A paid column decides by paid > 0 / == 0; otherwise a column named 'Due'
+    decides by due == 0 / > 0; with neither, every row counts as pending."""
+    paid_col = roles.get("paid")
+    due_col = roles.get("due")
+    if paid_col is not None:
+        paid = pd.to_numeric(raw_column(df, paid_col), errors="coerce").fillna(0)
+        return paid > 0, paid == 0
+    if due_col is not None and "due" in [str(col).lower() for col in df.columns]:
+        due = pd.to_numeric(raw_column(df, due_col), errors="coerce").fillna(0)
+        return due == 0, due > 0
+    return pd.Series(False, index=df.index), pd.Series(True, index=df.index)
+
+
+def build_ledger(df, display_map, source_digest=None, roles=None):
+    """Detect roles (unless given) and normalize df into a Ledger with a compacted frame."""
+    if roles is None:
+        roles = detect_roles(df.columns)
+    return Ledger(compact_frame(df, roles), display_map, roles, normalize_ledger(df, roles), source_digest)
@@ -0,0 +1,135 @@
+# receivables/mailer.py
+"""SMTP sending over reusable, self-reconnecting sessions."""
+import queue
+import smtplib
+import ssl
+import threading
+from email.message import EmailMessage
+
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+# connections kept open by a bulk send; Gmail throttles many parallel logins
+DEFAULT_POOL_SIZE = 2
+
+# errors that mean the connection is gone, not that the message was rejected
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError, ssl.SSLError)
+
+
+def build_html_message(sender_email, to_email, subject, html_body, cc=None):
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = sender_email
+    msg["To"] = to_email
+    if cc:
+        msg["Cc"] = cc
+    msg.add_alternative(html_body, subtype="html")
+    return msg
+
+
+class SMTPSession:
+    """One authenticated SMTP_SSL connection, opened on first send and reused.
+    A dropped connection is reopened (and logged into) up to `retries` times per message."""
+
+    def __init__(self, sender_email, sender_password, host=SMTP_HOST, port=SMTP_PORT, timeout=30, retries=1):
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.connects = 0
+        self.sent = 0
+        self._smtp = None
+
+    def _connect(self):
+        smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.login(self.sender_email, self.sender_password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.connects += 1
+
+    def _drop(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def send(self, msg):
+        for attempt in range(self.retries + 1):
+            if self._smtp is None:
+                self._connect()
+            try:
+                self._smtp.send_message(msg)
+                self.sent += 1
+                return
+            except _CONNECTION_ERRORS:
+                self._drop()
+                if attempt == self.retries:
+                    raise
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+        self._drop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def send_batch(sender_email, sender_password, messages, pool_size=DEFAULT_POOL_SIZE, on_result=None, session_factory=None):
+    """Send (key, EmailMessage) pairs over at most pool_size reused sessions.
+
+    Returns {key: (ok, detail)}. on_result(key, ok, detail) is called from the
+    worker threads as each message finishes. A login failure stops the batch:
+    the remaining messages are reported as not sent instead of retrying the login.
+    """
+    session_factory = session_factory or (lambda: SMTPSession(sender_email, sender_password))
+    pending = queue.Queue()
+    for item in messages:
+        pending.put(item)
+    results = {}
+    lock = threading.Lock()
+    login_failed = threading.Event()
+
+    def record(key, ok, detail):
+        with lock:
+            results[key] = (ok, detail)
+        if on_result is not None:
+            on_result(key, ok, detail)
+
+    def worker():
+        with session_factory() as session:
+            while True:
+                try:
+                    key, msg = pending.get_nowait()
+                except queue.Empty:
+                    return
+                if login_failed.is_set():
+                    record(key, False, "Not sent: SMTP login failed")
+                    continue
+                try:
+                    session.send(msg)
+                    record(key, True, "sent")
+                except smtplib.SMTPAuthenticationError as e:
+                    login_failed.set()
+                    record(key, False, f"SMTP login failed: {e}")
+                except Exception as e:
+                    record(key, False, str(e))
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(pool_size, pending.qsize())))]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return results
@@ -0,0 +1,207 @@
+# receivables/outbox.py
+"""Durable outbox (SQLite) recording every reminder, so sends are idempotent and resumable.
+
+A reminder is identified by (client, invoice set, day): the same client with the same
+due invoices is emailed at most once per day. Rows move pending -> sending -> sent | failed.
+Taking a row into 'sending' is a conditional UPDATE, so of several processes sharing the
+file (server processes, the dunning runner) exactly one gets each row. The claim is a
+lease: a row left 'sending' by a crashed process is picked up again once claimed_at is
+older than the lease, as are pending and failed rows, on the next send of the same
+reminder. Resume only takes the day's rows: an older message was built from amounts that
+may since have changed or been paid.
+Delivery is at-least-once: a crash between the SMTP send and mark() resends that message.
+"""
+import email
+import email.policy
+import hashlib
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idem_key TEXT NOT NULL UNIQUE,
+    client TEXT NOT NULL,
+    invoice_hash TEXT NOT NULL,
+    day TEXT NOT NULL,
+    to_email TEXT,
+    cc_email TEXT,
+    subject TEXT,
+    message BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    sent_at TEXT,
+    claimed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status);
+CREATE INDEX IF NOT EXISTS outbox_day ON outbox (day);
+"""
+
+# enqueue() outcomes
+QUEUED = "queued"            # new (or retried/resumed) row, claimed by the caller; send it
+IN_FLIGHT = "in_flight"      # claimed by another batch or process; skip
+ALREADY_SENT = "already_sent"
+
+# how long a 'sending' claim holds before another process may take the row over
+DEFAULT_LEASE_SECONDS = 30 * 60
+
+# rows a new claim may take: unsent, or abandoned mid-send (lease expired)
+_CLAIMABLE = "(status IN ('pending', 'failed') OR (status = 'sending' AND claimed_at < ?))"
+
+
+def invoice_set_hash(invoice_ids):
+    """Order-independent hash of a client's due invoice identifiers."""
+    joined = "\n".join(sorted(str(i) for i in invoice_ids))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def _header(msg, name):
+    value = msg[name]
+    return None if value is None else str(value)
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class Outbox:
+    """Outbox table in a SQLite file. One instance per process; safe to share between threads.
+    Several processes may open the same file; claims are settled in SQLite, not in memory.
+    read_only opens an existing file without creating or changing it (for peek, e.g. a dry run)."""
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS, read_only=False):
+        self.path = path
+        self.lease = timedelta(seconds=lease_seconds)
+        if read_only:
+            uri = f"{Path(path).absolute().as_uri()}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        if read_only:
+            return
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+            if "claimed_at" not in columns:
+                # outbox files from before claims were leased
+                self._conn.execute("ALTER TABLE outbox ADD COLUMN claimed_at TEXT")
+
+    def _lease_cutoff(self):
+        # claims taken before this have expired
+        return (datetime.now() - self.lease).isoformat(timespec="seconds")
+
+    def enqueue(self, client, invoice_hash, msg, day=None, force=False):
+        """Record msg for (client, invoice_hash, day). Returns (row_id, outcome).
+        force re-queues a reminder that was already sent today."""
+        day = day or date.today().isoformat()
+        key = f"{client}|{invoice_hash}|{day}"
+        now = _now()
+        headers = (_header(msg, "To"), _header(msg, "Cc"), _header(msg, "Subject"))
+        with self._lock, self._conn:
+            # a new row is created already claimed; of two racing inserts only one succeeds
+            cur = self._conn.execute(
+                "INSERT INTO outbox (idem_key, client, invoice_hash, day, to_email, cc_email, subject,"
+                " message, status, created_at, updated_at, claimed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'sending', ?, ?, ?) ON CONFLICT(idem_key) DO NOTHING",
+                (key, str(client), invoice_hash, day, *headers, msg.as_bytes(), now, now, now),
+            )
+            if cur.rowcount == 1:
+                return cur.lastrowid, QUEUED
+            claimable = f"({_CLAIMABLE} OR status = 'sent')" if force else _CLAIMABLE
+            cur = self._conn.execute(
+                "UPDATE outbox SET status = 'sending', claimed_at = ?, to_email = ?, cc_email = ?, subject = ?,"
+                f" message = ?, updated_at = ? WHERE idem_key = ? AND {claimable}",
+                (now, *headers, msg.as_bytes(), now, key, self._lease_cutoff()),
+            )
+            row = self._conn.execute("SELECT id, status FROM outbox WHERE idem_key = ?", (key,)).fetchone()
+        if cur.rowcount == 1:
+            return row["id"], QUEUED
+        return row["id"], ALREADY_SENT if row["status"] == "sent" else IN_FLIGHT
+
+    def peek(self, client, invoice_hash, day=None, force=False):
+        """(row_id, outcome) enqueue() would return right now, without writing anything;
+        row_id is None for a reminder that was never queued."""
+        key = f"{client}|{invoice_hash}|{day or date.today().isoformat()}"
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT id, status, {_CLAIMABLE} AS claimable FROM outbox WHERE idem_key = ?",
+                (self._lease_cutoff(), key),
+            ).fetchone()
+        if row is None:
+            return None, QUEUED
+        if row["claimable"] or (force and row["status"] == "sent"):
+            return row["id"], QUEUED
+        return row["id"], ALREADY_SENT if row["status"] == "sent" else IN_FLIGHT
+
+    def claim_unfinished(self, day=None):
+        """Claim one day's (default today) unsent rows nobody is sending: pending or failed, or
+        left 'sending' past the lease by an interrupted batch. Returns [(row_id, client,
+        EmailMessage)] for the rows this call won; rows claimed concurrently by another
+        process are left to it."""
+        day = day or date.today().isoformat()
+        now = _now()
+        with self._lock:
+            cutoff = self._lease_cutoff()
+            rows = self._conn.execute(
+                f"SELECT id, client, message FROM outbox WHERE day = ? AND {_CLAIMABLE} ORDER BY id", (day, cutoff)
+            ).fetchall()
+            claimed = []
+            for row in rows:
+                with self._conn:
+                    cur = self._conn.execute(
+                        f"UPDATE outbox SET status = 'sending', claimed_at = ?, updated_at = ? WHERE id = ? AND {_CLAIMABLE}",
+                        (now, now, row["id"], cutoff),
+                    )
+                if cur.rowcount == 1:
+                    claimed.append((row["id"], row["client"], email.message_from_bytes(row["message"], policy=email.policy.default)))
+        return claimed
+
+    def unfinished_count(self, day=None):
+        """Rows claim_unfinished(day) would currently take."""
+        day = day or date.today().isoformat()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT COUNT(*) AS n FROM outbox WHERE day = ? AND {_CLAIMABLE}", (day, self._lease_cutoff())
+            ).fetchone()
+        return row["n"]
+
+    def mark(self, row_id, ok, detail=None):
+        """Record a send attempt's outcome."""
+        now = _now()
+        with self._lock, self._conn:
+            if ok:
+                self._conn.execute(
+                    "UPDATE outbox SET status = 'sent', attempts = attempts + 1, last_error = NULL,"
+                    " sent_at = ?, updated_at = ?, claimed_at = NULL WHERE id = ?",
+                    (now, now, row_id),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE outbox SET status = 'failed', attempts = attempts + 1, last_error = ?,"
+                    " updated_at = ?, claimed_at = NULL WHERE id = ?",
+                    (detail, now, row_id),
+                )
+
+    def release(self, row_id):
+        """Give up a claim without recording an attempt (the row goes back to pending)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'pending', claimed_at = NULL, updated_at = ? WHERE id = ? AND status = 'sending'",
+                (_now(), row_id),
+            )
+
+    def sent_at(self, row_id):
+        with self._lock:
+            row = self._conn.execute("SELECT sent_at FROM outbox WHERE id = ?", (row_id,)).fetchone()
+        return row["sent_at"] if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
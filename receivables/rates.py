@@ -0,0 +1,115 @@
+# receivables/rates.py
+"""Live USD -> INR rate with a TTL'd on-disk cache and background refresh.
+
+Reads never wait on the network: they return the cached rate (or the default)
+and, when it is stale, start a refresh on a daemon thread. The fetch function is
+pluggable, so a local stub can replace the HTTP endpoint.
+"""
+import json
+import os
+import threading
+import time
+
+EXCHANGE_RATE_URL = "https://api.exchangerate.host/latest?base=USD&symbols=INR"
+DEFAULT_USD_TO_INR = 83.0
+DEFAULT_RATE_TTL = 6 * 60 * 60  # seconds
+# wait this long after a failed fetch before trying again
+RETRY_AFTER = 5 * 60
+
+
+def fetch_usd_to_inr(url=EXCHANGE_RATE_URL, timeout=5):
+    """Fetch the live USD->INR rate (exchangerate.host). Raises on any failure."""
+    import requests  # only needed once a refresh actually runs
+
+    data = requests.get(url, timeout=timeout).json()
+    return float(data["rates"]["INR"])
+
+
+class RateProvider:
+    """USD->INR rate shared by all sessions, cached in a JSON file for `ttl` seconds.
+    on_fetch(seconds, ok), if given, is called after every fetch attempt."""
+
+    def __init__(self, cache_path, fetch=fetch_usd_to_inr, ttl=DEFAULT_RATE_TTL, default=DEFAULT_USD_TO_INR, on_fetch=None):
+        self.cache_path = cache_path
+        self.fetch = fetch
+        self.ttl = ttl
+        self.default = default
+        self.on_fetch = on_fetch
+        self.last_error = None
+        self._rate = None
+        self._fetched_at = None
+        self._last_attempt = 0.0
+        self._refresh_thread = None
+        self._lock = threading.Lock()
+        self._load_cache()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            self._rate = float(cached["rate"])
+            self._fetched_at = float(cached["fetched_at"])
+        except Exception:
+            pass
+
+    def _save_cache(self):
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"rate": self._rate, "fetched_at": self._fetched_at}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    @property
+    def fetched_at(self):
+        """Epoch seconds of the cached live rate, or None if there is none."""
+        return self._fetched_at
+
+    @property
+    def is_stale(self):
+        return self._fetched_at is None or time.time() - self._fetched_at > self.ttl
+
+    def current(self):
+        """Cached live rate (or the default), starting a background refresh if it is stale."""
+        if self.is_stale:
+            self.refresh_async()
+        return self.cached()
+
+    def cached(self):
+        """Cached live rate (or the default) without starting a refresh."""
+        return self._rate if self._rate is not None else self.default
+
+    def refresh(self):
+        """Fetch now (blocking) and update the cache. Returns True on success."""
+        self._last_attempt = time.time()
+        start = time.perf_counter()
+        try:
+            rate = float(self.fetch())
+        except Exception as e:
+            self.last_error = str(e)
+            self._report_fetch(start, False)
+            return False
+        self._report_fetch(start, True)
+        with self._lock:
+            self._rate, self._fetched_at, self.last_error = rate, time.time(), None
+            try:
+                self._save_cache()
+            except OSError:
+                pass  # keep the in-memory rate
+        return True
+
+    def _report_fetch(self, start, ok):
+        if self.on_fetch is not None:
+            try:
+                self.on_fetch(time.perf_counter() - start, ok)
+            except Exception:
+                pass
+
+    def refresh_async(self):
+        """Start a refresh on a daemon thread unless one is running or one failed recently."""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            if time.time() - self._last_attempt < RETRY_AFTER:
+                return
+            self._last_attempt = time.time()
+            self._refresh_thread = threading.Thread(target=self.refresh, name="rate-refresh", daemon=True)
+            self._refresh_thread.start()
@@ -0,0 +1,186 @@
+# receivables/reminders.py
+"""Payment-reminder emails built from a Ledger (subject, HTML body, recipients)."""
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from receivables.cache import LRUCache
+
+# built-in templates; see ReminderTemplates for per-client / per-language variants
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "email_templates")
+
+
+def reminder_subject(client):
+    return f"{client} - Pending Invoice Payment | S2 Integrators Pvt Ltd"
+
+
+def reminder_tables(ledger, rates, clients=None, now=None):
+    """Per-client template context for reminders, computed in one pass over the due rows.
+
+    Returns {client: {"invoices": [...], "num_due", "currency", "total"}}. Each invoice
+    has invoice, currency, amount, date and days_pending. The total is in the first due
+    invoice's currency, converting the others via the ₹ rate table.
+    """
+    df = ledger.df
+    index = ledger.client_index
+    clients = index.clients if clients is None else clients
+    invoice_col = ledger.roles.get("invoice")
+    currency_col = ledger.roles.get("currency")
+    has_currency = currency_col is not None
+
+    codes = ledger.parsed["currency"].to_numpy()
+    if ledger.roles.get("amount") is not None:
+        amounts = ledger.parsed["amount"].to_numpy()
+    else:
+        amounts = np.zeros(len(df))
+    date_text = ledger.parsed["date"].dt.strftime("%Y-%m-%d").fillna("-").to_numpy()
+    days = pd.Series(ledger.ageing(now).days)
+    days_text = days.astype("Int64").astype(object).where(days.notna(), "-").to_numpy()
+    invoice_values = df[invoice_col].to_numpy() if invoice_col else None
+    currency_values = df[currency_col].to_numpy() if has_currency else None
+
+    tables = {}
+    for client in clients:
+        positions = index.due_positions(client)
+        if len(positions):
+            first_code = codes[positions[0]]
+            first_currency = currency_values[positions[0]] if has_currency else "INR"
+        else:
+            first_code = first_currency = "INR"
+        row_codes = codes[positions]
+        factors = np.array([rates.get(code, 1.0) for code in row_codes]) / rates.get(first_code, 1.0)
+        # only rows in another currency are converted, so same-currency amounts stay exact
+        converted = np.where(row_codes != first_code, amounts[positions] * factors, amounts[positions])
+        invoices = [
+            {
+                "invoice": invoice_values[p] if invoice_col else "-",
+                "currency": currency_values[p] if has_currency else first_currency,
+                "amount": amt,
+                "date": date_text[p],
+                "days_pending": days_text[p],
+            }
+            for p, amt in zip(positions, converted)
+        ]
+        tables[client] = {
+            "invoices": invoices,
+            "num_due": len(invoices),
+            "currency": first_currency,
+            "total": sum(converted.tolist(), 0.0),
+        }
+    return tables
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")
+
+
+class ReminderTemplates:
+    """Precompiled Jinja2 reminder templates.
+
+    Templates are looked up in override_dir (e.g. data/templates) before the built-in
+    ones, most specific first: reminder.<client>.html, reminder.<language>.html,
+    reminder.html (client is slugified: 'Titan Co.' -> 'titan-co').
+    Jinja keeps compiled templates; render_all() also memoizes its output per ledger,
+    rate table, day and template version, and re-renders only changed clients after an upload.
+    """
+
+    def __init__(self, override_dir=None):
+        self.search_path = [d for d in (override_dir, TEMPLATE_DIR) if d]
+        self.env = Environment(
+            loader=FileSystemLoader(self.search_path),
+            autoescape=select_autoescape(["html"]),
+            keep_trailing_newline=True,
+            auto_reload=True,
+        )
+        self.env.filters["money"] = lambda value: f"{value:,.2f}"
+        self._rendered = LRUCache(maxsize=4)
+
+    def template_for(self, client=None, language=None):
+        names = []
+        if client is not None:
+            names.append(f"reminder.{_slug(client)}.html")
+        if language:
+            names.append(f"reminder.{_slug(language)}.html")
+        names.append("reminder.html")
+        return self.env.select_template(names)
+
+    def render(self, client, table, language=None):
+        return self.template_for(client, language).render(client=client, **table)
+
+    def render_batch(self, tables, languages=None):
+        """{client: html} for precomputed reminder_tables(); languages maps client -> language."""
+        languages = languages or {}
+        return {client: self.render(client, table, languages.get(client)) for client, table in tables.items()}
+
+    def _version(self):
+        """Changes whenever a template file is added, removed or edited."""
+        stamps = []
+        for folder in self.search_path:
+            if os.path.isdir(folder):
+                for entry in os.scandir(folder):
+                    stamps.append((entry.path, entry.stat().st_mtime_ns))
+        return tuple(sorted(stamps))
+
+    def render_all(self, ledger, rates, languages=None, now=None, diff=None):
+        """Every client's reminder for ledger, rendered in one batch and memoized.
+        With a LedgerDiff from a previously rendered ledger (same roles, rates, day, languages
+        and templates), only the affected clients are re-rendered; the rest are reused from
+        that ledger's batch. Batches are cached by content, so sessions share them."""
+        now = now or datetime.now()
+        context = (
+            tuple(sorted(ledger.roles.items(), key=lambda item: item[0])),
+            tuple(sorted(rates.items())), now.date(), tuple(sorted((languages or {}).items())), self._version(),
+        )
+
+        def compute():
+            clients = ledger.client_index.clients
+            previous = self._rendered.get((diff.old_digest,) + context) if diff is not None else None
+            if previous is not None:
+                stale = [c for c in clients if c in diff.affected_clients or c not in previous]
+                messages = self.render_batch(reminder_tables(ledger, rates, stale, now), languages)
+                return {c: messages[c] if c in messages else previous[c] for c in clients}
+            return self.render_batch(reminder_tables(ledger, rates, now=now), languages)
+
+        return self._rendered.get_or_compute((ledger.source_digest,) + context, compute)
+
+
+def _first_value(ledger, client, role):
+    col = ledger.roles.get(role)
+    if col is None:
+        return None
+    try:
+        value = ledger.df[col].iloc[ledger.client_index.positions(client)[0]]
+    except Exception:
+        return None
+    return value if isinstance(value, str) and value.strip() else None
+
+
+def reminder_recipients(ledger, client, client_emails=None):
+    """(to, cc) for a client: the saved client-email config first, then the sheet's mail columns."""
+    client_emails = client_emails or {}
+    to_email = client_emails.get("clients", {}).get(client, None)
+    cc_email = client_emails.get("cc_email", None)
+    if not to_email:
+        to_email = _first_value(ledger, client, "client_mail")
+    if not cc_email:
+        cc_email = _first_value(ledger, client, "cc_mail")
+    return to_email, cc_email
+
+
+def due_invoice_ids(ledger, client):
+    """Identifiers of a client's due invoices (invoice numbers, else row positions)."""
+    positions = ledger.client_index.due_positions(client)
+    invoice_col = ledger.roles.get("invoice")
+    if invoice_col is None:
+        return [int(p) for p in positions]
+    return ledger.df[invoice_col].iloc[positions].tolist()
+
+
+def clients_with_dues(ledger):
+    """Clients with at least one due invoice, in client order."""
+    aggregates = ledger.client_index.aggregates
+    return list(aggregates.index[aggregates["due_count"] > 0])
@@ -0,0 +1,167 @@
+# receivables/schema.py
+"""Column-role detection, run once per upload and persisted with user overrides."""
+import json
+import os
+import re
+from datetime import date, datetime
+
+import pandas as pd
+
+ROLES = (
+    "paid", "due", "amount", "date", "client", "approver_mail",
+    "client_mail", "cc_mail", "invoice", "currency",
+)
+
+ROLE_LABELS = {
+    "client": "Client name",
+    "invoice": "Invoice number",
+    "currency": "Currency",
+    "date": "Invoice date",
+    "amount": "Invoice amount",
+    "paid": "Paid amount",
+    "due": "Due amount",
+    "client_mail": "Client email",
+    "approver_mail": "Approver email",
+    "cc_mail": "CC email",
+}
+
+NUMERIC_ROLES = ("paid", "due", "amount")
+# share of non-empty cells that must fit a role before a guess is trusted
+MIN_VALID_SHARE = 0.8
+
+
+def _tokens(header):
+    """Lower-case words of a header; '#' is kept as a word ('Invoice #')."""
+    return re.findall(r"[a-z0-9]+|#", str(header).lower())
+
+
+def _is_mail(t):
+    return "mail" in t or "email" in t
+
+
+# Claimed in this order; each column can play only one role.
+# Whole-word matching keeps 'cc' off 'Account' and 'due' off 'Due Date'.
+_RULES = (
+    ("client", lambda t: ("name" in t and ("client" in t or "customer" in t)) or t in (["client"], ["customer"])),
+    ("invoice", lambda t: ("invoice" in t or "inv" in t) and any(x in t for x in ("no", "number", "id", "num", "#"))),
+    ("currency", lambda t: t in (["currency"], ["ccy"], ["curr"])),
+    ("client_mail", lambda t: "client" in t and _is_mail(t)),
+    ("approver_mail", lambda t: "approver" in t and _is_mail(t)),
+    ("cc_mail", lambda t: "cc" in t),
+    ("paid", lambda t: "paid" in t),
+    ("due", lambda t: ("due" in t or "outstanding" in t or "balance" in t) and "date" not in t),
+    ("date", lambda t: ("date" in t or "raised" in t) and "due" not in t),
+    ("amount", lambda t: any(x in t for x in ("amount", "total", "value"))),
+)
+
+
+def detect_roles(columns):
+    """Guess which column plays which role from its header words.
+    Returns dict: role -> column name (or None when not found)."""
+    columns = list(columns)
+    tokens = {i: _tokens(col) for i, col in enumerate(columns)}
+    roles = dict.fromkeys(ROLES)
+    claimed = set()
+    for role, match in _RULES:
+        for i, col in enumerate(columns):
+            if i not in claimed and match(tokens[i]):
+                roles[role] = col
+                claimed.add(i)
+                break
+    return roles
+
+
+def _numeric_share(values):
+    text = values.astype(str).str.replace(r"^\s*(rs\.?|inr|usd|eur|gbp|aed)|[\s,₹$€£]", "", regex=True, case=False)
+    return pd.to_numeric(text, errors="coerce").notna().mean()
+
+
+def _date_share(values):
+    is_date = values.map(lambda v: isinstance(v, (datetime, date, pd.Timestamp)))
+    text = values[~is_date]
+    if text.empty:
+        return 1.0
+    texts = text[text.map(lambda v: isinstance(v, str))]
+    parsed = pd.to_datetime(texts, errors="coerce", format="mixed") if len(texts) else texts
+    return (is_date.sum() + parsed.notna().sum()) / len(values)
+
+
+def validate_roles(df, roles):
+    """Check each assigned column's contents fit its role.
+    Returns list of (role, message) for columns that do not."""
+    problems = []
+    for role, col in roles.items():
+        if col is None or col not in df.columns:
+            continue
+        values = df[col].dropna()
+        if values.empty:
+            continue
+        if role in NUMERIC_ROLES:
+            share = _numeric_share(values)
+        elif role == "date":
+            share = _date_share(values)
+        else:
+            continue
+        if share < MIN_VALID_SHARE:
+            problems.append((role, f"'{col}' does not look like {ROLE_LABELS[role].lower()} data ({share:.0%} usable values)"))
+    return problems
+
+
+# --- PERSISTED SCHEMA (data/schema.json) ---
+def load_schema(path):
+    """Stored schema dict, or None if missing/unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        return schema if isinstance(schema, dict) else None
+    except Exception:
+        return None
+
+
+def save_schema(path, schema):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=4, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def effective_roles(schema):
+    """Detected roles with user overrides applied."""
+    roles = dict.fromkeys(ROLES)
+    roles.update(schema.get("detected", {}))
+    roles.update(schema.get("overrides", {}))
+    return roles
+
+
+def with_overrides(schema, df, overrides):
+    """schema with new user overrides (role -> column or None), re-validated against df."""
+    overrides = {
+        role: col for role, col in overrides.items()
+        if role in ROLES and (col is None or col in df.columns)
+    }
+    warnings = list(schema.get("detection_warnings", []))
+    for role, message in validate_roles(df, {r: c for r, c in overrides.items() if c is not None}):
+        warnings.append(f"{message} (set manually).")
+    return {**schema, "overrides": overrides, "warnings": warnings}
+
+
+def infer_schema(df, previous=None):
+    """Schema for df: detection + validation, keeping previous overrides whose columns still exist.
+    Guesses that fail validation are dropped (with a warning) rather than used."""
+    detected = detect_roles(df.columns)
+    detection_warnings = []
+    for role, message in validate_roles(df, detected):
+        detected[role] = None
+        detection_warnings.append(f"{message}; ignored.")
+    schema = {"columns": list(df.columns), "detected": detected, "detection_warnings": detection_warnings}
+    return with_overrides(schema, df, (previous or {}).get("overrides", {}))
+
+
+def schema_for(df, path):
+    """Stored schema if it was built for these columns, else infer and store a new one."""
+    stored = load_schema(path)
+    if stored is not None and stored.get("columns") == list(df.columns):
+        return stored
+    schema = infer_schema(df, stored)
+    save_schema(path, schema)
+    return schema
@@ -0,0 +1,142 @@
+# receivables/settings.py
+"""Dashboard settings (sender, client emails, exchange rates, upload time) in one SQLite file.
+
+Replaces the loose data/ files: every save is one transaction, so concurrent saves
+cannot truncate each other, and WAL mode lets readers (other sessions, the dunning
+runner) read while a save is in progress. Reads come from an in-process copy that is
+reloaded only when SQLite's data_version shows another connection committed, so a
+rerun does not touch the file unless something changed.
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+# setting keys
+SENDER = "sender"                # {"email", "password"}
+CLIENT_EMAILS = "client_emails"  # {"cc_email", "clients": {client: email}, optional "languages"}
+USD_INR_RATE = "usd_inr_rate"    # manual ₹ per $
+FX_RATES = "fx_rates"            # {currency: ₹ per unit}
+UPLOAD_TIME = "upload_time"      # "YYYY-mm-dd HH:MM:SS" of the last upload
+_MIGRATED = "_migrated_files"
+
+
+class SettingsStore:
+    """Key -> JSON value table in a SQLite file. One instance per process; safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._values = None
+        self._data_version = None
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def _current(self):
+        # data_version only changes when another connection commits
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._values is None or data_version != self._data_version:
+            rows = self._conn.execute("SELECT key, value FROM settings").fetchall()
+            self._values = {key: json.loads(value) for key, value in rows}
+            self._data_version = data_version
+        return self._values
+
+    def get(self, key, default=None):
+        """A copy of the stored value (callers may modify it freely), or default."""
+        with self._lock:
+            values = self._current()
+            return copy.deepcopy(values[key]) if key in values else default
+
+    def update(self, values):
+        """Store several settings in one transaction."""
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = [(key, json.dumps(value, ensure_ascii=False), now) for key, value in values.items()]
+        with self._lock:
+            current = self._current()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO settings (key, value, updated_at) VALUES (?, ?, ?)"
+                    " ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                    rows,
+                )
+            current.update(copy.deepcopy(values))
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def _legacy_values(data_dir):
+    """Settings found in the pre-store files of data_dir; unreadable files are skipped."""
+    def path(name):
+        return os.path.join(data_dir, name)
+
+    values = {}
+    try:
+        lines = _read_text(path("sender_credentials.txt")).splitlines()
+        if len(lines) >= 2:
+            values[SENDER] = {"email": lines[0], "password": lines[1]}
+    except OSError:
+        pass
+    try:
+        emails = json.loads(_read_text(path("client_emails.json")) or "{}")
+        if isinstance(emails, dict):
+            values[CLIENT_EMAILS] = emails
+    except (OSError, ValueError):
+        pass
+    try:
+        values[USD_INR_RATE] = float(_read_text(path("usd_inr_rate.txt")))
+    except (OSError, ValueError):
+        pass
+    try:
+        values[FX_RATES] = {code: float(v) for code, v in json.loads(_read_text(path("fx_rates.json"))).items()}
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        upload_time = _read_text(path("upload_time.txt"))
+        if upload_time:
+            values[UPLOAD_TIME] = upload_time
+    except OSError:
+        pass
+    return values
+
+
+def migrate_legacy_files(store, data_dir):
+    """Import sender_credentials.txt, client_emails.json, usd_inr_rate.txt, fx_rates.json and
+    upload_time.txt into the store, once: later runs (and other processes) skip it.
+    The files themselves are left in place. Returns the keys imported."""
+    if store.get(_MIGRATED):
+        return []
+    values = _legacy_values(data_dir)
+    # settings saved to the store in the meantime win over the files
+    values = {key: value for key, value in values.items() if store.get(key) is None}
+    store.update({**values, _MIGRATED: datetime.now().isoformat(timespec="seconds")})
+    return sorted(values)
+
+
+def open_settings(data_dir):
+    """The settings store of a dashboard data folder (data_dir/settings.db), migrated from its files."""
+    store = SettingsStore(os.path.join(data_dir, "settings.db"))
+    migrate_legacy_files(store, data_dir)
+    return store
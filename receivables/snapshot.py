@@ -0,0 +1,162 @@
+# receivables/snapshot.py
+"""Columnar (Parquet) snapshot of a Ledger, so sessions can skip re-parsing the xlsx."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from receivables.ledger import PARSED_COLUMNS, Ledger, compact_frame
+
+SNAPSHOT_VERSION = 5
+_META_KEY = b"receivables.snapshot"
+
+
+def _to_arrow(series, type=None):
+    """Arrow array for a raw object column; mixed-type columns are stored as text."""
+    if type is not None and pa.types.is_string(type):
+        return pa.array(series.map(lambda v: None if v is None or v != v else str(v)), type=type, from_pandas=True)
+    try:
+        return pa.array(series, type=type, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if type is not None:
+            raise
+        return pa.array(series.map(lambda v: None if v is None or v != v else str(v)), from_pandas=True)
+
+
+def _meta(ledger_columns, display_cols, roles, source_digest):
+    return {
+        "version": SNAPSHOT_VERSION,
+        "source_digest": source_digest,
+        "columns": list(ledger_columns),
+        "display_columns": display_cols,
+        "roles": roles,
+    }
+
+
+def _table(df, display_map, parsed, display_cols, raw_types=None):
+    """Snapshot-layout Arrow table for a frame (or a chunk of one)."""
+    arrays, names = [], []
+    for i, col in enumerate(df.columns):
+        type = (raw_types or {}).get(i)
+        try:
+            arrays.append(_to_arrow(df[col], type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            raise SchemaDrift(i, type, _to_arrow(df[col]).type)
+        names.append(f"raw_{i}")
+    for i in display_cols:
+        arrays.append(pa.array(display_map[df.columns[i]], type=pa.string()))
+        names.append(f"display_{i}")
+    for name in PARSED_COLUMNS:
+        arrays.append(pa.array(parsed[name], from_pandas=True))
+        names.append(f"parsed_{name}")
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def write_snapshot(path, ledger):
+    """Write ledger to path atomically (raw columns, display strings, parsed columns, roles)."""
+    df = ledger.df
+    display_cols = [i for i, col in enumerate(df.columns) if col in ledger.display_map]
+    table = _table(df, ledger.display_map, ledger.parsed, display_cols)
+    meta = _meta(df.columns, display_cols, ledger.roles, ledger.source_digest)
+    table = table.replace_schema_metadata({_META_KEY: json.dumps(meta, default=str).encode("utf-8")})
+
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class SchemaDrift(Exception):
+    """A later chunk's raw column no longer fits the type fixed by the first chunk."""
+
+    def __init__(self, column, fixed_type, chunk_type):
+        super().__init__(f"raw column {column} changed type from {fixed_type} to {chunk_type}")
+        self.column = column
+        self.fixed_type = fixed_type
+        self.chunk_type = chunk_type
+
+
+class SnapshotWriter:
+    """Write a snapshot chunk by chunk (one Parquet row group per chunk), atomically on close.
+
+    Raw column types are fixed by the first chunk (raw_types overrides them per column
+    position). A later chunk that does not fit raises SchemaDrift; the caller restarts
+    with that column's type overridden.
+    """
+
+    def __init__(self, path, roles, source_digest=None, raw_types=None):
+        self.path = path
+        self.roles = roles
+        self.source_digest = source_digest
+        self.raw_types = dict(raw_types or {})
+        self.rows = 0
+        self._tmp_path = f"{path}.tmp"
+        self._writer = None
+        self._schema = None
+
+    def write(self, df, display_map, parsed):
+        display_cols = [i for i, col in enumerate(df.columns) if col in display_map]
+        if self._writer is None:
+            table = _table(df, display_map, parsed, display_cols, self.raw_types)
+            meta = _meta(df.columns, display_cols, self.roles, self.source_digest)
+            table = table.replace_schema_metadata({_META_KEY: json.dumps(meta, default=str).encode("utf-8")})
+            self._schema = table.schema
+            self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+        else:
+            fixed = {i: self._schema.field(f"raw_{i}").type for i in range(len(df.columns))}
+            table = _table(df, display_map, parsed, display_cols, fixed).cast(self._schema)
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        """Finish the file and move it into place."""
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+def read_snapshot_meta(path):
+    """Snapshot metadata dict, or None if the file is missing or unreadable."""
+    try:
+        schema = pq.read_schema(path, memory_map=True)
+        return json.loads(schema.metadata[_META_KEY])
+    except Exception:
+        return None
+
+
+def read_snapshot(path, source_digest=None):
+    """Load a Ledger from a snapshot with memory-mapped reads.
+    Returns None when the snapshot is missing, from another format version,
+    or was built from a different source file than source_digest."""
+    meta = read_snapshot_meta(path)
+    if meta is None or meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    if source_digest is not None and meta.get("source_digest") != source_digest:
+        return None
+
+    table = pq.read_table(path, memory_map=True)
+    columns = meta["columns"]
+
+    # converted column by column, so only one column's temporaries exist at a time
+    raw_columns = {}
+    for i, col in enumerate(columns):
+        values = table.column(f"raw_{i}").to_pandas(integer_object_nulls=True)
+        if values.dtype == object:
+            # match read_excel(dtype=object): text columns hold NaN, not None, for blanks
+            values = values.where(values.notna(), np.nan)
+        raw_columns[i] = values
+    raw = pd.DataFrame({i: raw_columns.pop(i) for i in range(len(columns))}).set_axis(columns, axis=1)
+
+    display_map = {columns[i]: table.column(f"display_{i}").to_pylist() for i in meta["display_columns"]}
+    parsed = pd.DataFrame({name: table.column(f"parsed_{name}").to_pandas() for name in PARSED_COLUMNS})
+    # streamed snapshots hold the raw cells uncompacted
+    raw = compact_frame(raw, meta["roles"])
+    return Ledger(raw, display_map, meta["roles"], parsed, meta.get("source_digest"))
@@ -0,0 +1,133 @@
+# receivables/tracing.py
+"""Lightweight per-run timing spans and a rotating JSONL trace of recent runs."""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# runs kept in memory for the percentile stats
+DEFAULT_WINDOW = 200
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_BACKUPS = 3
+
+
+class Tracer:
+    """Timing spans for one run. Nested spans are recorded as 'outer/inner';
+    a span entered more than once in a run accumulates.
+    checkpoint(name) suits straight-line scripts: it books the time since the
+    previous checkpoint (or the start) to `name`."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        self._stack = []
+        self._last_checkpoint = self.started
+        self.closed = False
+
+    def _add(self, key, ms):
+        self.spans[key] = self.spans.get(key, 0.0) + ms
+
+    def checkpoint(self, name):
+        now = time.perf_counter()
+        self._add(name, (now - self._last_checkpoint) * 1000)
+        self._last_checkpoint = now
+
+    @contextmanager
+    def span(self, name):
+        self._stack.append(name)
+        key = "/".join(self._stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(key, (time.perf_counter() - start) * 1000)
+            self._stack.pop()
+
+    def close(self):
+        """Mark the run finished and return its record."""
+        self.closed = True
+        return self.record()
+
+    def record(self):
+        """The run as a JSON-ready dict (milliseconds)."""
+        return {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "spans": {name: round(ms, 2) for name, ms in self.spans.items()},
+        }
+
+
+def _percentile(sorted_values, q):
+    # nearest-rank percentile of an ascending list
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class TraceLog:
+    """Appends run records to a JSONL file, rotated at max_bytes (path.1 … path.N),
+    and keeps the last `window` runs in memory for p50/p95 per stage.
+    One instance per process; safe to share between sessions."""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS, window=DEFAULT_WINDOW):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._load_recent()
+
+    def _load_recent(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = deque(f, maxlen=self._recent.maxlen)
+        except OSError:
+            return
+        for line in lines:
+            try:
+                self._recent.append(json.loads(line))
+            except ValueError:
+                pass  # partial line from an interrupted write
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._recent.append(record)
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError:
+                pass  # tracing must never break a run
+
+    def stats(self):
+        """{stage: {"runs", "p50", "p95", "last"}} in ms over the recent records, plus 'total'
+        (dashboard runs only; background records such as SMTP batches have no total)."""
+        with self._lock:
+            runs = list(self._recent)
+        samples = {}
+        for run in runs:
+            if "total_ms" in run:
+                samples.setdefault("total", []).append(run["total_ms"])
+            for name, ms in run.get("spans", {}).items():
+                samples.setdefault(name, []).append(ms)
+        stats = {}
+        for name, values in samples.items():
+            ordered = sorted(values)
+            stats[name] = {
+                "runs": len(values),
+                "p50": _percentile(ordered, 50),
+                "p95": _percentile(ordered, 95),
+                "last": values[-1],
+            }
+        return stats
@@ -0,0 +1,231 @@
+# receivables/workbook.py
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+# Strings pandas' read_excel treats as missing by default
+NA_STRINGS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+@lru_cache(maxsize=256)
+def format_symbol(number_format):
+    """Currency symbol implied by an Excel number format: '$', '₹' or ''."""
+    nf = (number_format or "").upper()
+    # common number_format examples: '"$"#,##0.00', '$#,##0.00', '₹#,##0.00', '₹ #,##0.00;[Red]-₹ #,##0.00'
+    if "$" in nf:
+        return "$"
+    if "₹" in nf or "RS" in nf or "INR" in nf:
+        return "₹"
+    return ""
+
+
+def display_value(cval, number_format):
+    """Display string for a cell, using its number format to pick a currency symbol."""
+    if cval is None:
+        return None
+    try:
+        symbol = format_symbol(number_format)
+        if symbol:
+            try:
+                return f"{symbol}{float(cval):,.2f}"
+            except Exception:
+                return str(cval)
+        # if the cell value is string already containing symbols, preserve it
+        if isinstance(cval, str) and (cval.strip().startswith("$") or cval.strip().startswith("₹")):
+            return cval.strip()
+        # fallback: numeric without symbol (we won't invent a symbol)
+        if isinstance(cval, (int, float)):
+            return f"{float(cval):,.2f}"
+        return str(cval)
+    except Exception:
+        return str(cval)
+
+
+def convert_cell(cell):
+    """Convert an openpyxl cell to the value pandas' read_excel(dtype=object) would give."""
+    value = cell.value
+    if value is None:
+        return np.nan
+    data_type = cell.data_type
+    if data_type == TYPE_ERROR:
+        return np.nan
+    if data_type == TYPE_NUMERIC and not isinstance(value, bool):
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    if isinstance(value, str) and value in NA_STRINGS:
+        return np.nan
+    return value
+
+
+def header_names(values):
+    """Column labels the way pandas builds them: 'Unnamed: i' for blanks, '.n' suffix for repeats."""
+    names = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None or value == "" else value
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        if count:
+            candidate = f"{name}.{count}"
+            while candidate in seen:
+                count += 1
+                candidate = f"{name}.{count}"
+            seen[name] = count + 1
+            seen[candidate] = 1
+            name = candidate
+        names.append(name)
+    return names
+
+
+def read_excel_with_display_values(path, sheet_name=None):
+    """
+    Read a worksheet in a single openpyxl pass.
+    Returns (df, display_map) where df matches pd.read_excel(dtype=object) and
+    display_map is dict: column_name -> list of display strings (one per df row).
+    """
+    wb = load_workbook(path, data_only=True, read_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.active
+        # read-only sheets can carry stale <dimension> tags; scan real extents
+        ws.reset_dimensions()
+        rows = ws.iter_rows()
+        try:
+            header_cells = next(rows)
+        except StopIteration:
+            return pd.DataFrame(), {}
+        header = [c.value for c in header_cells]
+
+        values = []
+        displays = []
+        width = len(header)
+        last_row_with_data = -1
+        for row in rows:
+            row_values = [np.nan] * width
+            row_displays = [None] * width
+            has_data = False
+            for i, cell in enumerate(row):
+                if cell.value is None:
+                    continue
+                if i >= width:
+                    # data beyond the header row widens the frame
+                    grow = i + 1 - width
+                    header.extend([None] * grow)
+                    for prev_values, prev_displays in zip(values, displays):
+                        prev_values.extend([np.nan] * grow)
+                        prev_displays.extend([None] * grow)
+                    row_values.extend([np.nan] * grow)
+                    row_displays.extend([None] * grow)
+                    width = i + 1
+                row_values[i] = convert_cell(cell)
+                row_displays[i] = display_value(cell.value, cell.number_format)
+                has_data = True
+            values.append(row_values)
+            displays.append(row_displays)
+            if has_data:
+                last_row_with_data = len(values) - 1
+    finally:
+        wb.close()
+
+    # Trim trailing empty rows, then trailing columns with neither header nor data
+    values = values[: last_row_with_data + 1]
+    displays = displays[: last_row_with_data + 1]
+    while width and header[width - 1] is None and all(
+        isinstance(v[width - 1], float) and np.isnan(v[width - 1]) for v in values
+    ):
+        width -= 1
+
+    names = header_names(header[:width])
+    columns = list(zip(*values)) if values else [()] * width
+    display_columns = list(zip(*displays)) if displays else [()] * width
+    df = pd.DataFrame(
+        {name: np.array(col, dtype=object) for name, col in zip(names, columns[:width])},
+        columns=names,
+        dtype=object,
+    )
+    display_map = {name: list(col) for name, col in zip(names, display_columns[:width])}
+    return df, display_map
+
+
+def iter_excel_chunks(path, sheet_name=None, chunk_rows=5000, on_progress=None):
+    """
+    Stream a worksheet as (df, display_map) chunks of at most chunk_rows rows.
+    chunk_rows may be an int or a callable returning the next chunk's size.
+    Chunk frames carry global row positions as their index, so concatenated they
+    match read_excel_with_display_values(). Unlike it, the columns are fixed by the
+    header row: cells to the right of the last header are ignored.
+    on_progress(rows_read, rows_estimate) is called after each chunk; the estimate
+    comes from the sheet's <dimension> tag and may be None.
+    """
+    next_size = chunk_rows if callable(chunk_rows) else (lambda: chunk_rows)
+    wb = load_workbook(path, data_only=True, read_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.active
+        rows_estimate = ws.max_row - 1 if ws.max_row else None
+        ws.reset_dimensions()
+        rows = ws.iter_rows()
+        try:
+            header = [c.value for c in next(rows)]
+        except StopIteration:
+            return
+        while header and header[-1] is None:
+            header.pop()
+        names = header_names(header)
+        width = len(names)
+
+        values, displays = [], []
+        start = 0            # position of values[0]
+        pending_empty = 0    # empty rows seen since the last row with data
+        size = next_size()
+        for row in rows:
+            row_values = [np.nan] * width
+            row_displays = [None] * width
+            has_data = False
+            for i, cell in enumerate(row[:width]):
+                if cell.value is None:
+                    continue
+                row_values[i] = convert_cell(cell)
+                row_displays[i] = display_value(cell.value, cell.number_format)
+                has_data = True
+            if not has_data:
+                # only kept if a row with data follows (trailing empty rows are dropped)
+                pending_empty += 1
+                continue
+            for _ in range(pending_empty):
+                values.append([np.nan] * width)
+                displays.append([None] * width)
+            pending_empty = 0
+            values.append(row_values)
+            displays.append(row_displays)
+            if len(values) >= size:
+                yield _chunk_frame(names, values, displays, start)
+                start += len(values)
+                values, displays = [], []
+                if on_progress is not None:
+                    on_progress(start, rows_estimate)
+                size = next_size()
+        if values:
+            yield _chunk_frame(names, values, displays, start)
+            start += len(values)
+        if on_progress is not None:
+            on_progress(start, start)
+    finally:
+        wb.close()
+
+
+def _chunk_frame(names, values, displays, start):
+    columns = list(zip(*values))
+    display_columns = list(zip(*displays))
+    df = pd.DataFrame(
+        {name: np.array(col, dtype=object) for name, col in zip(names, columns)},
+        columns=names,
+        dtype=object,
+        index=pd.RangeIndex(start, start + len(values)),
+    )
+    display_map = {name: list(col) for name, col in zip(names, display_columns)}
+    return df, display_map
@@ -0,0 +1,46 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from openpyxl import Workbook
+
+HEADERS = ["Invoice No", "Client Name", "Invoice Date", "Currency", "Invoice Amount", "Paid Amount", "Due Amount", "Service"]
+CLIENTS = ["Acme", "Birla", "Cholayil", "Duroflex", "Emami"]
+FORMATS = {"USD": '"$"#,##0.00', "INR": "₹#,##0.00"}
+
+
+def invoice_rows(n, seed=3, today=datetime(2026, 3, 31)):
+    """n receivables rows following HEADERS: mixed currencies, some paid, some without a date."""
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        currency = rnd.choice(["USD", "INR"])
+        amount = round(rnd.uniform(100, 50000), 2)
+        paid = amount if rnd.random() < 0.4 else 0
+        date = None if i % 17 == 5 else today - timedelta(days=rnd.randint(0, 200))
+        rows.append([f"INV-{i:04d}", rnd.choice(CLIENTS), date, currency, amount, paid, round(amount - paid, 2),
+                     rnd.choice(["Audit", "Payroll", "N/A", None])])
+    return rows
+
+
+def write_invoices(path, rows, headers=HEADERS, sheet="Invoices"):
+    """Write rows as one sheet, amount cells formatted with their currency symbol."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = sheet
+    ws.append(headers)
+    currency_at = headers.index("Currency") if "Currency" in headers else None
+    for row in rows:
+        ws.append(row)
+        if currency_at is None:
+            continue
+        for cell in ws[ws.max_row]:
+            if isinstance(cell.value, float):
+                cell.number_format = FORMATS[row[currency_at]]
+    wb.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    return write_invoices(tmp_path / "invoices.xlsx", invoice_rows(60))
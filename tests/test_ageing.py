@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import write_invoices
+from receivables import core
+from receivables.ageing import Ageing, assign_buckets, bucket_labels, days_pending
+from receivables.ledger import build_ledger, raw_column
+
+TODAY = datetime(2026, 3, 31)
+
+
+def test_bucket_labels():
+    assert bucket_labels() == ["0–30", "31–60", "61–90", "90+"]
+
+
+@pytest.mark.parametrize("days, bucket", [
+    (-5, 0), (0, 0), (30, 0), (31, 1), (60, 1), (61, 2), (90, 2), (91, 3), (400, 3), (np.nan, -1),
+])
+def test_bucket_boundaries(days, bucket):
+    assert assign_buckets(np.array([days], dtype=float)).tolist() == [bucket]
+
+
+def test_days_pending_counts_whole_days():
+    dates = pd.Series([TODAY - timedelta(days=30, hours=-23), TODAY.replace(hour=23), pd.NaT])
+    days = days_pending(dates, TODAY.replace(hour=8))
+    assert days[:2].tolist() == [30.0, 0.0] and np.isnan(days[2])
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    rows = []
+    for i, age in enumerate([0, 30, 31, 60, 61, 90, 91, None, -3]):
+        date = None if age is None else TODAY - timedelta(days=age)
+        rows.append([f"INV-{i}", "Acme" if i % 2 else "Birla", date, "INR", 100.0 + i, 0, 100.0 + i, "Audit"])
+    return build_ledger(*core.load_workbook(write_invoices(tmp_path / "ages.xlsx", rows)))
+
+
+def test_bucket_names_per_invoice(ledger):
+    ageing = Ageing(ledger, TODAY)
+    assert ageing.days[:7].tolist() == [0, 30, 31, 60, 61, 90, 91]
+    assert ageing.bucket_names().tolist() == [
+        "0–30", "0–30", "31–60", "31–60", "61–90", "61–90", "90+", None, "0–30",
+    ]
+
+
+def test_matrix_matches_groupby(workbook_path):
+    ledger = build_ledger(*core.load_workbook(workbook_path))
+    ageing = Ageing(ledger, datetime(2026, 3, 31))
+    parsed = ledger.parsed
+    pending = parsed["is_unpaid"].to_numpy() & (ageing.bucket >= 0)
+    clients = raw_column(ledger.df, ledger.roles["client"])[pending]
+    buckets = pd.Series(ageing.bucket_names(), index=ledger.df.index)[pending]
+
+    counts = ageing.matrix()
+    expected = clients.groupby([clients, buckets]).size().unstack(fill_value=0)
+    expected = expected.reindex(index=counts.index, columns=counts.columns, fill_value=0)
+    pd.testing.assert_frame_equal(counts, expected, check_names=False, check_dtype=False)
+    assert counts.sum(axis=1).is_monotonic_decreasing
+
+    due = ageing.matrix(weights=parsed["due"])
+    expected = parsed["due"][pending].groupby([clients, buckets]).sum().unstack(fill_value=0.0)
+    expected = expected.reindex(index=due.index, columns=due.columns, fill_value=0.0)
+    pd.testing.assert_frame_equal(due, expected, check_names=False)
+
+    acme = np.flatnonzero(raw_column(ledger.df, ledger.roles["client"]) == "Acme")
+    assert list(ageing.matrix(rows=acme).index) == ["Acme"]
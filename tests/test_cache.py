@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from receivables.cache import LRUCache, bytes_digest, file_digest
+
+
+def test_eviction_and_counters():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a becomes most recently used
+    cache.put("c", 3)           # evicts b
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.get_or_compute("c", lambda: pytest.fail("c is cached")) == 3
+    assert cache.get_or_compute("d", lambda: 4) == 4  # evicts a
+    assert "a" not in cache
+    assert cache.stats() == {"hits": 2, "misses": 2, "evictions": 2, "size": 2, "maxsize": 2}
+
+
+def test_concurrent_misses_compute_once():
+    cache = LRUCache()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "ledger"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", slow))) for _ in range(4)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    # another key is served while "k" is still being computed
+    begin = time.perf_counter()
+    assert cache.get_or_compute("other", lambda: 1) == 1
+    assert time.perf_counter() - begin < 0.1
+    for thread in threads:
+        thread.join()
+    assert results == ["ledger"] * 4
+    assert len(calls) == 1
+
+
+def test_failed_compute_is_not_cached():
+    cache = LRUCache()
+
+    def broken():
+        raise ValueError("bad workbook")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("k", broken)
+    assert cache.get_or_compute("k", lambda: 1) == 1
+
+
+def test_file_digest_matches_bytes_digest(tmp_path):
+    path = tmp_path / "book.xlsx"
+    path.write_bytes(b"workbook bytes")
+    assert file_digest(str(path)) == bytes_digest(b"workbook bytes")
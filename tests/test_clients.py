@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from receivables import core
+from receivables.currency import to_inr
+from receivables.ledger import build_ledger, raw_column
+
+RATES = {"INR": 1.0, "USD": 83.0}
+
+
+@pytest.fixture
+def ledger(workbook_path):
+    return build_ledger(*core.load_workbook(workbook_path))
+
+
+def test_aggregates_match_groupby(ledger):
+    index = ledger.client_index
+    parsed = ledger.parsed
+    clients = raw_column(ledger.df, ledger.roles["client"])
+    due = parsed["due"] > 0
+    expected = pd.DataFrame({
+        "invoices": clients.groupby(clients).size(),
+        "pending": parsed["is_unpaid"].groupby(clients).sum(),
+        "due_count": due.groupby(clients).sum(),
+        "oldest_due_date": parsed["date"][due].groupby(clients[due]).min(),
+    })
+    actual = index.aggregates
+    assert list(actual.index) == sorted(clients.unique())
+    for column in ("invoices", "pending", "due_count"):
+        assert actual[column].tolist() == expected[column].tolist()
+    pd.testing.assert_series_equal(
+        actual["oldest_due_date"], expected["oldest_due_date"].reindex(actual.index), check_names=False
+    )
+
+    by_currency = parsed["due"][due].groupby([clients[due], parsed["currency"][due].astype(str)]).sum().unstack(fill_value=0.0)
+    pd.testing.assert_frame_equal(
+        index.due_by_currency, by_currency.reindex(index=actual.index, columns=index.due_by_currency.columns, fill_value=0.0),
+        check_names=False, check_exact=False,
+    )
+
+    inr = to_inr(parsed["due"], parsed["currency"], RATES)[due]
+    np.testing.assert_allclose(index.inr_totals(RATES).to_numpy(), inr.groupby(clients[due]).sum().reindex(actual.index, fill_value=0.0))
+
+
+def test_positions(ledger):
+    index = ledger.client_index
+    clients = raw_column(ledger.df, ledger.roles["client"]).to_numpy()
+    for client in index.clients:
+        assert index.positions(client).tolist() == np.flatnonzero(clients == client).tolist()
+        due = index.due_positions(client)
+        assert (ledger.parsed["due"].to_numpy()[due] > 0).all()
+    assert len(index.positions("Nobody")) == 0
+    assert "Nobody" not in index
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from receivables.diff import diff_ledgers, load_diff, save_diff
+from receivables.ledger import build_ledger
+
+COLUMNS = ["Invoice No", "Client Name", "Invoice Amount", "Due Amount", "Invoice Date"]
+
+
+def ledger(rows, digest):
+    return build_ledger(pd.DataFrame(rows, columns=COLUMNS, dtype=object), {}, digest)
+
+
+OLD = [
+    ["INV-1", "Acme", 100.0, 100.0, "2026-01-05"],
+    ["INV-2", "Birla", 200.0, 200.0, "2026-01-06"],
+    ["INV-3", "Birla", 300.0, 0.0, "2026-01-07"],
+    ["INV-4", "Cholayil", 400.0, 400.0, "2026-01-08"],
+]
+
+
+def test_classifies_added_removed_changed():
+    new = [
+        ["INV-1", "Acme", 100.0, 100.0, "2026-01-05"],      # unchanged
+        ["INV-2", "Birla", 200.0, 50.0, "2026-01-06"],      # due changed
+        ["INV-3", "Emami", 300.0, 0.0, "2026-01-07"],       # moved to another client
+        ["INV-5", "Duroflex", 500.0, 500.0, "2026-01-09"],  # added; INV-4 removed
+    ]
+    diff = diff_ledgers(ledger(OLD, "old"), ledger(new, "new"))
+    assert list(diff.added.index) == ["INV-5"]
+    assert list(diff.removed.index) == ["INV-4"]
+    assert list(diff.changed.index) == ["INV-2", "INV-3"]
+    assert diff.changed.loc["INV-2", "fields"] == ["due"]
+    assert diff.changed.loc["INV-3", "fields"] == ["client"]
+    assert diff.affected_clients == {"Birla", "Emami", "Duroflex", "Cholayil"}
+    assert diff.summary() == {"added": 1, "removed": 1, "changed": 2, "affected_clients": 4}
+    assert (diff.old_digest, diff.new_digest) == ("old", "new")
+
+
+def test_identical_uploads():
+    diff = diff_ledgers(ledger(OLD, "a"), ledger(OLD, "b"))
+    assert diff.summary() == {"added": 0, "removed": 0, "changed": 0, "affected_clients": 0}
+
+
+def test_repeated_and_missing_invoice_numbers():
+    old = OLD + [["INV-1", "Acme", 10.0, 10.0, "2026-01-10"], [None, "Gokul", 1.0, 1.0, "2026-01-11"]]
+    new = OLD + [["INV-1", "Acme", 20.0, 20.0, "2026-01-10"], [None, "Gokul", 1.0, 1.0, "2026-01-11"]]
+    diff = diff_ledgers(ledger(old, "a"), ledger(new, "b"))
+    # the second INV-1 is matched by occurrence; rows without a number always count as affected
+    assert list(diff.changed.index) == ["INV-1 #2"]
+    assert diff.affected_clients == {"Acme", "Gokul"}
+
+
+def test_no_previous_ledger_or_invoice_column():
+    assert diff_ledgers(None, ledger(OLD, "a")) is None
+    no_invoice = build_ledger(pd.DataFrame({"Client Name": ["Acme"], "Invoice Amount": [1.0]}, dtype=object), {})
+    assert diff_ledgers(no_invoice, no_invoice) is None
+
+
+def test_saved_summary(tmp_path):
+    diff = diff_ledgers(ledger(OLD, "old"), ledger(OLD[:3], "new"))
+    path = str(tmp_path / "upload_diff.json")
+    save_diff(path, diff, "2026-04-01 10:00:00")
+    stored = load_diff(path)
+    assert stored["new_digest"] == "new"
+    assert stored["summary"]["removed"] == 1
+    assert stored["rows"] == [{"Invoice": "INV-4", "Client": "Cholayil", "Change": "Removed", "Details": ""}]
@@ -0,0 +1,57 @@
+import os
+from email.message import EmailMessage
+
+import pytest
+
+from conftest import CLIENTS, invoice_rows, write_invoices
+from receivables import core
+from receivables.dunning import SetupError, run
+from receivables.outbox import Outbox, invoice_set_hash
+from receivables.reminders import due_invoice_ids
+from receivables.settings import CLIENT_EMAILS, open_settings
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write_invoices(tmp_path / "last_uploaded.xlsx", invoice_rows(60))
+    settings = open_settings(str(tmp_path))
+    settings.set(CLIENT_EMAILS, {"cc_email": "", "clients": {c: f"{c.lower()}@example.com" for c in CLIENTS}})
+    settings.close()
+    return tmp_path
+
+
+def test_dry_run_creates_no_outbox(data_dir):
+    summary = run(str(data_dir), dry_run=True)
+    assert summary["ok"] and summary["counts"]["sent"] == 0
+    assert summary["would_send"] == core.clients_with_dues(core.load_ledger(str(data_dir / "last_uploaded.xlsx")))
+    assert not os.path.exists(data_dir / "outbox.db")
+
+
+def test_dry_run_reports_what_a_run_would_do(data_dir):
+    ledger = core.load_ledger(str(data_dir / "last_uploaded.xlsx"))
+    sent, in_flight, abandoned = core.clients_with_dues(ledger)[:3]
+    outbox = Outbox(str(data_dir / "outbox.db"))
+    row_ids = {}
+    for client in (sent, in_flight, abandoned):
+        msg = EmailMessage()
+        msg["Subject"] = f"Reminder for {client}"
+        row_ids[client], _ = outbox.enqueue(client, invoice_set_hash(due_invoice_ids(ledger, client)), msg)
+    outbox.mark(row_ids[sent], True)
+    # a crashed sender's claim, older than the lease
+    with outbox._conn:
+        outbox._conn.execute("UPDATE outbox SET claimed_at = '2000-01-01T00:00:00' WHERE id = ?", (row_ids[abandoned],))
+    outbox.close()
+    before = os.path.getmtime(data_dir / "outbox.db")
+
+    summary = run(str(data_dir), dry_run=True)
+    assert summary["skipped"][sent].startswith("Already sent today at ")
+    assert summary["skipped"][in_flight] == "Already queued"
+    assert abandoned in summary["would_send"] and abandoned not in summary["skipped"]
+    assert os.path.getmtime(data_dir / "outbox.db") == before
+
+    assert sent in run(str(data_dir), dry_run=True, force=True)["would_send"]
+
+
+def test_missing_workbook_is_a_setup_error(tmp_path):
+    with pytest.raises(SetupError):
+        run(str(tmp_path), dry_run=True)
@@ -0,0 +1,56 @@
+import io
+
+import pandas as pd
+import pytest
+
+from conftest import invoice_rows, write_invoices
+from receivables import core, ingest
+from receivables.cache import file_digest
+from receivables.ledger import build_ledger
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # a 60-row sheet then streams in several chunks
+    monkeypatch.setattr(ingest, "FIRST_CHUNK_ROWS", 7)
+    monkeypatch.setattr(ingest, "MIN_CHUNK_ROWS", 5)
+    return 1  # memory budget (bytes): every later chunk falls to MIN_CHUNK_ROWS
+
+
+def assert_same_ledger(streamed, eager):
+    pd.testing.assert_frame_equal(streamed.df, eager.df)
+    pd.testing.assert_frame_equal(streamed.parsed, eager.parsed)
+    assert streamed.display_map == eager.display_map
+    assert streamed.roles == eager.roles
+    assert streamed.source_digest == eager.source_digest
+
+
+def test_streamed_ledger_equals_eager(workbook_path, tmp_path, small_chunks):
+    digest = file_digest(workbook_path)
+    eager = build_ledger(*core.load_workbook(workbook_path), digest)
+    progress = []
+    streamed = ingest.stream_ingest(
+        workbook_path, str(tmp_path / "ledger.parquet"), digest,
+        memory_budget=small_chunks, on_progress=lambda rows, estimate: progress.append(rows),
+    )
+    assert_same_ledger(streamed, eager)
+    assert len(progress) > 3 and progress[-1] == len(eager)
+
+
+def test_streams_from_an_upload_buffer(workbook_path, tmp_path, small_chunks):
+    with open(workbook_path, "rb") as f:
+        data = f.read()
+    eager = build_ledger(*core.load_workbook(io.BytesIO(data)), "digest")
+    streamed = ingest.stream_ingest(io.BytesIO(data), str(tmp_path / "ledger.parquet"), "digest", memory_budget=small_chunks)
+    assert_same_ledger(streamed, eager)
+
+
+def test_column_type_changing_after_the_first_chunk(tmp_path, small_chunks):
+    rows = invoice_rows(30)
+    for i, row in enumerate(rows):
+        row[7] = 100 + i if i < 10 else f"S-{i}"  # Service: numbers first, text later
+    path = write_invoices(tmp_path / "drift.xlsx", rows)
+    streamed = ingest.stream_ingest(path, str(tmp_path / "ledger.parquet"), memory_budget=small_chunks)
+    assert len(streamed) == 30
+    # the column is stored as text once it stops being numeric
+    assert list(streamed.df["Service"].astype(str)) == [str(row[7]) for row in rows]
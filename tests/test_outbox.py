@@ -0,0 +1,90 @@
+"""Two Outbox instances on one file stand in for two processes (server and dunning runner)."""
+import threading
+from email.message import EmailMessage
+
+from receivables.outbox import ALREADY_SENT, IN_FLIGHT, QUEUED, Outbox
+
+
+def reminder(client):
+    msg = EmailMessage()
+    msg["To"] = f"{client.lower()}@example.com"
+    msg["Subject"] = f"Reminder for {client}"
+    msg.set_content("due invoices")
+    return msg
+
+
+def test_enqueue_claims_each_row_once(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    a, b = Outbox(path), Outbox(path)
+    row_id, outcome = a.enqueue("C", "h", reminder("C"))
+    assert outcome == QUEUED
+    # a is still sending row_id: b must neither count, resume nor re-queue it
+    assert b.unfinished_count() == 0
+    assert b.claim_unfinished() == []
+    assert b.enqueue("C", "h", reminder("C")) == (row_id, IN_FLIGHT)
+    a.mark(row_id, True)
+    assert b.enqueue("C", "h", reminder("C")) == (row_id, ALREADY_SENT)
+
+
+def test_concurrent_resume_splits_rows(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    a, b = Outbox(path), Outbox(path)
+    row_ids = [a.enqueue(f"C{i}", "h", reminder(f"C{i}"))[0] for i in range(50)]
+    for row_id in row_ids:
+        a.release(row_id)
+    assert a.unfinished_count() == b.unfinished_count() == 50
+
+    claimed = {}
+    start = threading.Barrier(2)
+
+    def resume(name, outbox):
+        start.wait()
+        claimed[name] = [row_id for row_id, _, _ in outbox.claim_unfinished()]
+
+    threads = [threading.Thread(target=resume, args=(name, outbox)) for name, outbox in (("a", a), ("b", b))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed["a"] + claimed["b"]) == row_ids
+    assert not set(claimed["a"]) & set(claimed["b"])
+    assert a.unfinished_count() == b.unfinished_count() == 0
+
+
+def test_expired_claim_is_resumed(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    row_id, _ = Outbox(path).enqueue("C", "h", reminder("C"))
+    # the first claim was abandoned (crashed process) and its lease has run out
+    later = Outbox(path, lease_seconds=-1)
+    assert [claim[0] for claim in later.claim_unfinished()] == [row_id]
+
+
+def test_resume_takes_only_todays_rows(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    old_id, _ = outbox.enqueue("C", "h", reminder("C"), day="2000-01-01")
+    outbox.mark(old_id, False, "smtp down")
+    today_id, _ = outbox.enqueue("D", "h", reminder("D"))
+    outbox.release(today_id)
+    # last week's message was built from amounts that may have changed since
+    assert outbox.unfinished_count() == 1
+    assert [claim[0] for claim in outbox.claim_unfinished()] == [today_id]
+    assert [claim[0] for claim in outbox.claim_unfinished(day="2000-01-01")] == [old_id]
+
+
+def test_peek_matches_enqueue_without_writing(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    sent_id, _ = outbox.enqueue("S", "h", reminder("S"))
+    outbox.mark(sent_id, True)
+    sending_id, _ = outbox.enqueue("Q", "h", reminder("Q"))
+
+    reader = Outbox(path, read_only=True)
+    assert reader.peek("S", "h") == (sent_id, ALREADY_SENT)
+    assert reader.peek("S", "h", force=True) == (sent_id, QUEUED)
+    assert reader.peek("Q", "h") == (sending_id, IN_FLIGHT)
+    assert reader.peek("N", "h") == (None, QUEUED)
+    # past the lease, the abandoned claim would be taken over
+    assert Outbox(path, read_only=True, lease_seconds=-1).peek("Q", "h") == (sending_id, QUEUED)
+    # peeking claimed nothing
+    assert outbox.enqueue("N", "h", reminder("N"))[1] == QUEUED
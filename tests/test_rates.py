@@ -0,0 +1,81 @@
+import json
+import time
+
+from receivables.rates import RateProvider
+
+
+class StubFetch:
+    """Stands in for the HTTP endpoint: returns the queued rates, raising queued exceptions."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def wait_for_refresh(provider):
+    if provider._refresh_thread is not None:
+        provider._refresh_thread.join(5)
+
+
+def test_default_until_fetched_then_cached_on_disk(tmp_path):
+    path = str(tmp_path / "usd_inr_live.json")
+    fetch = StubFetch(84.5)
+    provider = RateProvider(path, fetch=fetch, default=83.0)
+    assert provider.is_stale
+    assert provider.current() == 83.0  # never waits for the network
+    wait_for_refresh(provider)
+    assert provider.cached() == 84.5
+    assert not provider.is_stale
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["rate"] == 84.5
+
+    # another process starts from the disk cache without fetching
+    other = RateProvider(path, fetch=StubFetch())
+    assert other.current() == 84.5
+    assert other._refresh_thread is None
+
+
+def test_ttl_expiry_refreshes(tmp_path):
+    path = str(tmp_path / "usd_inr_live.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"rate": 82.0, "fetched_at": time.time() - 120}, f)
+    fetch = StubFetch(85.0)
+    assert not RateProvider(path, fetch=fetch, ttl=3600).is_stale
+
+    provider = RateProvider(path, fetch=fetch, ttl=60)
+    assert provider.is_stale
+    assert provider.current() == 82.0  # the expired rate is served while refreshing
+    wait_for_refresh(provider)
+    assert provider.cached() == 85.0
+    assert fetch.calls == 1
+
+
+def test_failed_fetch_keeps_last_rate_and_backs_off(tmp_path):
+    path = str(tmp_path / "usd_inr_live.json")
+    reports = []
+    fetch = StubFetch(84.0, ConnectionError("offline"))
+    provider = RateProvider(path, fetch=fetch, ttl=0, on_fetch=lambda seconds, ok: reports.append(ok))
+    assert provider.refresh()
+    assert not provider.refresh()
+    assert provider.cached() == 84.0
+    assert provider.last_error == "offline"
+    assert reports == [True, False]
+    # right after a failed attempt, a stale read does not hit the endpoint again
+    provider.current()
+    assert provider._refresh_thread is None
+    assert fetch.calls == 2
+
+
+def test_unreadable_cache_falls_back_to_default(tmp_path):
+    path = tmp_path / "usd_inr_live.json"
+    path.write_text("{not json", encoding="utf-8")
+    provider = RateProvider(str(path), fetch=StubFetch(ValueError("bad payload")), default=83.0)
+    assert provider.cached() == 83.0
+    assert provider.fetched_at is None
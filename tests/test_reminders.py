@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import invoice_rows, write_invoices
+from receivables import core
+from receivables.diff import diff_ledgers
+from receivables.ledger import build_ledger
+from receivables.reminders import ReminderTemplates
+
+NOW = datetime(2026, 4, 1)
+RATES = {"INR": 1.0, "USD": 83.0}
+
+
+def load(path):
+    df, display_map = core.load_workbook(path)
+    return build_ledger(df, display_map, core.file_digest(path))
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    """Two uploads where only the first invoice's client has a changed amount."""
+    rows = invoice_rows(40)
+    rows[0][4] = rows[0][6] = 12345.0
+    rows[0][5] = 0
+    old = load(write_invoices(tmp_path / "old.xlsx", rows))
+    rows[0][4] = rows[0][6] = 23456.0
+    new = load(write_invoices(tmp_path / "new.xlsx", rows))
+    return old, new, rows[0][1]
+
+
+def rendering_spy(templates):
+    rendered = []
+    render = templates.render
+
+    def spy(client, table, language=None):
+        rendered.append(client)
+        return render(client, table, language)
+
+    templates.render = spy
+    return rendered
+
+
+def test_render_all_is_memoized(uploads):
+    old, _, _ = uploads
+    templates = ReminderTemplates()
+    rendered = rendering_spy(templates)
+    first = templates.render_all(old, RATES, now=NOW)
+    assert sorted(first) == sorted(old.client_index.clients)
+    assert templates.render_all(old, RATES, now=NOW) is first
+    assert len(rendered) == len(first)
+
+
+def test_upload_rerenders_only_affected_clients(uploads):
+    old, new, changed_client = uploads
+    templates = ReminderTemplates()
+    before = templates.render_all(old, RATES, now=NOW)
+    # another session rendering with other rates does not displace the batch the diff builds on
+    templates.render_all(old, {**RATES, "USD": 90.0}, now=NOW)
+    rendered = rendering_spy(templates)
+    diff = diff_ledgers(old, new)
+    assert diff.affected_clients == {changed_client}
+
+    after = templates.render_all(new, RATES, now=NOW, diff=diff)
+    assert rendered == [changed_client]
+    assert "23,456.00" in after[changed_client]
+    for client in after:
+        if client != changed_client:
+            assert after[client] == before[client]
+    assert after == ReminderTemplates().render_all(new, RATES, now=NOW)
@@ -0,0 +1,75 @@
+import pandas as pd
+
+from conftest import HEADERS, invoice_rows, write_invoices
+from receivables import core
+from receivables.ledger import build_ledger
+from receivables.reminders import reminder_tables
+from receivables.schema import (
+    detect_roles, effective_roles, infer_schema, load_schema, schema_for, with_overrides,
+)
+
+
+def test_detect_roles():
+    roles = detect_roles(HEADERS + ["Client Email", "Approver Mail", "CC", "Due Date", "Account"])
+    assert roles == {
+        "paid": "Paid Amount",
+        "due": "Due Amount",
+        "amount": "Invoice Amount",
+        "date": "Invoice Date",
+        "client": "Client Name",
+        "approver_mail": "Approver Mail",
+        "client_mail": "Client Email",
+        "cc_mail": "CC",
+        "invoice": "Invoice No",
+        "currency": "Currency",
+    }
+
+
+def test_whole_words_only():
+    # 'Due Date' is not a due amount and 'Account' is not a cc address
+    roles = detect_roles(["Customer", "Due Date", "Account", "Total"])
+    assert roles["client"] == "Customer"
+    assert roles["due"] is None
+    assert roles["date"] is None
+    assert roles["cc_mail"] is None
+    assert roles["amount"] == "Total"
+
+
+def test_guess_failing_validation_is_dropped():
+    df = pd.DataFrame({"Client": ["a", "b"], "Invoice Amount": ["tbd", "n/a"], "Invoice Date": ["soon", "later"]})
+    schema = infer_schema(df)
+    assert schema["detected"]["amount"] is None
+    assert schema["detected"]["date"] is None
+    assert len(schema["detection_warnings"]) == 2
+
+
+def test_overrides(tmp_path):
+    df = pd.DataFrame({"Client": ["a"], "Bill": [10.0], "Billing Ccy": ["USD"], "Memo": ["x"]})
+    schema = infer_schema(df)
+    assert schema["detected"]["amount"] is None
+    schema = with_overrides(schema, df, {"amount": "Bill", "currency": "Billing Ccy", "due": "Missing"})
+    roles = effective_roles(schema)
+    assert roles["amount"] == "Bill"
+    assert roles["currency"] == "Billing Ccy"
+    assert roles["due"] is None  # columns that do not exist are not kept
+    # a manual choice that does not fit is kept, with a warning
+    assert with_overrides(schema, df, {"amount": "Memo"})["warnings"]
+
+    path = str(tmp_path / "schema.json")
+    schema_for(df, path)
+    stored = with_overrides(load_schema(path), df, {"amount": "Bill"})
+    # the same columns reuse the stored schema; new columns re-detect and keep overrides that still apply
+    assert schema_for(df, path)["columns"] == list(df.columns)
+    renewed = infer_schema(df.assign(Extra=1), stored)
+    assert effective_roles(renewed)["amount"] == "Bill"
+
+
+def test_reminders_use_the_mapped_currency_column(tmp_path):
+    headers = [h if h != "Currency" else "Billing Ccy" for h in HEADERS]
+    path = write_invoices(tmp_path / "renamed.xlsx", invoice_rows(30), headers=headers)
+    df, display_map = core.load_workbook(path)
+    roles = {**detect_roles(df.columns), "currency": "Billing Ccy"}
+    ledger = build_ledger(df, display_map, roles=roles)
+    tables = reminder_tables(ledger, {"INR": 1.0, "USD": 83.0})
+    shown = {inv["currency"] for table in tables.values() for inv in table["invoices"]}
+    assert shown == set(df["Billing Ccy"])
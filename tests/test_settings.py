@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from receivables import settings
+from receivables.settings import SettingsStore, migrate_legacy_files, open_settings
+
+
+@pytest.fixture
+def legacy_dir(tmp_path):
+    (tmp_path / "sender_credentials.txt").write_text("billing@example.com\nsecret\n", encoding="utf-8")
+    (tmp_path / "client_emails.json").write_text(
+        json.dumps({"cc_email": "cc@example.com", "clients": {"Acme": "ap@acme.test"}}), encoding="utf-8"
+    )
+    (tmp_path / "usd_inr_rate.txt").write_text("83.5", encoding="utf-8")
+    (tmp_path / "fx_rates.json").write_text(json.dumps({"USD": "83.5", "EUR": 90}), encoding="utf-8")
+    (tmp_path / "upload_time.txt").write_text("2026-03-30 18:45:00", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SettingsStore(str(tmp_path / "settings.db"))
+    yield store
+    store.close()
+
+
+def test_migrates_legacy_files_once(legacy_dir, store):
+    assert migrate_legacy_files(store, str(legacy_dir)) == [
+        settings.CLIENT_EMAILS, settings.FX_RATES, settings.SENDER, settings.UPLOAD_TIME, settings.USD_INR_RATE,
+    ]
+    assert store.get(settings.SENDER) == {"email": "billing@example.com", "password": "secret"}
+    assert store.get(settings.CLIENT_EMAILS)["clients"] == {"Acme": "ap@acme.test"}
+    assert store.get(settings.USD_INR_RATE) == 83.5
+    assert store.get(settings.FX_RATES) == {"USD": 83.5, "EUR": 90.0}
+    assert store.get(settings.UPLOAD_TIME) == "2026-03-30 18:45:00"
+
+    # later edits to the files are not imported again
+    (legacy_dir / "usd_inr_rate.txt").write_text("99", encoding="utf-8")
+    assert migrate_legacy_files(store, str(legacy_dir)) == []
+    assert store.get(settings.USD_INR_RATE) == 83.5
+
+
+def test_migration_keeps_settings_already_in_the_store(legacy_dir, store):
+    store.set(settings.USD_INR_RATE, 80.0)
+    (legacy_dir / "client_emails.json").write_text("not json", encoding="utf-8")
+    imported = migrate_legacy_files(store, str(legacy_dir))
+    assert settings.USD_INR_RATE not in imported and settings.CLIENT_EMAILS not in imported
+    assert store.get(settings.USD_INR_RATE) == 80.0
+    assert store.get(settings.CLIENT_EMAILS) is None
+
+
+def test_open_settings_without_legacy_files(tmp_path):
+    store = open_settings(str(tmp_path))
+    try:
+        assert store.get(settings.SENDER) is None
+        assert (tmp_path / "settings.db").exists()
+    finally:
+        store.close()
+
+
+def test_get_returns_a_copy(store):
+    store.set(settings.FX_RATES, {"USD": 83.0})
+    store.get(settings.FX_RATES)["USD"] = 1.0
+    assert store.get(settings.FX_RATES) == {"USD": 83.0}
+
+
+def test_sees_writes_from_another_connection(store):
+    store.set(settings.USD_INR_RATE, 83.0)
+    other = SettingsStore(store.path)
+    try:
+        assert other.get(settings.USD_INR_RATE) == 83.0
+        other.update({settings.USD_INR_RATE: 84.0, settings.UPLOAD_TIME: "2026-03-31 10:00:00"})
+        # the cached copy is reloaded because data_version changed
+        assert store.get(settings.USD_INR_RATE) == 84.0
+        assert store.get(settings.UPLOAD_TIME) == "2026-03-31 10:00:00"
+        store.set(settings.USD_INR_RATE, 85.0)
+        assert other.get(settings.USD_INR_RATE) == 85.0
+    finally:
+        other.close()
+
+
+def test_unchanged_store_is_not_reread(store):
+    store.set(settings.USD_INR_RATE, 83.0)
+    store.get(settings.USD_INR_RATE)
+    cached = store._values
+    assert store.get(settings.USD_INR_RATE) == 83.0
+    assert store._values is cached
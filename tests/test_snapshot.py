@@ -0,0 +1,37 @@
+import pandas as pd
+
+from receivables import core
+from receivables.cache import file_digest
+from receivables.ledger import build_ledger
+from receivables.snapshot import read_snapshot, write_snapshot
+
+
+def assert_same_ledger(left, right):
+    pd.testing.assert_frame_equal(left.df, right.df)
+    pd.testing.assert_frame_equal(left.parsed, right.parsed)
+    assert left.display_map == right.display_map
+    assert left.roles == right.roles
+    assert left.source_digest == right.source_digest
+
+
+def test_round_trip(workbook_path, tmp_path):
+    df, display_map = core.load_workbook(workbook_path)
+    ledger = build_ledger(df, display_map, file_digest(workbook_path))
+    snapshot = str(tmp_path / "ledger.parquet")
+    write_snapshot(snapshot, ledger)
+    assert_same_ledger(read_snapshot(snapshot, ledger.source_digest), ledger)
+
+
+def test_stale_or_missing_snapshot_is_ignored(workbook_path, tmp_path):
+    snapshot = str(tmp_path / "ledger.parquet")
+    assert read_snapshot(snapshot) is None
+    df, display_map = core.load_workbook(workbook_path)
+    write_snapshot(snapshot, build_ledger(df, display_map, "old-digest"))
+    assert read_snapshot(snapshot, "new-digest") is None
+
+
+def test_load_ledger_writes_and_reuses_snapshot(workbook_path, tmp_path):
+    snapshot = str(tmp_path / "ledger.parquet")
+    parsed = core.load_ledger(workbook_path, snapshot_path=snapshot)
+    assert read_snapshot(snapshot, file_digest(workbook_path)) is not None
+    assert_same_ledger(core.load_ledger(workbook_path, snapshot_path=snapshot), parsed)
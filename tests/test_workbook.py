@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from conftest import write_invoices
+from receivables.workbook import read_excel_with_display_values
+
+
+def assert_matches_pandas(path):
+    df, display_map = read_excel_with_display_values(path)
+    expected = pd.read_excel(path, dtype=object)
+    pd.testing.assert_frame_equal(df, expected)
+    assert list(display_map) == list(df.columns)
+    assert all(len(values) == len(df) for values in display_map.values())
+    return df, display_map
+
+
+def test_matches_read_excel(workbook_path):
+    df, display_map = assert_matches_pandas(workbook_path)
+    assert len(df) == 60
+    # display strings carry the symbol of the cell's number format
+    for amount, currency, shown in zip(df["Invoice Amount"], df["Currency"], display_map["Invoice Amount"]):
+        symbol = "$" if currency == "USD" else "₹"
+        assert shown == f"{symbol}{float(amount):,.2f}"
+    assert display_map["Client Name"][0] == df["Client Name"][0]
+
+
+def test_irregular_sheet_matches_read_excel(tmp_path):
+    # blank and repeated headers, NA strings, ints, bools, a gap row, data past the header
+    rows = [
+        [1, "a", None, "N/A", datetime(2026, 1, 2), True],
+        [2.5, None, "x", "NULL", None, False],
+        [None, None, None, None, None, None],
+        [3, "b", 4, "", datetime(2026, 2, 3), None, "extra"],
+        [None, None, None, None, None, None],
+    ]
+    path = write_invoices(tmp_path / "odd.xlsx", rows, headers=["Amount", "Note", None, "Note", "Date", "Flag"])
+    df, display_map = assert_matches_pandas(path)
+    assert list(df.columns) == ["Amount", "Note", "Unnamed: 2", "Note.1", "Date", "Flag", "Unnamed: 6"]
+    assert display_map["Amount"][:2] == ["1.00", "2.50"]
+    assert display_map["Note"][1] is None
+
+
+def test_header_only_sheet(tmp_path):
+    path = write_invoices(tmp_path / "empty.xlsx", [])
+    df, display_map = read_excel_with_display_values(path)
+    assert list(df.columns) == list(pd.read_excel(path).columns)
+    assert len(df) == 0
+    assert all(values == [] for values in display_map.values())
+    assert np.all(df.dtypes == object)